@@ -1,18 +1,40 @@
 import logging
 from lib.Client import Client
 from lib.download.arguments import parser
-from lib.utils.enums import Protocol
+from lib.utils.constants import MAX_PAYLOAD_SIZE
+from lib.utils.enums import Compression, Protocol
 import time
 
 
 def download(
-    file_path: str, host: str, port: int, protocol: Protocol, logging_level
+    file_path: str,
+    host: str,
+    port: int,
+    protocol: Protocol,
+    logging_level,
+    streams: int = 1,
+    resume: bool = False,
+    max_payload_size: int = MAX_PAYLOAD_SIZE,
+    compression: Compression = Compression.NONE,
+    compression_level: int | None = None,
 ) -> None:
     ##### TIMER PARA CUANTO TARDA LA CONSULTA DEL CLIENTE #####
 
     start_time = time.time()
 
-    client = Client("download", file_path, host, port, protocol, logging_level)
+    client = Client(
+        "download",
+        file_path,
+        host,
+        port,
+        protocol,
+        logging_level,
+        streams=streams,
+        resume=resume,
+        max_payload_size=max_payload_size,
+        compression=compression,
+        compression_level=compression_level,
+    )
     client.start()
 
     end_time = time.time()
@@ -36,4 +58,15 @@ if __name__ == "__main__":
     else:
         logging_level = logging.INFO
 
-    download(file_path, host, port, protocol, logging_level)
+    download(
+        file_path,
+        host,
+        port,
+        protocol,
+        logging_level,
+        args.streams,
+        args.resume,
+        args.payload_size,
+        Compression[args.compression.upper()],
+        args.level,
+    )
@@ -1,12 +1,21 @@
 import logging
+import zlib
 from typing import Literal
 
 from lib.utils.logger import create_logger
+from lib.utils.DictionaryCache import DictionaryCache
 from lib.utils.Socket import Socket
 from lib.common.Upload import Upload
-from lib.utils.constants import DEFAULT_PORT, DEFAULT_HOST
+from lib.utils.constants import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DICTIONARY_CACHE,
+    MAX_PAYLOAD_SIZE,
+)
 from lib.common.Download import Download
-from lib.utils.enums import Protocol
+from lib.common.ParallelTransfer import ParallelTransfer
+from lib.utils.enums import CongestionControl, Compression, Protocol
+from lib.utils.package_error import PackageErr
 
 
 class Client:
@@ -18,6 +27,13 @@ class Client:
         port: int = DEFAULT_PORT,
         protocol: Protocol = Protocol.STOP_WAIT,
         logging_level=logging.DEBUG,
+        congestion_control: CongestionControl = CongestionControl.FIXED,
+        streams: int = 1,
+        resume: bool = False,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
+        compression: Compression = Compression.NONE,
+        compression_level: int | None = None,
+        dictionary_cache: str = DICTIONARY_CACHE,
     ) -> None:
         self.host = host
         self.port = port
@@ -27,25 +43,85 @@ class Client:
         self.socket = Socket(logging_level)
         self.file_path = file_path
         self.protocol = protocol
+        self.congestion_control = congestion_control
 
-        if self.operation == "upload":
+        if self.operation not in ("upload", "download"):
+            raise ValueError("Invalid operation. Use 'upload' or 'download'.")
+
+        # con zlib se comprime contra el diccionario que se haya bajado de
+        # este servidor; sirve para archivos chicos, que van en un solo rango
+        self.dictionaries: DictionaryCache | None = None
+        dictionary = None
+        if compression == Compression.ZLIB and streams == 1:
+            self.dictionaries = DictionaryCache(dictionary_cache, (host, port))
+            dictionary = self.dictionaries.load()
+
+        if streams > 1:
+            self.operator = ParallelTransfer(
+                self.operation,
+                self.file_path,
+                (self.host, self.port),
+                streams,
+                self.protocol,
+                self.logging_level,
+                self.congestion_control,
+                resume,
+                max_payload_size,
+                compression,
+                compression_level,
+            )
+        elif self.operation == "upload":
             self.operator = Upload(
                 self.file_path,
                 self.socket,
                 (self.host, self.port),
                 self.protocol,
                 self.logging_level,
+                self.congestion_control,
+                resume=resume,
+                max_payload_size=max_payload_size,
+                compression=compression,
+                compression_level=compression_level,
+                dictionary=dictionary,
             )
-        elif self.operation == "download":
+        else:
             self.operator = Download(
                 self.file_path,
                 self.socket,
                 (self.host, self.port),
                 self.protocol,
                 self.logging_level,
+                resume=resume,
+                max_payload_size=max_payload_size,
+                compression=compression,
+                compression_level=compression_level,
+                dictionary=dictionary,
             )
-        else:
-            raise ValueError("Invalid operation. Use 'upload' or 'download'.")
 
-    def start(self) -> None:
-        self.operator.start()
+    def start(self) -> bool:
+        if not self.operator.start():
+            return False
+        if self.dictionaries is not None:
+            self.update_dictionary()
+        return True
+
+    def update_dictionary(self) -> None:
+        # si el servidor anunció otro diccionario se baja para la próxima
+        # transferencia; si falla esta ya terminó bien igual
+        advertised = self.operator.advertised_dictionary
+        if not advertised or advertised == self.operator.dictionary_id:
+            return
+        download = Download(
+            self.dictionaries.path(advertised),
+            Socket(self.logging_level),
+            (self.host, self.port),
+            self.protocol,
+            self.logging_level,
+        )
+        try:
+            fetched = download.start()
+        except (OSError, TimeoutError, PackageErr, zlib.error) as e:
+            self.logger.warning(f"No se pudo bajar el diccionario: {e}")
+            fetched = False
+        if fetched and self.dictionaries.keep(advertised):
+            self.logger.info(f"Diccionario {advertised:08x} de {self.host}:{self.port}")
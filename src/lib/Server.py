@@ -1,10 +1,10 @@
+import asyncio
 import logging
+import socket
 from lib.utils.logger import create_logger
-from lib.utils.Socket import Socket
 from lib.server.ServerRequestHandler import ServerRequestHandler
-from lib.utils.constants import SERVER_STORAGE
-from lib.utils.enums import Protocol
-from lib.utils.package_error import ChecksumErr, PackageErr
+from lib.utils.constants import MAX_PAYLOAD_SIZE, SERVER_RECV_BUFFER, SERVER_STORAGE
+from lib.utils.enums import CongestionControl, Protocol
 
 
 class Server:
@@ -15,58 +15,88 @@ class Server:
         port: int = 8080,
         server_storage=SERVER_STORAGE,
         logging_level=logging.DEBUG,
+        congestion_control: CongestionControl = CongestionControl.FIXED,
+        reuse_port: bool = False,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
     ) -> None:
         self.host = host
         self.port = port
         self.running = False
-        self.socket = Socket(logging_level)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.stopped: asyncio.Event | None = None
         self.logging_level = logging_level
         self.logger = create_logger("server", "[SERVER]", logging_level)
         self.server_storage = server_storage
         self.protocol = protocol
+        self.congestion_control = congestion_control
+        # con SO_REUSEPORT varios procesos escuchan en el mismo puerto y el
+        # kernel reparte los clientes entre ellos según su dirección
+        self.reuse_port = reuse_port
+        # lo más que se acuerda con un cliente que sondeó un path MTU grande
+        self.max_payload_size = max_payload_size
 
         print("EL PROTOCOLO ES: ", self.protocol)
 
-    def bind_socket(self) -> None:
+    def bind_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # con muchos clientes el buffer por defecto se llena y se pierden
+        # datagramas antes de que el loop llegue a leerlos
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SERVER_RECV_BUFFER)
+        if self.reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         try:
-            self.port = self.socket.bind(self.host, self.port)
+            sock.bind((self.host, self.port))
         except OSError as e:
             self.logger.error(f"Error binding socket: {e}")
+            sock.close()
             raise
+        self.port = sock.getsockname()[1]
+        return sock
 
     def start(self) -> None:
         self.running = True
-        self.bind_socket()
+        sock = self.bind_socket()
         self.logger.info(f"Server started on {self.host}:{self.port}")
         self.logger.info(f"Protocol: {self.protocol.name}")
+        self.logger.info(f"Congestion control: {self.congestion_control.name}")
         self.logger.info(f"Server storage: {self.server_storage}")
 
+        try:
+            asyncio.run(self.serve(sock))
+        except KeyboardInterrupt:
+            self.logger.info("Interrupción del teclado recibida. Cerrando el servidor.")
+            self.stop()
+
+    async def serve(self, sock: socket.socket) -> None:
+        # stop() llega desde otro thread: necesita el loop y el evento
+        self.stopped = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+
         request_handler = ServerRequestHandler(
-            self.server_storage, self.socket, self.protocol, self.logging_level
+            self.server_storage,
+            self.protocol,
+            self.logging_level,
+            self.congestion_control,
+            self.max_payload_size,
+        )
+        transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: request_handler, sock=sock
         )
 
-        while self.running:
-            try:
-                request = self.socket.recv()
-                request_handler.handle_request(request)
-            except KeyboardInterrupt:
-                self.logger.info(
-                    "Interrupción del teclado recibida. Cerrando el servidor."
-                )
-                self.stop()
-                break
-            except (PackageErr, ChecksumErr, TimeoutError) as e:
-                self.logger.error(f"Error in package: {e}")
-                continue
-            except OSError as e:
-                if not self.running:
-                    break
-                self.logger.error(f"Error receiving data: {e}")
-                break
-            except Exception as e:
-                self.logger.error(f"Unexpected error: {e}")
+        try:
+            if self.running:
+                await self.stopped.wait()
+        finally:
+            await request_handler.close()
+            transport.close()
+            self.loop = None
 
     def stop(self) -> None:
-        self.socket.close()
         self.running = False
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self.stopped.set)
+            except RuntimeError:
+                pass  # el loop ya terminó
         self.logger.info("Server stopped")
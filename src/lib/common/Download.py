@@ -1,15 +1,29 @@
 import os
+from collections.abc import Hashable
+from lib.utils.checksum import HAVE_CRC32C
+from lib.utils.constants import (
+    HANDSHAKE_RETRIES,
+    IDLE_TIMEOUT,
+    INITIAL_RTO,
+    MAX_PAYLOAD_SIZE,
+    PAYLOAD_SIZE,
+    START_ACK_SEQUENCE,
+)
 from lib.utils.Socket import Socket
+from lib.utils.TransferJournal import TransferJournal
 from lib.utils.types import ADDR
-from lib.packages.InitPackage import DownloadHeader
+from lib.packages.InitPackage import DownloadHeader, InitPackage
 from lib.packages.AckPackage import AckPackage
 import logging
 from lib.utils.logger import create_logger
-from lib.utils.enums import Protocol
-from lib.packages.FinPackage import FinPackage
+from lib.utils.enums import Compression, Protocol
+from lib.packages.FinPackage import FinPackage, answers_fin
+from lib.packages.Package import Package
+from lib.protocols.compression import default_level, dictionary_id
 from lib.protocols.selective_repeat import SelectiveRepeatProtocol
 from lib.protocols.stop_and_wait import StopAndWaitProtocol
 from lib.utils.enums import PackageType
+from lib.utils.package_error import PackageErr
 
 
 class Download:
@@ -20,10 +34,37 @@ class Download:
         server_addr: ADDR,
         protocol=Protocol.STOP_WAIT,
         logging_level=logging.DEBUG,
+        offset: int = 0,
+        length: int = 0,
+        resume: bool = False,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
+        compression: Compression = Compression.NONE,
+        compression_level: int | None = None,
+        dictionary: bytes | None = None,
     ) -> None:
         self.file_path = file_path
+        # el payload más grande que se sondea; el servidor puede achicarlo
+        self.max_payload_size = max_payload_size
+        # la compresión que se pide; se usa la que confirme el servidor
+        self.compression = compression
+        self.compression_level = compression_level
+        if compression_level is None:
+            self.compression_level = default_level(compression)
+        # el diccionario de zlib que se tiene de este servidor y el que
+        # anunció en su respuesta, que puede ser otro
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary_id(dictionary) if dictionary else 0
+        self.advertised_dictionary = 0
+        self.payload_size: int | None = None
+        # rango del archivo a bajar; length 0 es el archivo entero
+        self.offset = offset
+        self.length = length
+        self.file_size: int | None = None
+        # sigue desde lo que el journal diga que ya está en el archivo local
+        self.resume = resume
+        self.journal = TransferJournal(file_path)
         self.socket = socket
-        self.server_addr = server_addr
+        self.server_addr = self.listen_addr = server_addr
         self.logger = create_logger(
             "client-download", "[CLIENT DOWNLOAD]", logging_level
         )
@@ -37,35 +78,194 @@ class Download:
         else:
             raise ValueError("Unsupported protocol")
 
-    def start(self) -> None:
-        if not self.send_download_header():
-            return
+    def start(self) -> bool:
+        saved_size, start = self.resume_point()
+        end = self.offset + self.length if self.length else saved_size
+        if end is not None and start >= end:
+            self.logger.info(f"El rango de {self.file_name} ya estaba completo")
+            self.socket.close()
+            return True
+        if saved_size is None and not self.length:
+            self.journal.discard()  # se baja de cero: lo anotado ya no vale
 
-        self.send_ack(0)
+        length = end - start if self.length else 0
+        if not self.send_download_header(start, length):
+            return False
 
-        with open(self.file_path, "wb") as file:
-            self.protocol_handler.receive(file)
+        if saved_size is not None and self.file_size != saved_size:
+            # el archivo cambió en el servidor: lo bajado no sirve
+            self.logger.warning(f"{self.file_name} cambió, se baja de nuevo")
+            if not self.request_fin():
+                self.socket.close()
+                return False
+            self.journal.discard()
+            self.resume = False
+            self.use_transfer_addr(self.listen_addr)
+            return self.start()
+        if end is None:
+            end = self.file_size
 
-        self.logger.info(f"File {self.file_name} downloaded successfully.")
+        self.start_transfer()
 
-        fin_package = FinPackage()
-        self.socket.sendto(fin_package, self.server_addr)
+        # un rango, o una bajada que se retoma, se escribe dentro del archivo
+        # que ya existe, sin truncarlo
+        mode = "r+b" if self.length or saved_size is not None else "wb"
+        completed = verified = corrupt = False
+        # sin noticias del servidor por IDLE_TIMEOUT se abandona la bajada
+        self.socket.settimeout(IDLE_TIMEOUT)
+        try:
+            with open(self.file_path, mode) as file:
+                file.seek(start)
+                self.protocol_handler.receive(file)
+            completed = True
+            verified = self.protocol_handler.verified()
+        except TimeoutError:
+            self.logger.error(f"El servidor dejó de responder bajando {self.file_name}")
+        except PackageErr as e:
+            # un frame comprimido que no decodifica: lo escrito no es confiable
+            corrupt = True
+            self.logger.error(f"No se pudo decodificar {self.file_name}: {e}")
+        finally:
+            self.socket.scheduler.cancel(("start", self.server_addr))
+            # una bajada cortada deja anotado hasta dónde llegó; una que no
+            # coincide con el digest del servidor no anota nada y el rango
+            # se vuelve a pedir entero, igual que una que no se pudo decodificar
+            received = end - start
+            if not completed:
+                received = min(self.protocol_handler.received_bytes(), received)
+            if (verified or not completed) and not corrupt:
+                self.journal.record(self.file_size, start, start + received)
 
-        self.socket.recv()
+        if not completed:
+            self.socket.close()
+            return False
+
+        # lo bajado ya quedó anotado: si el FIN no se confirma se puede retomar
+        if not self.request_fin():
+            self.socket.close()
+            return False
 
         self.socket.close()
+        if not verified:
+            self.logger.error(
+                f"{self.file_name} no coincide con el digest del servidor"
+            )
+            return False
+
+        self.logger.info(f"File {self.file_name} downloaded successfully.")
+        return True
 
     def send_ack(self, sequence_number: int = 0) -> None:
         ack = AckPackage(sequence_number)
         self.socket.sendto(ack, self.server_addr)
 
-    def send_download_header(self) -> bool:
-        header = DownloadHeader(self.file_name)
-        self.logger.debug(f"Sending download header: {header}")
-        self.socket.sendto(header, self.server_addr)
+    def start_transfer(self) -> None:
+        # si se pierde el ACK que arranca la bajada el servidor no manda
+        # nada: se reenvía hasta que lleguen datos
+        self.start_retries = HANDSHAKE_RETRIES
+        self.send_ack(START_ACK_SEQUENCE)
+        self.socket.scheduler.arm(
+            ("start", self.server_addr), INITIAL_RTO, self._resend_start
+        )
 
-        package, _ = self.socket.recv()
+    def _resend_start(self, key: Hashable) -> None:
+        if self.protocol_handler.received_bytes() or not self.start_retries:
+            return
+        self.start_retries -= 1
+        self.send_ack(START_ACK_SEQUENCE)
+        self.socket.scheduler.arm(key, INITIAL_RTO, self._resend_start)
+
+    def resume_point(self) -> tuple[int | None, int]:
+        """Tamaño del archivo según el journal (None si no se retoma) y primer byte a pedir."""
+        if not self.resume or not os.path.exists(self.file_path):
+            return None, self.offset
+        journal = self.journal.load()
+        if journal is None:
+            return None, self.offset
+        file_size = journal[0]
+        end = self.offset + self.length if self.length else file_size
+        start = self.journal.resume_offset(file_size, self.offset, end)
+        if start > self.offset:
+            self.logger.info(
+                f"Retomando la bajada de {self.file_name} en el byte {start}"
+            )
+        return file_size, start
+
+    def send_download_header(
+        self, offset: int | None = None, length: int | None = None
+    ) -> bool:
+        if offset is None:
+            offset, length = self.offset, self.length
+        if self.payload_size is None:
+            # se sondea una vez aunque el Init se repita
+            self.payload_size = self.socket.probe_payload_size(
+                self.server_addr, self.max_payload_size
+            )
+        header = DownloadHeader(
+            self.file_name,
+            self.protocol,
+            offset,
+            length,
+            castagnoli=HAVE_CRC32C,
+            payload_size=self.payload_size,
+            compression=self.compression,
+            compression_level=self.compression_level,
+            dictionary_id=self.dictionary_id,
+        )
+        self.logger.debug(f"Sending download header: {header}")
+        package, transfer_addr = self.request_init(header)
+        self.use_transfer_addr(transfer_addr)
         if package.type.value == PackageType.FIN.value:
             self.logger.error("Archivo no existe")
             return False
+        if isinstance(package, InitPackage):
+            self.file_size = package.file_size
+            self.protocol_handler.castagnoli = package.castagnoli
+            self.use_payload_size(package.payload_size or PAYLOAD_SIZE)
+            self.use_compression(package)
+        return True
+
+    def request_fin(self) -> bool:
+        """Cierra la transferencia con el servidor; False si no respondió."""
+        # solo cuenta el ACK del FIN que manda el socket de la transferencia
+        try:
+            self.socket.request(
+                FinPackage(),
+                self.server_addr,
+                lambda reply, source: source == self.server_addr and answers_fin(reply),
+            )
+        except TimeoutError as e:
+            self.logger.error(
+                f"El servidor no confirmó el FIN de {self.file_name}: {e}"
+            )
+            return False
         return True
+
+    def request_init(self, header: InitPackage) -> tuple[Package, ADDR]:
+        # responde el socket de la transferencia, en otro puerto del mismo
+        # host: un ACK atrasado de una sonda no es la respuesta
+        host, _ = self.socket.resolve(self.server_addr)
+        return self.socket.request(
+            header,
+            self.server_addr,
+            lambda reply, source: (
+                source[0] == host and reply.type in (PackageType.INIT, PackageType.FIN)
+            ),
+        )
+
+    def use_transfer_addr(self, addr: ADDR) -> None:
+        # el servidor responde el Init desde el socket propio de la transferencia
+        self.server_addr = addr
+        self.protocol_handler.server_addr = addr
+
+    def use_payload_size(self, payload_size: int) -> None:
+        # el acordado en el Init: los paquetes y los buffers del socket
+        self.socket.set_payload_size(payload_size)
+        self.protocol_handler.payload_size = payload_size
+
+    def use_compression(self, response: InitPackage) -> None:
+        self.protocol_handler.compression = response.compression
+        self.protocol_handler.compression_level = response.compression_level
+        self.advertised_dictionary = response.dictionary_id
+        if self.dictionary_id and response.dictionary_id == self.dictionary_id:
+            self.protocol_handler.dictionary = self.dictionary
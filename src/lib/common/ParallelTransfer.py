@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+from typing import Literal
+
+from lib.common.Download import Download
+from lib.common.Upload import Upload
+from lib.utils.constants import MAX_PAYLOAD_SIZE, PAYLOAD_SIZE, RANGE_RETRIES
+from lib.utils.enums import CongestionControl, Compression, Protocol
+from lib.utils.logger import create_logger
+from lib.utils.package_error import PackageErr
+from lib.utils.Socket import Socket
+from lib.utils.TransferJournal import TransferJournal
+from lib.utils.types import ADDR
+
+
+def split_ranges(file_size: int, streams: int) -> list[tuple[int, int]]:
+    """
+    Parte [0, file_size) en a lo sumo streams rangos (offset, length). Los
+    cortes caen en múltiplos de PAYLOAD_SIZE, así cada rango arranca con un
+    paquete completo y ninguno queda vacío.
+    """
+    if file_size == 0:
+        return [(0, 0)]
+    packets = -(-file_size // PAYLOAD_SIZE)
+    streams = max(1, min(streams, packets))
+    per_stream = -(-packets // streams) * PAYLOAD_SIZE
+
+    ranges = []
+    for offset in range(0, file_size, per_stream):
+        ranges.append((offset, min(per_stream, file_size - offset)))
+    return ranges
+
+
+class ParallelTransfer:
+    """
+    Sube o baja un archivo por varias transferencias simultáneas, una por
+    rango de bytes, cada una con su socket y su hilo. Del lado del servidor
+    cada rango es un cliente más. Un rango que falla se reintenta solo,
+    retomándolo desde donde quedó y sin volver a mandar los demás.
+    """
+
+    def __init__(
+        self,
+        operation: Literal["upload", "download"],
+        file_path: str,
+        server_addr: ADDR,
+        streams: int,
+        protocol=Protocol.STOP_WAIT,
+        logging_level=logging.DEBUG,
+        congestion_control=CongestionControl.FIXED,
+        resume: bool = False,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
+        compression: Compression = Compression.NONE,
+        compression_level: int | None = None,
+    ) -> None:
+        self.operation = operation
+        self.max_payload_size = max_payload_size
+        # cada rango se comprime por separado
+        self.compression = compression
+        self.compression_level = compression_level
+        self.resume = resume
+        # subida nueva: el primer rango descarta el journal que el servidor
+        # tenga del archivo y los demás esperan a que lo haya aceptado
+        self.journal_reset = threading.Event()
+        self.reset_done = False
+        self.file_path = file_path
+        self.server_addr = server_addr
+        self.streams = streams
+        self.protocol = protocol
+        self.logging_level = logging_level
+        self.congestion_control = congestion_control
+        self.logger = create_logger(
+            "client-parallel", "[CLIENT PARALLEL]", logging_level
+        )
+
+    def start(self) -> bool:
+        if self.operation == "upload":
+            if not os.path.isfile(self.file_path):
+                self.logger.error(f"No se encontró el archivo: {self.file_path}")
+                return False
+            file_size = os.path.getsize(self.file_path)
+        else:
+            file_size = self.probe_file_size()
+            if file_size is None:
+                return False
+
+        ranges = split_ranges(file_size, self.streams)
+        if len(ranges) == 1:
+            # el archivo entra en un solo rango: una transferencia común
+            return self.transfer(0, 0, self.resume)
+
+        if self.operation == "download":
+            self.prepare_download(file_size)
+
+        self.logger.info(
+            f"{self.operation} de {self.file_path} en {len(ranges)} rangos"
+        )
+        results = [False] * len(ranges)
+        threads = [
+            threading.Thread(target=self._run_range, args=(results, i, offset, length))
+            for i, (offset, length) in enumerate(ranges)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return all(results)
+
+    def _run_range(
+        self, results: list[bool], index: int, offset: int, length: int
+    ) -> None:
+        resetting = self.operation == "upload" and not self.resume
+        if resetting and index > 0:
+            # si se sumara al journal antes del reset, se perdería lo anotado
+            self.journal_reset.wait()
+            if not self.reset_done:
+                return
+        try:
+            for attempt in range(1, RANGE_RETRIES + 1):
+                resume = self.resume or attempt > 1
+                if resetting:
+                    # pasado el reset todos retoman sobre el journal nuevo
+                    resume = self.reset_done
+                try:
+                    if self.transfer(offset, length, resume):
+                        results[index] = True
+                        return
+                except (OSError, TimeoutError, PackageErr) as e:
+                    # un error de red o un paquete roto se reintenta; otra
+                    # cosa es un error de programación y corta el rango
+                    self.logger.warning(f"Rango {offset}+{length} falló: {e}")
+                self.logger.warning(
+                    f"Reintentando rango {offset}+{length} ({attempt}/{RANGE_RETRIES})"
+                )
+        finally:
+            if index == 0:
+                # si el primer rango no llegó a hacer el reset, los demás
+                # no arrancan: la subida ya falló
+                self.journal_reset.set()
+
+    def _accepted(self) -> None:
+        self.reset_done = True
+        self.journal_reset.set()
+
+    def prepare_download(self, file_size: int) -> None:
+        # cada rango escribe en su lugar de un archivo ya del tamaño final;
+        # si se retoma, lo bajado sirve mientras el journal sea de este tamaño
+        journal = TransferJournal(self.file_path).load()
+        if (
+            self.resume
+            and journal is not None
+            and journal[0] == file_size
+            and os.path.exists(self.file_path)
+        ):
+            with open(self.file_path, "r+b") as file:
+                file.truncate(file_size)
+            return
+        TransferJournal(self.file_path).discard()
+        with open(self.file_path, "wb") as file:
+            file.truncate(file_size)
+
+    def transfer(self, offset: int, length: int, resume: bool) -> bool:
+        socket = Socket(self.logging_level)
+        if self.operation == "upload":
+            operator = Upload(
+                self.file_path,
+                socket,
+                self.server_addr,
+                self.protocol,
+                self.logging_level,
+                self.congestion_control,
+                offset,
+                length,
+                resume,
+                self.max_payload_size,
+                self.compression,
+                self.compression_level,
+                on_accepted=self._accepted,
+            )
+        else:
+            operator = Download(
+                self.file_path,
+                socket,
+                self.server_addr,
+                self.protocol,
+                self.logging_level,
+                offset,
+                length,
+                resume,
+                self.max_payload_size,
+                self.compression,
+                self.compression_level,
+            )
+        try:
+            return operator.start()
+        finally:
+            socket.close()
+
+    def probe_file_size(self) -> int | None:
+        # Init de descarga solo para conocer el tamaño; el FIN la cierra
+        # antes de que el servidor mande datos
+        socket = Socket(self.logging_level)
+        probe = Download(
+            self.file_path,
+            socket,
+            self.server_addr,
+            self.protocol,
+            self.logging_level,
+            max_payload_size=self.max_payload_size,
+        )
+        try:
+            if not probe.send_download_header():
+                return None
+            probe.request_fin()
+            return probe.file_size
+        finally:
+            socket.close()
@@ -1,13 +1,19 @@
 import logging
 import os
+from collections.abc import Callable
+from lib.utils.checksum import HAVE_CRC32C
+from lib.utils.constants import MAX_PAYLOAD_SIZE, PAYLOAD_SIZE
+from lib.utils.FileRange import FileRange
 from lib.utils.Socket import Socket
 from lib.utils.types import ADDR
-from lib.packages.InitPackage import UploadHeader
+from lib.packages.InitPackage import InitPackage, UploadHeader
 from lib.utils.logger import create_logger
-from lib.packages.FinPackage import FinPackage
+from lib.packages.FinPackage import FinPackage, answers_fin
+from lib.packages.Package import Package
+from lib.protocols.compression import default_level, dictionary_id
 from lib.protocols.stop_and_wait import StopAndWaitProtocol
 from lib.protocols.selective_repeat import SelectiveRepeatProtocol
-from lib.utils.enums import Protocol
+from lib.utils.enums import CongestionControl, Compression, PackageType, Protocol
 
 
 class Upload:
@@ -18,8 +24,36 @@ class Upload:
         server_addr: ADDR,
         protocol=Protocol.STOP_WAIT,
         logging_level=logging.DEBUG,
+        congestion_control=CongestionControl.FIXED,
+        offset: int = 0,
+        length: int = 0,
+        resume: bool = False,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
+        compression: Compression = Compression.NONE,
+        compression_level: int | None = None,
+        dictionary: bytes | None = None,
+        on_accepted: Callable[[], None] | None = None,
     ) -> None:
         self.file_path = file_path
+        # se llama cuando el servidor acepta el Init
+        self.on_accepted = on_accepted
+        # el payload más grande que se sondea; el servidor puede achicarlo
+        self.max_payload_size = max_payload_size
+        # la compresión que se pide; se usa la que confirme el servidor
+        self.compression = compression
+        self.compression_level = compression_level
+        if compression_level is None:
+            self.compression_level = default_level(compression)
+        # el diccionario de zlib que se tiene de este servidor y el que
+        # anunció en su respuesta, que puede ser otro
+        self.dictionary = dictionary
+        self.dictionary_id = dictionary_id(dictionary) if dictionary else 0
+        self.advertised_dictionary = 0
+        # rango del archivo a subir; length 0 es el archivo entero
+        self.offset = offset
+        self.length = length
+        # el servidor sigue desde lo que ya tenga escrito del rango
+        self.resume = resume
         self.socket = socket
         self.server_addr = server_addr
         self.protocol = protocol
@@ -34,37 +68,126 @@ class Upload:
             )
         elif protocol.value == Protocol.SELECTIVE_REPEAT.value:
             self.protocol_handler = SelectiveRepeatProtocol(
-                socket, server_addr, logging_level=logging_level
+                socket,
+                server_addr,
+                logging_level=logging_level,
+                congestion_control=congestion_control,
             )
         else:
             raise ValueError("Unsupported protocol")
 
-    def start(self) -> None:
+    def start(self) -> bool:
         if not os.path.isfile(self.file_path):
             self.logger.error(f"No se encontró el archivo: {self.file_path}")
-            return
+            return False
 
         file_name = os.path.basename(self.file_path)
+        file_size = os.path.getsize(self.file_path)
 
-        # Enviar el header de la carga de archivo
-        header = UploadHeader(file_name)
-        self.socket.sendto(header, self.server_addr)
+        # Enviar el header de la carga de archivo, pidiendo el payload más
+        # grande que llega sin fragmentarse
+        payload_size = self.socket.probe_payload_size(
+            self.server_addr, self.max_payload_size
+        )
+        header = UploadHeader(
+            file_name,
+            self.protocol,
+            self.offset,
+            self.length,
+            file_size,
+            self.resume,
+            HAVE_CRC32C,
+            payload_size,
+            self.compression,
+            self.compression_level,
+            self.dictionary_id,
+        )
+        end = self.offset + self.length if self.length else file_size
 
         try:
-            self.socket.recv()
+            package, transfer_addr = self.request_init(header)
         except Exception as e:
             self.logger.error(f"Error al conectarse al servidor: {e}")
-            return
+            return False
+        self.use_transfer_addr(transfer_addr)
 
-        ## Protocolo ///
+        if package.type.value == PackageType.FIN.value:
+            self.logger.error(f"El servidor rechazó la subida de {file_name}")
+            self.socket.close()
+            return False
+        if self.on_accepted is not None:
+            self.on_accepted()
 
-        with open(self.file_path, "rb") as file:
-            self.protocol_handler.send(file)
+        # el offset de la respuesta es donde el servidor espera el primer byte
+        offset = self.offset
+        if isinstance(package, InitPackage):
+            offset = package.offset
+            self.protocol_handler.castagnoli = package.castagnoli
+            self.use_payload_size(package.payload_size or PAYLOAD_SIZE)
+            self.use_compression(package)
+        if offset > self.offset:
+            self.logger.info(f"Retomando la subida de {file_name} en el byte {offset}")
 
-        fin_package = FinPackage()
-        self.socket.sendto(fin_package, self.server_addr)
+        ## Protocolo ///
+
+        if offset < end:
+            with open(self.file_path, "rb") as file:
+                source = file
+                if offset or self.length:
+                    source = FileRange(file, offset, end - offset)
+                self.protocol_handler.send(source)
 
-        self.socket.recv()  # Esperar confirmación del servidor
+        # el servidor compara el digest con lo que recibió: si no coincide
+        # responde con otro FIN en vez de confirmar
+        fin_package = FinPackage(self.protocol_handler.digest.digest())
+        try:
+            response, _ = self.request_fin(fin_package)
+        except TimeoutError as e:
+            self.logger.error(f"El servidor no confirmó el FIN de {file_name}: {e}")
+            self.socket.close()
+            return False
         self.socket.close()
+        if response.type.value == PackageType.FIN.value:
+            self.logger.error(f"{file_name} llegó corrupto al servidor")
+            return False
 
         self.logger.info(f"File {file_name} uploaded successfully.")
+        return True
+
+    def request_fin(self, fin_package: FinPackage) -> tuple[Package, ADDR]:
+        # hasta el veredicto del servidor se descarta todo lo demás: un ACK
+        # atrasado de los datos o de una sonda no confirma el FIN
+        return self.socket.request(
+            fin_package,
+            self.server_addr,
+            lambda reply, source: source == self.server_addr and answers_fin(reply),
+        )
+
+    def request_init(self, header: InitPackage) -> tuple[Package, ADDR]:
+        # responde el socket de la transferencia, en otro puerto del mismo
+        # host: un ACK atrasado de una sonda no es la respuesta
+        host, _ = self.socket.resolve(self.server_addr)
+        return self.socket.request(
+            header,
+            self.server_addr,
+            lambda reply, source: (
+                source[0] == host and reply.type in (PackageType.INIT, PackageType.FIN)
+            ),
+        )
+
+    def use_transfer_addr(self, addr: ADDR) -> None:
+        # el servidor responde el Init desde el socket propio de la transferencia
+        self.server_addr = addr
+        self.protocol_handler.server_addr = addr
+
+    def use_payload_size(self, payload_size: int) -> None:
+        # el acordado en el Init: los paquetes y los buffers del socket
+        self.socket.set_payload_size(payload_size)
+        self.protocol_handler.payload_size = payload_size
+
+    def use_compression(self, response: InitPackage) -> None:
+        self.protocol_handler.compression = response.compression
+        self.protocol_handler.compression_level = response.compression_level
+        self.advertised_dictionary = response.dictionary_id
+        if self.dictionary_id and response.dictionary_id == self.dictionary_id:
+            self.protocol_handler.dictionary = self.dictionary
@@ -1,11 +1,16 @@
 from argparse import ArgumentParser
 
-from lib.utils.constants import CLIENT_STORAGE, DEFAULT_PORT, LOCALHOST
-from lib.utils.enums import Protocol
+from lib.utils.constants import (
+    CLIENT_STORAGE,
+    DEFAULT_PORT,
+    LOCALHOST,
+    MAX_PAYLOAD_SIZE,
+)
+from lib.utils.enums import Compression, Protocol
 
 """
 python download -h
-usage : download [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - d FILEPATH ] [ - n FILENAME ] [ - r protocol ]
+usage : download [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - d FILEPATH ] [ - n FILENAME ] [ - r protocol ] [ - t streams ] [ - R ] [ - P BYTES ] [ - z compression ] [ - L LEVEL ]
 < command description >
 optional arguments :
 -h , -- help show this help message and exit
@@ -16,6 +21,11 @@ optional arguments :
 -d , -- dst destination file path
 -n , -- name file name
 -r , -- protocol error recovery protocol
+-t , -- streams parallel transfers over byte ranges
+-R , -- resume continue an interrupted transfer
+-P , -- payload-size largest payload per packet, probed against the path MTU
+-z , -- compression compress the file data on the wire
+-L , -- level compression level, the codec default if not given
 """
 
 parser = ArgumentParser(
@@ -40,3 +50,40 @@ parser.add_argument(
     help="error recovery protocol",
     default=Protocol.STOP_WAIT,
 )
+parser.add_argument(
+    "-t",
+    "--streams",
+    type=int,
+    default=1,
+    help="parallel transfers, each over a byte range of the file",
+)
+parser.add_argument(
+    "-R",
+    "--resume",
+    action="store_true",
+    default=False,
+    help="continue an interrupted transfer where it left off",
+)
+parser.add_argument(
+    "-P",
+    "--payload-size",
+    type=int,
+    default=MAX_PAYLOAD_SIZE,
+    help="largest payload per packet, probed against the path MTU",
+)
+parser.add_argument(
+    "-z",
+    "--compression",
+    type=str,
+    choices=[compression.name.lower() for compression in Compression],
+    default=Compression.NONE.name.lower(),
+    help="compress the file data on the wire",
+)
+parser.add_argument(
+    "-L",
+    "--level",
+    type=int,
+    choices=range(10),
+    default=None,
+    help="compression level, the codec default if not given",
+)
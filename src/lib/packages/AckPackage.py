@@ -1,23 +1,86 @@
-from lib.utils.enums import PackageType
-from lib.utils.constants import SEPARATOR
+import struct
+
+from lib.utils.enums import PackageFlag, PackageType
+from lib.packages.Header import Header
 from lib.packages.Package import Package
 
+# cumulative | window | bitmap (resto del payload, little endian)
+SACK_STRUCT = struct.Struct("!IH")
+NO_WINDOW = 0xFFFF  # el receptor no limita lo que se le manda
+
 
 class AckPackage(Package):
-    def __init__(self, sequence_number: int = 0, valid: bool = True) -> None:
+    """
+    ACK de un paquete. Si lleva bloques SACK, ademas confirma todos los
+    seq_number menores a cumulative y los marcados en el bitmap: el bit i
+    corresponde al seq_number cumulative + 1 + i.
+
+    window es la ventana que anuncia el receptor: cuántos paquetes acepta a
+    partir de cumulative. None si no anuncia ninguna.
+    """
+
+    def __init__(
+        self,
+        sequence_number: int = 0,
+        valid: bool = True,
+        cumulative: int | None = None,
+        sack_bitmap: int = 0,
+        window: int | None = None,
+    ) -> None:
         super().__init__(PackageType.ACK, valid=valid, sequence_number=sequence_number)
+        self.cumulative = cumulative
+        self.sack_bitmap = sack_bitmap
+        self.window = window
+
+    def has_sack(self) -> bool:
+        return self.cumulative is not None
+
+    def acknowledges(self, sequence_number: int) -> bool:
+        if sequence_number == self.sequence_number:
+            return True
+        if self.cumulative is None:
+            return False
+        if sequence_number < self.cumulative:
+            return True
+        offset = sequence_number - self.cumulative - 1
+        return offset >= 0 and bool(self.sack_bitmap >> offset & 1)
+
+    def get_flags(self) -> int:
+        flags = super().get_flags()
+        if self.has_sack():
+            flags |= PackageFlag.SACK
+        return flags
 
     def to_bytes(self) -> bytes:
-        return f"{self.type.value}{SEPARATOR}{self.sequence_number}{SEPARATOR}{self.valid}".encode(
-            "utf-8"
+        if self.cumulative is None:
+            return self.get_header().pack()
+
+        bitmap = self.sack_bitmap.to_bytes(
+            (self.sack_bitmap.bit_length() + 7) // 8, "little"
         )
+        window = NO_WINDOW if self.window is None else min(self.window, NO_WINDOW - 1)
+        payload = SACK_STRUCT.pack(self.cumulative, window) + bitmap
+        return self.get_header(len(payload)).pack() + payload
 
     @classmethod
-    def from_bytes(cls, raw: bytes) -> "AckPackage":
-        parts = raw.decode("utf-8").split(SEPARATOR)
-        sequence_number = int(parts[1])
-        if parts[2] == "False":
-            valid = False
-        else:
-            valid = True
-        return cls(sequence_number, valid)
+    def from_bytes(cls, raw: bytes | memoryview) -> "AckPackage":
+        header = Header.unpack(raw)
+        valid = not header.flags & PackageFlag.INVALID
+        if not header.flags & PackageFlag.SACK:
+            return cls(header.sequence_number, valid)
+
+        payload = Header.payload(raw)
+        cumulative, window = SACK_STRUCT.unpack_from(payload)
+        sack_bitmap = int.from_bytes(payload[SACK_STRUCT.size :], "little")
+        return cls(
+            header.sequence_number,
+            valid,
+            cumulative,
+            sack_bitmap,
+            None if window == NO_WINDOW else window,
+        )
+
+    def __repr__(self) -> str:
+        if self.cumulative is None:
+            return super().__repr__()
+        return f"AckPackage(sequence_number={self.sequence_number}, cumulative={self.cumulative}, sack={self.sack_bitmap:b}, window={self.window}, valid={self.valid})"
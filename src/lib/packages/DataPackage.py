@@ -1,42 +1,49 @@
+from lib.packages.Header import HEADER_SIZE, Header
 from lib.packages.Package import Package
-from lib.utils.enums import PackageType
-from lib.utils.constants import SEPARATOR
+from lib.utils.checksum import HAVE_CRC32C
+from lib.utils.enums import PackageFlag, PackageType
 from lib.utils.package_error import PackageErr
 
 
 class DataPackage(Package):
-    def __init__(self, data: bytes, sequence_number: int):
+    def __init__(
+        self,
+        data: bytes | memoryview,
+        sequence_number: int,
+        castagnoli: bool = False,
+    ):
         super().__init__(PackageType.DATA, data, sequence_number=sequence_number)
         self.data = data
+        self.castagnoli = castagnoli
 
     def to_bytes(self) -> bytes:
         if self.data is None:
             raise ValueError("Data is not set")
-        # Codifica como: DATA|<sequence_number>|<payload>
-        checksum = self.get_checksum()
-        return (
-            f"{self.type.value}{SEPARATOR}{self.sequence_number}{SEPARATOR}{checksum}{SEPARATOR}".encode(
-                "utf-8"
-            )
-            + self.data
-        )
+        # Codifica como: <header binario><payload>
+        header = self.get_header(len(self.data), self.get_checksum())
+        return header.pack() + self.data
 
-    @classmethod
-    def from_bytes(cls, raw: bytes) -> "DataPackage":
-        try:
-            parts = raw.split(SEPARATOR.encode(), 3)
-            if len(parts) < 4:
-                raise PackageErr("Incomplete package")
-
-            _, seq_num_bytes, checksum_bytes, payload = parts
-            sequence_number = int(seq_num_bytes.decode("utf-8"))
-            checksum = int(checksum_bytes.decode("utf-8"))
-
-            instance = cls(payload, sequence_number)
-            if instance.get_checksum() != checksum:
-                instance.valid = False
-
-            return instance
+    def pack_into(self, buffer: bytearray | memoryview) -> int:
+        if self.data is None:
+            raise ValueError("Data is not set")
+        # Header y payload se escriben directo en el buffer, sin concatenar
+        length = len(self.data)
+        self.get_header(length, self.get_checksum()).pack_into(buffer)
+        buffer[HEADER_SIZE : HEADER_SIZE + length] = self.data
+        return HEADER_SIZE + length
 
-        except (ValueError, IndexError) as e:
-            raise PackageErr(f"Failed to parse DataPackage: {e}") from e
+    @classmethod
+    def from_bytes(cls, raw: bytes | memoryview) -> "DataPackage":
+        header = Header.unpack(raw)
+        if header.type != PackageType.DATA:
+            raise PackageErr(f"Expected DATA package, got {header.type.name}")
+
+        castagnoli = bool(header.flags & PackageFlag.CRC32C)
+        instance = cls(Header.payload(raw), header.sequence_number, castagnoli)
+        # sin crc32c instalado no hay forma de verificarlo: se descarta
+        if (
+            castagnoli and not HAVE_CRC32C
+        ) or instance.get_checksum() != header.checksum:
+            instance.valid = False
+
+        return instance
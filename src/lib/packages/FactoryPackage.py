@@ -1,30 +1,30 @@
 from lib.packages.Package import Package
-from lib.utils.constants import SEPARATOR
 from lib.utils.enums import PackageType
 from lib.packages.AckPackage import AckPackage
 from lib.packages.DataPackage import DataPackage
 from lib.packages.FinPackage import FinPackage
 from lib.packages.InitPackage import InitPackage
+from lib.packages.NackPackage import NackPackage
+from lib.packages.ProbePackage import ProbePackage
 from lib.utils.package_error import PackageErr
 
+PACKAGE_CLASSES: dict[PackageType, type[Package]] = {
+    PackageType.INIT: InitPackage,
+    PackageType.DATA: DataPackage,
+    PackageType.ACK: AckPackage,
+    PackageType.NACK: NackPackage,
+    PackageType.FIN: FinPackage,
+    PackageType.PROBE: ProbePackage,
+}
+
+
 class FactoryPackage:
     @staticmethod
-    def recover_package(raw_data: bytes) -> Package:
-        package_type = int(raw_data.split(SEPARATOR.encode())[0])
+    def recover_package(raw_data: bytes | memoryview) -> Package:
+        # solo se lee el header fijo, sin recorrer el payload
+        package_type = Package.get_type(raw_data)
+        package = PACKAGE_CLASSES[package_type].from_bytes(raw_data)
 
-        if package_type == PackageType.INIT.value:
-            package = InitPackage.from_bytes(raw_data)
-        elif package_type == PackageType.ACK.value:
-            package = AckPackage.from_bytes(raw_data)
-        elif package_type == PackageType.DATA.value:
-            package = DataPackage.from_bytes(raw_data)
-        elif package_type == PackageType.FIN.value:
-            package = FinPackage.from_bytes(raw_data)
-        elif package_type == PackageType.NACK.value:
-            package = Package.from_bytes(raw_data)
-        else:
-            raise ValueError(f"Unknown package type: {package_type}")
-        
         if not package.valid:
             raise PackageErr("Invalid package received")
-        return package
\ No newline at end of file
+        return package
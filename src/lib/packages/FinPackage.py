@@ -1,15 +1,32 @@
+from lib.utils.constants import FIN_ACK_SEQUENCE
 from lib.utils.enums import PackageType
-from lib.utils.constants import SEPARATOR
+from lib.packages.Header import Header
 from lib.packages.Package import Package
 
 
 class FinPackage(Package):
-    def __init__(self) -> None:
+    """
+    Cierre de la transferencia. El que manda los datos agrega como payload
+    el digest de lo que mandó, para que el receptor lo compare con el suyo.
+    """
+
+    def __init__(self, digest: bytes | None = None) -> None:
         super().__init__(PackageType.FIN)
+        self.digest = digest
 
     def to_bytes(self) -> bytes:
-        return f"{self.type.value}{SEPARATOR}{self.sequence_number}".encode("utf-8")
+        if self.digest is None:
+            return self.get_header().pack()
+        return self.get_header(len(self.digest)).pack() + self.digest
 
     @classmethod
-    def from_bytes(cls, raw: bytes) -> "FinPackage":
-        return cls()
+    def from_bytes(cls, raw: bytes | memoryview) -> "FinPackage":
+        header = Header.unpack(raw)
+        return cls(bytes(Header.payload(raw)) if header.payload_length else None)
+
+
+def answers_fin(package: Package) -> bool:
+    """Si package es el veredicto sobre un FIN: su ACK, o otro FIN que lo rechaza."""
+    if package.type == PackageType.ACK:
+        return package.sequence_number == FIN_ACK_SEQUENCE
+    return package.type == PackageType.FIN
@@ -0,0 +1,74 @@
+import struct
+from dataclasses import dataclass
+
+from lib.utils.constants import HEADER_FORMAT, PROTOCOL_VERSION
+from lib.utils.enums import PackageType
+from lib.utils.package_error import PackageErr
+
+
+HEADER_STRUCT = struct.Struct(HEADER_FORMAT)
+HEADER_SIZE = HEADER_STRUCT.size
+
+
+@dataclass
+class Header:
+    """
+    Header binario de tamaño fijo que antecede a todos los paquetes:
+    version | type | flags | sequence_number | checksum | payload_length
+    """
+
+    type: PackageType
+    flags: int = 0
+    sequence_number: int = 0
+    checksum: int = 0
+    payload_length: int = 0
+
+    def pack(self) -> bytes:
+        return HEADER_STRUCT.pack(
+            PROTOCOL_VERSION,
+            self.type.value,
+            self.flags,
+            self.sequence_number,
+            self.checksum,
+            self.payload_length,
+        )
+
+    def pack_into(self, buffer: bytearray | memoryview, offset: int = 0) -> int:
+        HEADER_STRUCT.pack_into(
+            buffer,
+            offset,
+            PROTOCOL_VERSION,
+            self.type.value,
+            self.flags,
+            self.sequence_number,
+            self.checksum,
+            self.payload_length,
+        )
+        return HEADER_SIZE
+
+    @classmethod
+    def unpack(cls, raw: bytes | memoryview) -> "Header":
+        if len(raw) < HEADER_SIZE:
+            raise PackageErr(f"Incomplete header: {len(raw)} bytes")
+
+        version, type_value, flags, sequence_number, checksum, payload_length = (
+            HEADER_STRUCT.unpack_from(raw)
+        )
+        if version != PROTOCOL_VERSION:
+            raise PackageErr(f"Unsupported protocol version: {version}")
+        if len(raw) - HEADER_SIZE != payload_length:
+            raise PackageErr(
+                f"Payload length mismatch: expected {payload_length}, got {len(raw) - HEADER_SIZE}"
+            )
+
+        try:
+            package_type = PackageType(type_value)
+        except ValueError as e:
+            raise PackageErr(f"Unknown package type: {type_value}") from e
+
+        return cls(package_type, flags, sequence_number, checksum, payload_length)
+
+    @staticmethod
+    def payload(raw: bytes | memoryview) -> bytes | memoryview:
+        # sobre un memoryview devuelve una vista, sin copiar el payload
+        return raw[HEADER_SIZE:]
@@ -1,6 +1,18 @@
-from lib.utils.constants import OPERATION, SEPARATOR
+import struct
+
+from lib.utils.constants import OPERATION
+from lib.packages.Header import Header
 from lib.packages.Package import Package
-from lib.utils.enums import PackageType
+from lib.utils.enums import Compression, PackageFlag, PackageType, Protocol
+from lib.utils.package_error import PackageErr
+
+# operation | protocol | offset | length | file_size | payload_size |
+# compression | compression_level | dictionary_id | file_name (utf-8, resto
+# del payload).
+# offset y length delimitan el rango de bytes del archivo que mueve la
+# transferencia; length 0 es el archivo entero
+INIT_STRUCT = struct.Struct("!BBQQQHBBI")
+OPERATIONS: tuple[OPERATION, ...] = ("upload", "download")
 
 
 class InitPackage(Package):
@@ -8,44 +20,171 @@ class InitPackage(Package):
         self,
         operation: OPERATION,
         file_name: str,
+        protocol: Protocol = Protocol.STOP_WAIT,
+        offset: int = 0,
+        length: int = 0,
+        file_size: int = 0,
+        resume: bool = False,
+        castagnoli: bool = False,
+        payload_size: int = 0,
+        compression: Compression = Compression.NONE,
+        compression_level: int = 0,
+        dictionary_id: int = 0,
     ) -> None:
         self.operation: OPERATION = operation
         self.file_name = file_name
+        self.protocol = protocol
+        self.offset = offset
+        self.length = length
+        self.file_size = file_size
+        # pide seguir desde lo que ya esté escrito en vez de empezar en offset
+        self.resume = resume
         super().__init__(PackageType.INIT)
+        # el cliente ofrece CRC32C; la respuesta dice si se usa
+        self.castagnoli = castagnoli
+        # el cliente pide el payload más grande que pasó el sondeo del path
+        # MTU y la respuesta trae el acordado; 0 es PAYLOAD_SIZE
+        self.payload_size = payload_size
+        # el cliente pide comprimir los datos y la respuesta confirma cómo
+        self.compression = compression
+        self.compression_level = compression_level
+        # el cliente manda el id del diccionario que tiene y la respuesta el
+        # del servidor: se comprime contra él solo si coinciden. 0 es ninguno
+        self.dictionary_id = dictionary_id
+
+    def get_flags(self) -> int:
+        flags = super().get_flags()
+        if self.resume:
+            flags |= PackageFlag.RESUME
+        return flags
+
+    def is_range(self) -> bool:
+        return self.length > 0
 
     def get_file_name_without_extension(self) -> str:
         return self.file_name.split(".")[0]
 
     def get_file_extension(self) -> str:
-        return self.file_name.split(".")[-1]    
+        return self.file_name.split(".")[-1]
 
     def to_bytes(self) -> bytes:
-        filename_without_extension = self.get_file_name_without_extension()
-        file_extension = self.get_file_extension()
-        header = f"{self.type.value}{SEPARATOR}{self.operation}{SEPARATOR}{filename_without_extension}{SEPARATOR}{file_extension}"
-        return header.encode("utf-8")
+        payload = INIT_STRUCT.pack(
+            OPERATIONS.index(self.operation),
+            self.protocol.value,
+            self.offset,
+            self.length,
+            self.file_size,
+            self.payload_size,
+            self.compression.value,
+            self.compression_level,
+            self.dictionary_id,
+        ) + self.file_name.encode("utf-8")
+        return self.get_header(len(payload)).pack() + payload
 
     @classmethod
-    def from_bytes(cls, raw: bytes) -> "InitPackage":
-        received = raw.decode("utf-8")
-        parts = received.split(SEPARATOR)
+    def from_bytes(cls, raw: bytes | memoryview) -> "InitPackage":
+        header = Header.unpack(raw)
+        payload = Header.payload(raw)
 
-        if len(parts) != 4:
-            raise ValueError("Invalid header format")
+        if len(payload) < INIT_STRUCT.size:
+            raise PackageErr("Invalid header format")
 
-        if parts[1] != "upload" and parts[1] != "download":
-            raise ValueError("Invalid operation. Use 'upload' or 'download'.")
+        (
+            operation_code,
+            protocol_code,
+            offset,
+            length,
+            file_size,
+            payload_size,
+            compression_code,
+            compression_level,
+            dictionary_id,
+        ) = INIT_STRUCT.unpack_from(payload)
+        if operation_code >= len(OPERATIONS):
+            raise PackageErr("Invalid operation. Use 'upload' or 'download'.")
+        try:
+            protocol = Protocol(protocol_code)
+        except ValueError as e:
+            raise PackageErr(f"Unknown protocol: {protocol_code}") from e
+        try:
+            compression = Compression(compression_code)
+        except ValueError as e:
+            raise PackageErr(f"Unknown compression: {compression_code}") from e
 
-        operation: OPERATION = parts[1]
-        file_name = f"{parts[2]}.{parts[3]}"
+        operation: OPERATION = OPERATIONS[operation_code]
+        file_name = bytes(payload[INIT_STRUCT.size :]).decode("utf-8")
+
+        return cls(
+            operation,
+            file_name,
+            protocol,
+            offset,
+            length,
+            file_size,
+            bool(header.flags & PackageFlag.RESUME),
+            bool(header.flags & PackageFlag.CRC32C),
+            payload_size,
+            compression,
+            compression_level,
+            dictionary_id,
+        )
 
-        return cls(operation, file_name)
 
 class UploadHeader(InitPackage):
-    def __init__(self, file_name: str) -> None:
-        super().__init__("upload", file_name)
+    def __init__(
+        self,
+        file_name: str,
+        protocol: Protocol = Protocol.STOP_WAIT,
+        offset: int = 0,
+        length: int = 0,
+        file_size: int = 0,
+        resume: bool = False,
+        castagnoli: bool = False,
+        payload_size: int = 0,
+        compression: Compression = Compression.NONE,
+        compression_level: int = 0,
+        dictionary_id: int = 0,
+    ) -> None:
+        super().__init__(
+            "upload",
+            file_name,
+            protocol,
+            offset,
+            length,
+            file_size,
+            resume,
+            castagnoli,
+            payload_size,
+            compression,
+            compression_level,
+            dictionary_id,
+        )
 
 
 class DownloadHeader(InitPackage):
-    def __init__(self, file_name: str) -> None:
-        super().__init__("download", file_name)
+    def __init__(
+        self,
+        file_name: str,
+        protocol: Protocol = Protocol.STOP_WAIT,
+        offset: int = 0,
+        length: int = 0,
+        file_size: int = 0,
+        castagnoli: bool = False,
+        payload_size: int = 0,
+        compression: Compression = Compression.NONE,
+        compression_level: int = 0,
+        dictionary_id: int = 0,
+    ) -> None:
+        super().__init__(
+            "download",
+            file_name,
+            protocol,
+            offset,
+            length,
+            file_size,
+            castagnoli=castagnoli,
+            payload_size=payload_size,
+            compression=compression,
+            compression_level=compression_level,
+            dictionary_id=dictionary_id,
+        )
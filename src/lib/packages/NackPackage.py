@@ -1,19 +1,17 @@
 from lib.utils.enums import PackageType
-from lib.utils.constants import SEPARATOR
+from lib.packages.Header import Header
 from lib.packages.Package import Package
 
 
 class NackPackage(Package):
     def __init__(self, sequence_number: int = 0) -> None:
-        super().__init__(PackageType.NACK, valid=False, sequence_number=sequence_number)
+        # lo negativo es el tipo: un NACK bien formado es un paquete válido
+        super().__init__(PackageType.NACK, sequence_number=sequence_number)
 
     def to_bytes(self) -> bytes:
-        return f"{self.type.value}{SEPARATOR}{self.sequence_number}{SEPARATOR}{self.valid}".encode(
-            "utf-8"
-        )
+        return self.get_header().pack()
 
     @classmethod
-    def from_bytes(cls, raw: bytes) -> "NackPackage":
-        parts = raw.decode("utf-8").split(SEPARATOR)
-        sequence_number = int(parts[1])
-        return cls(sequence_number)
+    def from_bytes(cls, raw: bytes | memoryview) -> "NackPackage":
+        header = Header.unpack(raw)
+        return cls(header.sequence_number)
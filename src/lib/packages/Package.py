@@ -1,44 +1,67 @@
-import random
-from lib.utils.enums import PackageType
-from lib.utils.constants import BUFSIZE, SEPARATOR
+from lib.utils.enums import PackageFlag, PackageType
+from lib.utils.constants import MAX_PAYLOAD_SIZE
+from lib.packages.Header import Header
+from lib.utils.checksum import packet_checksum
 
 
 class Package:
     data = None
+    # CRC32C en vez de CRC32: en un Init lo ofrece, en un Data lo usa
+    castagnoli = False
 
     def __init__(
         self,
         type: PackageType,
-        data: bytes | None = None,
+        data: bytes | memoryview | None = None,
         valid: bool = True,
         sequence_number: int = 0,
     ) -> None:
         self.sequence_number = sequence_number
         self.type = type
         self.valid = valid
-        if data is not None and len(data) > BUFSIZE:
-            raise ValueError("Data size exceeds buffer size")
+        if data is not None and len(data) > MAX_PAYLOAD_SIZE:
+            raise ValueError("Data size exceeds the largest datagram")
         self.data = data
 
-    def set_data(self, data: bytes) -> None:
+    def set_data(self, data: bytes | memoryview) -> None:
         self.data = data
 
     def get_checksum(self) -> int:
         if self.data is None:
             return 0
-        return sum(self.data) % 256
+        return packet_checksum(self.sequence_number, self.data, self.castagnoli)
+
+    def get_flags(self) -> int:
+        flags = PackageFlag.NONE if self.valid else PackageFlag.INVALID
+        if self.castagnoli:
+            flags |= PackageFlag.CRC32C
+        return flags
+
+    def get_header(self, payload_length: int = 0, checksum: int = 0) -> Header:
+        return Header(
+            self.type,
+            self.get_flags(),
+            self.sequence_number,
+            checksum,
+            payload_length,
+        )
 
     def to_bytes(self) -> bytes:
         raise NotImplementedError("Subclasses should implement this method")
 
+    def pack_into(self, buffer: bytearray | memoryview) -> int:
+        # Escribe el paquete al principio de buffer y devuelve su largo
+        raw = self.to_bytes()
+        buffer[: len(raw)] = raw
+        return len(raw)
+
     @classmethod
-    def from_bytes(cls, raw: bytes) -> "Package":
+    def from_bytes(cls, raw: bytes | memoryview) -> "Package":
         raise NotImplementedError("Subclasses should implement this method")
 
     @classmethod
-    def get_type(cls, package_raw: bytes) -> PackageType:
-        package_type_raw = package_raw.decode("utf-8").split(SEPARATOR)[0]
-        return PackageType(int(package_type_raw))
+    def get_type(cls, package_raw: bytes | memoryview) -> PackageType:
+        return Header.unpack(package_raw).type
 
     def __repr__(self) -> str:
         return f"Package(type={self.type}, sequence_number={self.sequence_number}, valid={self.valid})"
@@ -0,0 +1,25 @@
+from lib.utils.enums import PackageType
+from lib.packages.Header import Header
+from lib.packages.Package import Package
+
+
+class ProbePackage(Package):
+    """
+    Sonda de path MTU: un payload de relleno de size bytes. El seq_number
+    repite el tamaño para que el ACK diga qué sonda llegó entera.
+    """
+
+    def __init__(self, size: int, valid: bool = True) -> None:
+        super().__init__(PackageType.PROBE, valid=valid, sequence_number=size)
+        self.size = size
+
+    def to_bytes(self) -> bytes:
+        return self.get_header(self.size).pack() + bytes(self.size)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes | memoryview) -> "ProbePackage":
+        header = Header.unpack(raw)
+        # el relleno no se lee: alcanza con que haya llegado completo
+        return cls(
+            header.sequence_number, header.payload_length == header.sequence_number
+        )
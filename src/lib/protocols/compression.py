@@ -0,0 +1,218 @@
+"""
+Compresión de los datos de una transferencia, acordada en el Init. El emisor
+lee el archivo de a bloques de COMPRESSION_BLOCK_SIZE bytes y arma con ellos
+un flujo de frames (tipo y largo, y los datos) que se corta en DataPackages
+como si fuera el archivo: el receptor los junta en orden y los decodifica.
+
+Un bloque que no se achica lo suficiente, como uno ya comprimido o cifrado,
+viaja crudo en un frame RAW y no se gasta CPU descomprimiéndolo. Después de
+uno así los siguientes se mandan crudos sin probar, el doble de bloques cada
+vez que se vuelve a fallar, hasta que uno vuelva a comprimir.
+
+Con zlib los bloques comprimidos son parte de un solo flujo deflate (cada uno
+termina en un sync flush), así que cada bloque aprovecha lo visto en los
+anteriores. lzma no permite cortar un flujo sin terminarlo: cada bloque se
+comprime por separado.
+
+Un archivo chico no llega a llenar la ventana de deflate y casi no
+comprime solo. Con un diccionario (zdict) el flujo zlib arranca como si ya
+hubiera visto su contenido; los dos extremos lo identifican por
+dictionary_id.
+"""
+
+import hashlib
+import lzma
+import struct
+import zlib
+from collections.abc import Callable
+
+from lib.utils.constants import (
+    COMPRESSIBLE_RATIO,
+    COMPRESSION_BLOCK_SIZE,
+    DICTIONARY_PREFIX,
+    MAX_INCOMPRESSIBLE_SKIP,
+)
+from lib.utils.enums import Compression
+from lib.utils.package_error import PackageErr
+
+# kind | length, seguido de length bytes
+FRAME_HEADER = struct.Struct("!BI")
+RAW_FRAME = 0
+COMPRESSED_FRAME = 1
+DEFAULT_LEVELS = {Compression.ZLIB: 6, Compression.LZMA: 1}
+# deflate sin encabezado ni checksum: de eso ya se ocupan los paquetes y el digest
+ZLIB_WBITS = -15
+
+
+def default_level(compression: Compression) -> int:
+    return DEFAULT_LEVELS.get(compression, 0)
+
+
+def dictionary_id(dictionary: bytes) -> int:
+    # el id sale del contenido: dos servidores con las mismas muestras
+    # arman el mismo, y quien lo baja puede comprobar que llegó entero. 0
+    # es sin diccionario
+    digest = hashlib.blake2b(dictionary, digest_size=4).digest()
+    return int.from_bytes(digest, "big") or 1
+
+
+def dictionary_name(identifier: int) -> str:
+    return f"{DICTIONARY_PREFIX}{identifier:08x}"
+
+
+def _lzma_filters(level: int) -> list[dict]:
+    # los dos extremos arman el mismo filtro con el nivel acordado
+    return [{"id": lzma.FILTER_LZMA2, "preset": level}]
+
+
+class FrameEncoder:
+    """
+    Flujo de frames de lo que devuelve read, que se lee como un archivo:
+    read(size) devuelve los próximos size bytes del flujo y b"" al terminar.
+    El digest se actualiza con los datos sin comprimir. dictionary solo se
+    usa con zlib.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[int], bytes | memoryview],
+        compression: Compression,
+        level: int,
+        digest: "hashlib._Hash | None" = None,
+        block_size: int = COMPRESSION_BLOCK_SIZE,
+        dictionary: bytes | None = None,
+    ) -> None:
+        self.source = read
+        self.compression = compression
+        self.level = level
+        self.digest = digest
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.done = False  # la fuente ya devolvió b""
+        self.compressor = None
+        if compression == Compression.ZLIB:
+            self.compressor = zlib.compressobj(
+                level, zlib.DEFLATED, ZLIB_WBITS, zdict=dictionary or b""
+            )
+        # bloques que faltan mandar crudos sin probar y cuántos serán la
+        # próxima vez que uno no comprima
+        self.skip = 0
+        self.backoff = 1
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size and not self.done:
+            self._encode_block()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def exhausted(self) -> bool:
+        return self.done and not self.buffer
+
+    def _encode_block(self) -> None:
+        block = self.source(self.block_size)
+        if not block:
+            self.done = True
+            return
+        if self.digest is not None:
+            self.digest.update(block)
+        encoded = self._compress(block)
+        if encoded is None:
+            self._append(RAW_FRAME, block)
+        else:
+            self._append(COMPRESSED_FRAME, encoded)
+
+    def _append(self, kind: int, data: bytes | memoryview) -> None:
+        self.buffer += FRAME_HEADER.pack(kind, len(data))
+        self.buffer += data
+
+    def _compress(self, block: bytes | memoryview) -> bytes | None:
+        """El bloque comprimido, o None si conviene mandarlo crudo."""
+        if self.skip:
+            self.skip -= 1
+            return None
+
+        compressor = None
+        if self.compressor is not None:
+            # se prueba sobre una copia: si el bloque va crudo el flujo
+            # deflate sigue como si no lo hubiera visto, igual que el receptor
+            compressor = self.compressor.copy()
+            encoded = compressor.compress(block) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            encoded = lzma.compress(
+                block, lzma.FORMAT_RAW, filters=_lzma_filters(self.level)
+            )
+
+        if len(encoded) >= len(block) * COMPRESSIBLE_RATIO:
+            self.skip = self.backoff
+            self.backoff = min(2 * self.backoff, MAX_INCOMPRESSIBLE_SKIP)
+            return None
+        if compressor is not None:
+            self.compressor = compressor
+        self.backoff = 1
+        return encoded
+
+
+class FrameDecoder:
+    """
+    Decodifica el flujo de FrameEncoder a medida que llega, en orden y en
+    pedazos de cualquier tamaño. Un frame que no decodifica, o que da más
+    de un bloque, levanta PackageErr.
+    """
+
+    def __init__(
+        self,
+        compression: Compression,
+        level: int,
+        block_size: int = COMPRESSION_BLOCK_SIZE,
+        dictionary: bytes | None = None,
+    ) -> None:
+        self.compression = compression
+        self.level = level
+        self.block_size = block_size
+        self.buffer = bytearray()
+        self.decompressor = None
+        if compression == Compression.ZLIB:
+            self.decompressor = zlib.decompressobj(ZLIB_WBITS, zdict=dictionary or b"")
+
+    def feed(self, data: bytes | memoryview) -> bytes:
+        self.buffer += data
+        decoded = []
+        while len(self.buffer) >= FRAME_HEADER.size:
+            kind, length = FRAME_HEADER.unpack_from(self.buffer)
+            if length > self.block_size:
+                # ningún frame, crudo o comprimido, ocupa más que un bloque
+                raise PackageErr(f"Frame too large: {length}")
+            end = FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            frame = bytes(self.buffer[FRAME_HEADER.size : end])
+            del self.buffer[:end]
+            decoded.append(self._decode(kind, frame))
+        return b"".join(decoded)
+
+    def finished(self) -> bool:
+        # no quedó un frame a medias
+        return not self.buffer
+
+    def _decode(self, kind: int, frame: bytes) -> bytes:
+        if kind == RAW_FRAME:
+            return frame
+        if kind != COMPRESSED_FRAME:
+            raise PackageErr(f"Unknown frame kind: {kind}")
+
+        try:
+            if self.decompressor is not None:
+                decompressor = self.decompressor
+            else:
+                decompressor = lzma.LZMADecompressor(
+                    lzma.FORMAT_RAW, filters=_lzma_filters(self.level)
+                )
+            # no se descomprime más de un bloque por frame: un byte de más
+            # alcanza para saber que se pasa
+            block = decompressor.decompress(frame, self.block_size + 1)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise PackageErr(f"Invalid compressed frame: {e}") from e
+        if len(block) > self.block_size:
+            raise PackageErr("Compressed frame larger than a block")
+        return block
@@ -0,0 +1,149 @@
+import math
+import time
+from collections import deque
+
+from lib.utils.constants import MAX_WINDOW_SIZE
+from lib.utils.enums import CongestionControl
+
+
+class CongestionController:
+    """
+    Decide cuantos paquetes puede haber en vuelo a partir de los ACKs y las
+    perdidas que ve el emisor.
+    """
+
+    def __init__(self, initial_window: int, max_window: int = MAX_WINDOW_SIZE):
+        self.max_window = max_window
+        self.cwnd: float = initial_window
+
+    def window(self) -> int:
+        return max(1, min(int(self.cwnd), self.max_window))
+
+    def on_ack(self, acked: int = 1, rtt: float | None = None) -> None:
+        pass
+
+    def on_loss(self) -> None:
+        pass
+
+    def on_timeout(self) -> None:
+        pass
+
+    def stats(self) -> dict[str, float | int | str]:
+        return {"controller": type(self).__name__, "window": self.window()}
+
+
+class FixedWindowController(CongestionController):
+    """Ventana constante, el comportamiento original del protocolo."""
+
+
+class AimdController(CongestionController):
+    """Slow start hasta ssthresh y despues incremento aditivo/decremento multiplicativo."""
+
+    def __init__(self, initial_window: int, max_window: int = MAX_WINDOW_SIZE):
+        super().__init__(initial_window, max_window)
+        self.ssthresh: float = max_window
+
+    def on_ack(self, acked: int = 1, rtt: float | None = None) -> None:
+        if self.cwnd < self.ssthresh:
+            self.cwnd += acked
+        else:
+            self.cwnd += acked / self.cwnd
+        self.cwnd = min(self.cwnd, self.max_window)
+
+    def on_loss(self) -> None:
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = self.ssthresh
+
+    def on_timeout(self) -> None:
+        self.ssthresh = max(self.cwnd / 2, 2)
+        self.cwnd = 1
+
+    def stats(self) -> dict[str, float | int | str]:
+        return {**super().stats(), "ssthresh": self.ssthresh}
+
+
+class BbrController(CongestionController):
+    """
+    Modelo al estilo BBR: estima el ancho de banda de entrega (paquetes/s) y
+    el RTT minimo, y dimensiona la ventana como un multiplo del BDP. Las
+    perdidas aisladas no achican la ventana.
+    """
+
+    STARTUP_GAIN = 2.89
+    CWND_GAIN = 2.0
+    BW_SAMPLES = 10
+    FULL_BW_GROWTH = 1.25
+    FULL_BW_ROUNDS = 3
+    MIN_WINDOW = 4
+
+    def __init__(self, initial_window: int, max_window: int = MAX_WINDOW_SIZE):
+        super().__init__(initial_window, max_window)
+        self.min_rtt: float | None = None
+        self.bw_samples: deque[float] = deque(maxlen=self.BW_SAMPLES)
+        self.max_bw = 0.0
+        self.startup = True
+        self.full_bw = 0.0
+        self.full_bw_rounds = 0
+        self.round_start = time.monotonic()
+        self.round_delivered = 0
+
+    def on_ack(self, acked: int = 1, rtt: float | None = None) -> None:
+        now = time.monotonic()
+        if rtt is not None and (self.min_rtt is None or rtt < self.min_rtt):
+            self.min_rtt = rtt
+
+        self.round_delivered += acked
+        if self.startup:
+            self.cwnd = min(self.cwnd + acked, self.max_window)
+
+        elapsed = now - self.round_start
+        if self.min_rtt is None or elapsed < self.min_rtt:
+            return
+
+        # termino una ronda: nueva muestra de tasa de entrega
+        self.bw_samples.append(self.round_delivered / elapsed)
+        self.max_bw = max(self.bw_samples)
+        self.round_start = now
+        self.round_delivered = 0
+
+        if self.startup:
+            if self.max_bw >= self.full_bw * self.FULL_BW_GROWTH:
+                self.full_bw = self.max_bw
+                self.full_bw_rounds = 0
+            else:
+                self.full_bw_rounds += 1
+                self.startup = self.full_bw_rounds < self.FULL_BW_ROUNDS
+
+        gain = self.STARTUP_GAIN if self.startup else self.CWND_GAIN
+        bdp = self.max_bw * self.min_rtt
+        self.cwnd = min(max(math.ceil(gain * bdp), self.MIN_WINDOW), self.max_window)
+
+    def on_timeout(self) -> None:
+        # sin ACKs no hay modelo confiable: se vuelve a sondear desde abajo
+        self.cwnd = self.MIN_WINDOW
+        self.startup = True
+        self.full_bw = 0.0
+        self.full_bw_rounds = 0
+
+    def stats(self) -> dict[str, float | int | str]:
+        return {
+            **super().stats(),
+            "max_bw": self.max_bw,
+            "min_rtt": self.min_rtt if self.min_rtt is not None else 0.0,
+            "startup": int(self.startup),
+        }
+
+
+def create_congestion_controller(
+    kind: CongestionControl,
+    initial_window: int,
+    max_window: int = MAX_WINDOW_SIZE,
+) -> CongestionController:
+    if kind == CongestionControl.FIXED:
+        return FixedWindowController(initial_window, initial_window)
+    elif kind == CongestionControl.AIMD:
+        return AimdController(initial_window, max_window)
+    elif kind == CongestionControl.BBR:
+        return BbrController(initial_window, max_window)
+    else:
+        raise ValueError(f"Unsupported congestion control: {kind}")
@@ -0,0 +1,92 @@
+from threading import RLock
+from collections.abc import Callable, Hashable
+
+from lib.packages.AckPackage import AckPackage
+from lib.protocols.sack_tracker import SackTracker
+from lib.utils.constants import DELAYED_ACK_COUNT, DELAYED_ACK_TIMEOUT
+from lib.utils.RetransmissionScheduler import RetransmissionScheduler
+
+
+class DelayedAck:
+    """
+    Agrupa los ACKs del receptor: se responde cada ack_every paquetes o a los
+    ack_delay segundos del primero pendiente, lo que ocurra antes. Si hay un
+    hueco, un duplicado o se acaba de cerrar un hueco se responde en el acto
+    para que el emisor reaccione rápido.
+
+    Si se pasa window, cada ACK anuncia lo que devuelve: los paquetes que el
+    receptor todavía puede aceptar.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[AckPackage], None],
+        scheduler: RetransmissionScheduler,
+        key: Hashable,
+        ack_every: int = DELAYED_ACK_COUNT,
+        ack_delay: float = DELAYED_ACK_TIMEOUT,
+        window: Callable[[], int] | None = None,
+        lock: "RLock | None" = None,
+    ) -> None:
+        self.send = send
+        self.scheduler = scheduler
+        self.key = key
+        self.ack_every = ack_every
+        self.ack_delay = ack_delay
+        self.window = window
+        self.tracker = SackTracker()
+        self.pending = 0
+        self.last_sequence_number = 0
+        # el timer corre en otro hilo; el protocolo pasa su lock si el ACK
+        # lee estado suyo, como la ventana del buffer
+        self.lock = lock or RLock()
+
+    def on_packet(self, sequence_number: int) -> bool:
+        """Registra un DataPackage recibido; devuelve False si es un duplicado."""
+        with self.lock:
+            had_gap = self.tracker.has_gap()
+            is_new = self.tracker.add(sequence_number)
+            self.last_sequence_number = sequence_number
+            self.pending += 1
+
+            if (
+                not is_new
+                or had_gap
+                or self.tracker.has_gap()
+                or self.pending >= self.ack_every
+            ):
+                self._flush()
+            elif self.pending == 1:
+                self.scheduler.arm(self.key, self.ack_delay, lambda _: self.flush())
+
+            return is_new
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def send_window(self) -> None:
+        """Avisa ya mismo que la ventana se abrió, sin esperar otro paquete."""
+        with self.lock:
+            if self.pending:
+                self._flush()
+            elif self.window is not None:
+                self.send(self._ack())
+
+    def cancel(self) -> None:
+        with self.lock:
+            self.pending = 0
+            self.scheduler.cancel(self.key)
+
+    def _flush(self) -> None:
+        if self.pending == 0:
+            return
+        self.pending = 0
+        self.scheduler.cancel(self.key)
+        self.send(self._ack())
+
+    def _ack(self) -> AckPackage:
+        ack = self.tracker.ack_for(self.last_sequence_number)
+        if self.window is not None:
+            ack.window = self.window()
+        return ack
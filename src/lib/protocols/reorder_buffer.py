@@ -0,0 +1,122 @@
+import hashlib
+import os
+from typing import IO
+
+from lib.protocols.compression import FrameDecoder
+from lib.protocols.write_behind import WriteBehind
+from lib.utils.constants import PAYLOAD_SIZE, REORDER_BUFFER_SIZE
+
+
+class ReorderBuffer:
+    """
+    Escribe los DataPackage en el archivo según su seq_number, lleguen en el
+    orden que lleguen: el paquete seq_number va al offset
+    offset + seq_number * payload_size con os.pwrite, así que el propio archivo
+    hace de buffer y no hay que guardar los datos en memoria. offset es el
+    comienzo del rango del archivo que trae la transferencia.
+
+    Solo se recuerdan los seq_number recibidos por delante del próximo
+    esperado, hasta capacity paquetes, para descartar duplicados.
+
+    Con un writer los pwrite se delegan en él y add no espera al disco; lo
+    recibido está en el archivo recién después de writer.flush().
+
+    Con un digest se le pasan los datos en el orden del archivo a medida que
+    se completan; para eso los paquetes que llegan adelantados se guardan
+    hasta que se llene el hueco.
+
+    Con un decoder lo recibido es el flujo comprimido: el seq_number ya no
+    dice dónde van los datos en el archivo, así que se guardan también los
+    adelantados y se decodifican y escriben uno detrás del otro a medida que
+    se completa el orden.
+    """
+
+    def __init__(
+        self,
+        file: IO[bytes],
+        payload_size: int = PAYLOAD_SIZE,
+        capacity: int = REORDER_BUFFER_SIZE,
+        first_sequence_number: int = 0,
+        offset: int = 0,
+        writer: WriteBehind | None = None,
+        digest: "hashlib._Hash | None" = None,
+        decoder: FrameDecoder | None = None,
+    ) -> None:
+        file.flush()  # lo que haya en el buffer de python va antes que los pwrite
+        self.fd = file.fileno()
+        self.payload_size = payload_size
+        self.offset = offset
+        self.writer = writer
+        self.digest = digest
+        self.decoder = decoder
+        self.decoded = 0  # bytes ya decodificados y escritos desde offset
+        self.capacity = capacity
+        self.next_sequence_number = first_sequence_number
+        # recibidos por encima del próximo esperado; con digest o decoder,
+        # con sus datos
+        self.pending: dict[int, bytes | None] = {}
+
+    def accepts(self, sequence_number: int) -> bool:
+        return sequence_number < self.next_sequence_number + self.capacity
+
+    def add(self, sequence_number: int, data: bytes | memoryview) -> bool:
+        """
+        Escribe el paquete; devuelve False si es un duplicado, si no entra en
+        el buffer o si trae más de payload_size bytes, que pisarían al
+        siguiente.
+        """
+        if (
+            len(data) > self.payload_size
+            or sequence_number < self.next_sequence_number
+            or sequence_number in self.pending
+            or not self.accepts(sequence_number)
+        ):
+            return False
+
+        if self.decoder is None:
+            self._write(self.offset + sequence_number * self.payload_size, data)
+
+        if sequence_number != self.next_sequence_number:
+            keep = self.digest is not None or self.decoder is not None
+            self.pending[sequence_number] = bytes(data) if keep else None
+            return True
+
+        self._complete(data)
+        self.next_sequence_number += 1
+        while self.next_sequence_number in self.pending:
+            self._complete(self.pending.pop(self.next_sequence_number))
+            self.next_sequence_number += 1
+        return True
+
+    def _write(self, position: int, data: bytes | memoryview) -> None:
+        if self.writer is not None:
+            self.writer.write(position, data)
+        else:
+            os.pwrite(self.fd, data, position)
+
+    def _complete(self, data: bytes | memoryview) -> None:
+        # data es el próximo pedazo en orden de lo que manda el emisor
+        if self.decoder is not None:
+            data = self.decoder.feed(data)
+            if not data:
+                return  # un frame a medias: se escribe con el próximo
+            self._write(self.offset + self.decoded, data)
+            self.decoded += len(data)
+        if self.digest is not None:
+            self.digest.update(data)
+
+    def window(self) -> int:
+        """Paquetes que se aceptan desde el próximo esperado, según lo que entre en el writer."""
+        if self.writer is None:
+            return self.capacity
+        return min(self.capacity, self.writer.free() // self.payload_size)
+
+    def contiguous_bytes(self) -> int:
+        # bytes escritos sin huecos desde offset; el último paquete puede ser
+        # más corto, así que puede pasarse del final del rango
+        if self.decoder is not None:
+            return self.decoded
+        return self.next_sequence_number * self.payload_size
+
+    def has_gap(self) -> bool:
+        return bool(self.pending)
@@ -0,0 +1,56 @@
+from lib.utils.constants import INITIAL_RTO, MAX_RTO, MIN_RTO
+
+ALPHA = 1 / 8
+BETA = 1 / 4
+K = 4
+
+
+class RttEstimator:
+    """
+    Estimador de RTT y RTO segun Jacobson/Karn (RFC 6298).
+
+    Solo deben pasarse muestras de paquetes que no fueron retransmitidos
+    (regla de Karn); cada timeout duplica el RTO hasta la proxima muestra.
+    """
+
+    def __init__(
+        self,
+        initial_rto: float = INITIAL_RTO,
+        min_rto: float = MIN_RTO,
+        max_rto: float = MAX_RTO,
+    ) -> None:
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.rto = initial_rto
+        self.backoffs = 0
+        self.samples = 0
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+
+        self.samples += 1
+        self.backoffs = 0
+        self.rto = self._clamp(self.srtt + K * self.rttvar)
+
+    def backoff(self) -> None:
+        self.backoffs += 1
+        self.rto = self._clamp(self.rto * 2)
+
+    def stats(self) -> dict[str, float | int | None]:
+        return {
+            "srtt": self.srtt,
+            "rttvar": self.rttvar,
+            "rto": self.rto,
+            "backoffs": self.backoffs,
+            "samples": self.samples,
+        }
+
+    def _clamp(self, rto: float) -> float:
+        return min(max(rto, self.min_rto), self.max_rto)
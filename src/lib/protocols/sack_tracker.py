@@ -0,0 +1,41 @@
+from lib.packages.AckPackage import AckPackage
+from lib.utils.constants import MAX_SACK_BITS
+
+
+class SackTracker:
+    """
+    Lleva la cuenta de los seq_number recibidos del lado receptor y arma los
+    ACK con el ACK acumulativo y el bitmap de lo recibido fuera de orden.
+    """
+
+    def __init__(self, first_sequence_number: int = 0, max_bits: int = MAX_SACK_BITS):
+        self.cumulative = first_sequence_number  # próximo seq_number esperado
+        self.received: set[int] = set()  # recibidos por encima de cumulative
+        self.max_bits = max_bits
+
+    def add(self, sequence_number: int) -> bool:
+        """Registra el seq_number; devuelve False si ya se había recibido."""
+        if sequence_number < self.cumulative or sequence_number in self.received:
+            return False
+
+        self.received.add(sequence_number)
+        while self.cumulative in self.received:
+            self.received.remove(self.cumulative)
+            self.cumulative += 1
+        return True
+
+    def has_gap(self) -> bool:
+        return bool(self.received)
+
+    def bitmap(self) -> int:
+        bitmap = 0
+        for sequence_number in self.received:
+            offset = sequence_number - self.cumulative - 1
+            if offset < self.max_bits:
+                bitmap |= 1 << offset
+        return bitmap
+
+    def ack_for(self, sequence_number: int) -> AckPackage:
+        return AckPackage(
+            sequence_number, cumulative=self.cumulative, sack_bitmap=self.bitmap()
+        )
@@ -1,47 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from io import BufferedReader, BufferedWriter
+from threading import RLock
 import logging
+import time
 from lib.utils.Socket import Socket
 from lib.utils.types import ADDR
-from lib.utils.constants import BUFSIZE
+from lib.utils.constants import (
+    DELAYED_ACK_COUNT,
+    DELAYED_ACK_TIMEOUT,
+    FAST_RETRANSMIT_THRESHOLD,
+    IDLE_TIMEOUT,
+    INITIAL_WINDOW_SIZE,
+    PAYLOAD_SIZE,
+    REORDER_BUFFER_SIZE,
+)
 from lib.packages.DataPackage import DataPackage
 from lib.packages.AckPackage import AckPackage
+from lib.utils.checksum import file_digest
 from lib.utils.logger import create_logger
-from lib.utils.enums import PackageType
-from threading import Thread, Event
-from typing import Optional
-import heapq
+from lib.utils.enums import CongestionControl, Compression, PackageType
+from lib.protocols.compression import FrameDecoder, FrameEncoder
+from lib.protocols.congestion_control import create_congestion_controller
+from lib.protocols.rtt_estimator import RttEstimator
+from lib.protocols.delayed_ack import DelayedAck
+from lib.protocols.reorder_buffer import ReorderBuffer
+from lib.protocols.write_behind import WriteBehind
 
 
 @dataclass
 class WindowItem:
     sequence_number: int
-    data: bytes
-    acked: bool = False
+    data: bytes | memoryview
     retries_left: int = 4  # una menos que max_retries
-    timer_thread: Optional[Thread] = None  ### NUEVO TIMER
-    stop_event: Optional[Event] = None  ### NUEVO TIMER
-
-    def __lt__(self, other):  # para que funcione con heapq
-        return self.sequence_number < other.sequence_number
+    sent_at: float = 0.0
+    retransmitted: bool = False  # por Karn, no se mide RTT de reenviados
+    later_acks: int = 0  # ACKs que confirmaron paquetes posteriores a este
 
 
 class Window:
-    def __init__(self, size: int = 5):
-        self.size = size  # Número de secuencia del primer paquete en la ventana
-        self.items: list[WindowItem] = []  # ACKs recibidos en la ventana
+    """
+    Buffer circular de paquetes en vuelo. Cada paquete ocupa el slot
+    sequence_number % capacity, así que buscar, confirmar y deslizar la
+    ventana es O(1) sin importar cuántos paquetes haya en vuelo.
+    """
+
+    def __init__(self, capacity: int = 5):
+        self.capacity = capacity
+        self.slots: list[WindowItem | None] = [None] * capacity
+        self.acked = bytearray(capacity)  # 1 si el slot ya fue confirmado
+        self.base = 0  # slot del paquete más viejo sin deslizar
+        self.count = 0
 
     def length(self) -> int:
-        return len(self.items)
-
-    def add_item(self, item: WindowItem):
-        heapq.heappush(self.items, item)
+        return self.count
+
+    def add_item(self, item: WindowItem) -> None:
+        if self.count >= self.capacity:
+            raise IndexError("No hay lugar en la ventana para otro paquete.")
+        slot = item.sequence_number % self.capacity
+        if slot != (self.base + self.count) % self.capacity:
+            raise ValueError(
+                f"Paquete {item.sequence_number} fuera de orden en la ventana."
+            )
+        self.slots[slot] = item
+        self.acked[slot] = 0
+        self.count += 1
+
+    def get(self, sequence_number: int) -> WindowItem | None:
+        item = self.slots[sequence_number % self.capacity]
+        if item is None or item.sequence_number != sequence_number:
+            return None
+        return item
+
+    def first(self) -> WindowItem | None:
+        return self.slots[self.base] if self.count else None
+
+    def is_acked(self, sequence_number: int) -> bool:
+        return self.get(sequence_number) is None or bool(
+            self.acked[sequence_number % self.capacity]
+        )
 
-    def remove_first_sent(self):
-        if self.items:
-            return heapq.heappop(self.items)  # saca el de menor sequence_number
-        else:
-            raise Exception("No hay paquetes en la ventana para eliminar.")
+    def mark_acked(self, sequence_number: int) -> WindowItem | None:
+        """Devuelve el paquete si el ACK lo confirma por primera vez."""
+        item = self.get(sequence_number)
+        slot = sequence_number % self.capacity
+        if item is None or self.acked[slot]:
+            return None
+        self.acked[slot] = 1
+        return item
+
+    def remove_first_sent(self) -> WindowItem:
+        item = self.first()
+        if item is None:
+            raise IndexError("No hay paquetes en la ventana para eliminar.")
+        self.slots[self.base] = None
+        self.acked[self.base] = 0
+        self.base = (self.base + 1) % self.capacity
+        self.count -= 1
+        return item
+
+    def first_is_acked(self) -> bool:
+        return self.count > 0 and bool(self.acked[self.base])
+
+    def unacked_before(self, sequence_number: int) -> list[WindowItem]:
+        """Paquetes sin confirmar más viejos que sequence_number."""
+        items = []
+        for offset in range(self.count):
+            slot = (self.base + offset) % self.capacity
+            item = self.slots[slot]
+            if item.sequence_number >= sequence_number:
+                break
+            if not self.acked[slot]:
+                items.append(item)
+        return items
 
 
 class SelectiveRepeatProtocol:
@@ -49,15 +121,30 @@ class SelectiveRepeatProtocol:
         self,
         socket: Socket,
         server_addr: ADDR,
-        window_size: int = 5,
+        window_size: int = INITIAL_WINDOW_SIZE,
         from_stop_and_wait: bool = False,
         logger: logging.Logger | None = None,
         logging_level: int = logging.DEBUG,
+        congestion_control: CongestionControl = CongestionControl.FIXED,
+        ack_every: int = DELAYED_ACK_COUNT,
+        ack_delay: float = DELAYED_ACK_TIMEOUT,
+        fast_retransmit_threshold: int = FAST_RETRANSMIT_THRESHOLD,
     ) -> None:
         self.from_stop_and_wait = from_stop_and_wait
         self.socket = socket
         self.server_addr = server_addr
-        self.window = Window(window_size)
+        if from_stop_and_wait:
+            # con números de secuencia alternados la ventana no puede crecer
+            congestion_control = CongestionControl.FIXED
+        self.congestion = create_congestion_controller(congestion_control, window_size)
+        self.window = Window(max(window_size, self.congestion.max_window))
+        # las pérdidas de paquetes enviados antes de este seq_number pertenecen
+        # a un episodio que ya achicó la ventana
+        self.recovery_point = 0
+        # la última ventana que anunció el receptor, si anunció alguna
+        self.peer_window: int | None = None
+        # 0 desactiva el fast retransmit y solo se reenvía por timeout
+        self.fast_retransmit_threshold = fast_retransmit_threshold
 
         if logger is None:
             logger = create_logger(
@@ -70,34 +157,96 @@ class SelectiveRepeatProtocol:
         self.tries = 0
         self.max_tries = 5
 
-        self.sequence_number = 0
+        # los timers del socket corren en su propio hilo: el estado que
+        # comparten con el que manda o recibe solo se toca con este lock
+        self.lock = RLock()
+        self.delayed_ack = DelayedAck(
+            lambda ack: self.socket.sendto(ack, self.server_addr),
+            socket.scheduler,
+            ("ack", server_addr),
+            ack_every,
+            ack_delay,
+            lock=self.lock,
+        )
+        self.rtt = RttEstimator()
+        self.reorder_buffer: ReorderBuffer | None = None
+        # CRC32C en los DataPackage y su tamaño, según lo acordado en el Init
+        self.castagnoli = False
+        self.payload_size = PAYLOAD_SIZE
+        # los datos viajan como un flujo de frames comprimidos si así se
+        # acordó; el digest es siempre el de los datos sin comprimir
+        self.compression = Compression.NONE
+        self.compression_level = 0
+        # el diccionario de zlib acordado, si hay
+        self.dictionary: bytes | None = None
+        # lo que se manda, o se recibe en orden, y el digest que trajo el FIN
+        self.digest = file_digest()
+        self.fin_digest: bytes | None = None
 
     # ---------------------------- SEND ---------------------------- #
 
     def send(self, file: BufferedReader) -> None:
+        source, digest = file, self.digest
+        if self.compressing():
+            # el encoder actualiza el digest con lo que lee del archivo
+            source = FrameEncoder(
+                file.read,
+                self.compression,
+                self.compression_level,
+                self.digest,
+                dictionary=self.dictionary,
+            )
+            digest = None
         finished = False
         while not finished:
-            while self.window.length() < self.window.size:
-                data = file.read(BUFSIZE - 16)
+            # todo lo que entra en la ventana sale en una sola llamada
+            packages = []
+            while self.has_window_space():
+                data = source.read(self.payload_size)
 
                 if not data:
                     break
 
-                data_package = DataPackage(data, self.last_sequence_number)
-                self._send_package(data_package)
+                if digest is not None:
+                    digest.update(data)
+                data_package = DataPackage(
+                    data, self.last_sequence_number, self.castagnoli
+                )
                 self.agregar_paquete_al_window(data_package)
+                packages.append(data_package)
+            self._send_packages(packages)
 
             if self.window.length() == 0:
                 finished = True
                 break
             self._receive_ack()
 
+        self.socket.settimeout(IDLE_TIMEOUT)
+
+    def compressing(self) -> bool:
+        return self.compression != Compression.NONE
+
+    def create_decoder(self) -> FrameDecoder | None:
+        if not self.compressing():
+            return None
+        return FrameDecoder(
+            self.compression, self.compression_level, dictionary=self.dictionary
+        )
+
     def _send_package(self, package: DataPackage) -> None:
         self.socket.sendto(package, self.server_addr)
         self.logger.debug(
             f"Enviando paquete: {package.sequence_number}  - ({self.first_sequence_number} {self.last_sequence_number})"
         )
 
+    def _send_packages(self, packages: list[DataPackage]) -> None:
+        if not packages:
+            return
+        self.socket.send_many(packages, self.server_addr)
+        self.logger.debug(
+            f"Enviando paquetes: {packages[0].sequence_number} a {packages[-1].sequence_number}  - ({self.first_sequence_number} {self.last_sequence_number})"
+        )
+
     def obtener_proximo_seq_number(self, seq_number: int) -> int:
         if self.from_stop_and_wait:
             return seq_number ^ 1
@@ -105,31 +254,48 @@ class SelectiveRepeatProtocol:
             return seq_number + 1
 
     def agregar_paquete_al_window(self, package: DataPackage) -> None:
-        item = WindowItem(package.sequence_number, package.data)
-        self.window.add_item(item)
-        self.last_sequence_number = self.obtener_proximo_seq_number(
-            self.last_sequence_number
+        item = WindowItem(
+            package.sequence_number, package.data, sent_at=time.monotonic()
         )
-
-        self._start_timer_for_item(item)  ### NUEVO TIMER
+        with self.lock:
+            self.window.add_item(item)
+            self.last_sequence_number = self.obtener_proximo_seq_number(
+                self.last_sequence_number
+            )
+            self._start_timer_for_item(item)
 
     def _receive_ack(self) -> None:
         if self.tries >= self.max_tries:
             self.logger.error("Número máximo de reintentos alcanzado. Abortando.")
             raise Exception("Número máximo de reintentos alcanzado. Abortando.")
 
-        # Espera la confirmación (ACK)
-        self.socket.settimeout(10)  # Timeout de 1 segundo
+        # Espera la confirmación (ACK). Los timers de cada paquete reenvian con
+        # el RTO; este timeout solo salta si el otro extremo deja de responder.
+        self.socket.settimeout(2 * self.rtt.rto)
         try:
-            ack, _ = self.socket.recv()
+            packages = self.socket.recv_many()
         except TimeoutError:
-            self.logger.debug("Timeout esperando ACK")
-
-            # Es probable que el paquete se haya perdido, por lo tanto lo reenviamos
-            data_package = DataPackage(
-                self.window.items[0].data, self.first_sequence_number
-            )
-            self._send_package(data_package)
+            self.logger.debug(f"Timeout esperando ACK (rto={self.rtt.rto:.3f}s)")
+
+            # Es probable que el paquete se haya perdido, por lo tanto lo
+            # reenviamos junto con los demás huecos: los que agotaron sus
+            # reintentos ya no tienen timer y solo salen por acá
+            with self.lock:
+                first_item = self.window.first()
+                if self.from_stop_and_wait:
+                    lost = [first_item]
+                else:
+                    lost = self.window.unacked_before(self.last_sequence_number)
+                for item in lost:
+                    item.retransmitted = True
+                # el timer del paquete ya duplicó el RTO al vencer
+                self._send_packages(
+                    [
+                        DataPackage(item.data, item.sequence_number, self.castagnoli)
+                        for item in lost
+                    ]
+                )
+                self._on_loss(first_item, timeout=True)
             self.tries += 1
             return
         except Exception as e:
@@ -137,71 +303,120 @@ class SelectiveRepeatProtocol:
             self.tries += 1
             raise
 
-        if not isinstance(ack, AckPackage):
-            return
+        for ack, _ in packages:
+            if isinstance(ack, AckPackage):
+                self.tries = 0
+                self._handle_ack(ack)
 
+    def _handle_ack(self, ack: AckPackage) -> None:
         self.logger.debug(
-            f"Recibiendo ACK: {ack.sequence_number}  - ({self.first_sequence_number} {self.last_sequence_number})"
+            f"Recibiendo ACK: {ack}  - ({self.first_sequence_number} {self.last_sequence_number})"
         )
 
-        for item in self.window.items:
-            if item.sequence_number == ack.sequence_number:
-                item.acked = True
-                if item.stop_event:  ### NUEVO TIMER
-                    item.stop_event.set()  ### NUEVO TIMER
-                break
-
-        if ack.sequence_number != self.first_sequence_number:
+        if not self.process_ack(ack):
             self.logger.debug(
-                f"ACK no coincide: {ack.sequence_number} != {self.first_sequence_number}"
-            )
-        else:
-            first_package = self.window.items[0]
-            if first_package.sequence_number < ack.sequence_number:
-                self.logger.warning(
-                    f"El servidor mando un paquete con seq_number {first_package.sequence_number} que no esta en la ventana"
-                )
-                # raise ValueError("El primer paquete no coincide con el ACK recibido")
-                return
-
-            self.window.items.remove(first_package)
-            self.first_sequence_number = self.obtener_proximo_seq_number(
-                self.first_sequence_number
+                f"ACK no confirma paquetes nuevos: {ack.sequence_number} (primero {self.first_sequence_number})"
             )
 
-            if not self.from_stop_and_wait and self.window.length() > 0:
-                self._actualizar_window()
-
-    def _actualizar_window(self) -> None:
-        if self.window.length() == 0:
-            self.logger.warning("No hay paquetes en la ventana para actualizar.")
+    def process_ack(self, ack: AckPackage) -> int:
+        # Un ACK con bloques SACK puede confirmar varios paquetes de una vez;
+        # los que quedan sin confirmar son los únicos huecos a reenviar.
+        with self.lock:
+            if ack.window is not None:
+                self.peer_window = ack.window
+            acked = 0
+            highest_acked = None
+            for seq_num in self._acknowledged_sequence_numbers(ack):
+                if self.window.get(seq_num) is None:
+                    continue
+                if highest_acked is None or seq_num > highest_acked:
+                    highest_acked = seq_num
+                item = self.window.mark_acked(seq_num)
+                if item is not None:
+                    self._mark_acked(item)
+                    acked += 1
+
+            if highest_acked is not None:
+                self._fast_retransmit_holes(highest_acked)
+            self._slide_window()
+            return acked
+
+    def _acknowledged_sequence_numbers(self, ack: AckPackage):
+        # Recorre solo lo que el ACK confirma, no la ventana entera
+        yield ack.sequence_number
+        if not ack.has_sack() or self.from_stop_and_wait:
             return
 
-        first_package = self.window.items[0]
-
-        if first_package.acked:
-            # caso en que llego en desorden algun paquete
-            self.window.items.remove(first_package)
-            self.logger.warning(
-                f"Remuevo el paquete rezagado con seq_number {first_package.sequence_number} con ack true en la ventana"
+        yield from range(
+            self.first_sequence_number,
+            min(ack.cumulative, self.last_sequence_number),
+        )
+        bitmap = ack.sack_bitmap
+        while bitmap:
+            lowest = bitmap & -bitmap
+            yield ack.cumulative + lowest.bit_length()
+            bitmap ^= lowest
+
+    def _slide_window(self) -> None:
+        while self.window.first_is_acked():
+            self.window.remove_first_sent()
+            self.first_sequence_number = self.obtener_proximo_seq_number(
+                self.first_sequence_number
             )
-            self.first_sequence_number += 1
-            self._actualizar_window()
 
     # ---------------------------- RECEIVE ---------------------------- #
 
     def receive(self, file: BufferedWriter) -> None:
+        # el disco escribe en otro hilo: este solo recibe y confirma, y la
+        # ventana anunciada en los ACKs frena al emisor si el disco no da abasto
+        with ThreadPoolExecutor(1, thread_name_prefix="writer") as executor:
+            writer = WriteBehind(
+                file.fileno(), executor, on_drain=self.delayed_ack.send_window
+            )
+            # el archivo puede venir posicionado al comienzo de un rango. No
+            # se aceptan más paquetes de los que entran en el buffer del
+            # socket: con datagramas grandes son pocos
+            self.reorder_buffer = ReorderBuffer(
+                file,
+                self.payload_size,
+                min(REORDER_BUFFER_SIZE, self.socket.recv_capacity()),
+                offset=file.tell(),
+                writer=writer,
+                digest=self.digest,
+                decoder=self.create_decoder(),
+            )
+            self.delayed_ack.window = self.reorder_buffer.window
+            try:
+                self._receive_packages(file)
+            finally:
+                writer.on_drain = None
+                writer.flush()
+
+    def _receive_packages(self, file: BufferedWriter) -> None:
         finished = False
-
         while not finished:
-            package, _ = self.socket.recv()
-            if isinstance(package, DataPackage):
-                finished = self._receive_aux(package, file)
-            elif package.type == PackageType.FIN or package.data is None:
-                file.flush()
-                return
-            else:
-                self.logger.warning(f"Paquete inesperado recibido: {package}")
+            for package, _ in self.socket.recv_many():
+                if isinstance(package, DataPackage):
+                    finished = self._receive_aux(package, file)
+                elif package.type == PackageType.FIN:
+                    self.delayed_ack.cancel()
+                    self.fin_digest = package.digest
+                    file.flush()
+                    return
+                elif package.type == PackageType.INIT:
+                    # respuesta repetida a un Init reenviado: el handshake ya terminó
+                    continue
+                else:
+                    self.logger.warning(f"Paquete inesperado recibido: {package}")
+
+    def received_bytes(self) -> int:
+        if self.reorder_buffer is None:
+            return 0
+        return self.reorder_buffer.contiguous_bytes()
+
+    def verified(self) -> bool:
+        """Si lo recibido coincide con el digest que mandó el emisor en el FIN."""
+        return self.fin_digest == self.digest.digest()
 
     def _receive_aux(self, package: DataPackage, file: BufferedWriter) -> bool:
         # self.logger.debug(f"Recibiendo paquete type:{package.type.name}")
@@ -215,88 +430,148 @@ class SelectiveRepeatProtocol:
         if package.type != PackageType.DATA:
             raise Exception("El paquete recibido no es un DataPackage.")
 
-        file.write(package.data)
+        # si no entra en el buffer se descarta sin ACK y el emisor lo reenvía
+        if not self.reorder_buffer.accepts(package.sequence_number):
+            self.logger.debug(
+                f"Paquete {package.sequence_number} fuera del buffer de recepción"
+            )
+            return False
 
-        ack_package = AckPackage(self.sequence_number)  # type: ignore
-        # self.logger.debug(f"Enviando ACK con sequence number {self.sequence_number}")
-        self.socket.sendto(ack_package, self.server_addr)
-        self.sequence_number += 1
+        # el ACK agrupado sale desde el hilo de los timers y anuncia la
+        # ventana del buffer: no puede verlo a medio actualizar
+        with self.lock:
+            self.reorder_buffer.add(package.sequence_number, package.data)
+            # el ACK sale ahora o más tarde, agrupado, según DelayedAck
+            self.delayed_ack.on_packet(package.sequence_number)
         return False
 
     # ---------------------------- SERVER ---------------------------- #
 
     def send_chunk(self, chunk: bytes) -> None:
-        data_package = DataPackage(chunk, self.last_sequence_number)
-
-        self._send_package(data_package)
-        self.agregar_paquete_al_window(data_package)
-
-    def ack_received(self, seq_number: int) -> bool:
-        for item in self.window.items:
-            if item.sequence_number == seq_number:
-                item.acked = True
-                if item.stop_event:  ### NUEVO TIMER
-                    item.stop_event.set()  ### NUEVO TIMER
-                break
-        else:
-            self.logger.warning(
-                f"ACK recibido por paquete fuera de la ventana: {seq_number}"
+        self.send_chunks([chunk])
+
+    def send_chunks(self, chunks: list[bytes]) -> None:
+        packages = []
+        for chunk in chunks:
+            # comprimidos, el digest lo lleva el encoder del servidor
+            if not self.compressing():
+                self.digest.update(chunk)
+            data_package = DataPackage(
+                chunk, self.last_sequence_number, self.castagnoli
             )
-            return False
-
-        # Avanzar la ventana si el primero fue ACKed
-        while self.window.items and self.window.items[0].acked:
-            self.window.remove_first_sent()
-            self.first_sequence_number += 1
-
-        return True
+            self.agregar_paquete_al_window(data_package)
+            packages.append(data_package)
+        self._send_packages(packages)
 
     def contains_seq_num(self, seq_num: int) -> bool:
-        for item in self.window.items:
-            if item.sequence_number == seq_num:
-                return True
-        return False
+        return self.window.get(seq_num) is not None
 
     def resend_package(self, seq_num: int) -> bool:
-        for item in self.window.items:
-            if item.sequence_number == seq_num:
-                if item.retries_left <= 0:
-                    self.logger.error(
-                        f"Paquete con seq_num {seq_num} ha alcanzado el número máximo de reintentos."
-                    )
-                    return False
-                item.retries_left -= 1
-                data_package = DataPackage(item.data, seq_num)
-                self._send_package(data_package)
-                self.logger.debug(
-                    f"Reenviando paquete: {data_package.sequence_number}  - ({self.first_sequence_number} {self.last_sequence_number})"
+        with self.lock:
+            item = self.window.get(seq_num)
+            if item is None:
+                self.logger.warning(
+                    f"Paquete con seq_num {seq_num} no encontrado en la ventana"
                 )
-                break
-        else:
-            self.logger.warning(
-                f"Paquete con seq_num {seq_num} no encontrado en la ventana"
+                return False
+            if not self._retransmit(item, timeout=False):
+                return False
+        self.logger.debug(
+            f"Reenviando paquete: {seq_num}  - ({self.first_sequence_number} {self.last_sequence_number})"
+        )
+        return True
+
+    # ---------------------------- RETRANSMISSION ---------------------------- #
+
+    def _mark_acked(self, item: WindowItem) -> None:
+        self._cancel_timer_for_item(item)
+        rtt = None
+        if not item.retransmitted:
+            rtt = time.monotonic() - item.sent_at
+            self.rtt.sample(rtt)
+        self.congestion.on_ack(1, rtt)
+
+    def get_rtt_stats(self) -> dict[str, float | int | None]:
+        return self.rtt.stats()
+
+    def _fast_retransmit_holes(self, highest_acked: int) -> None:
+        # Si varios ACKs ya confirmaron paquetes posteriores, el hueco es una
+        # pérdida y se reenvía sin esperar a que venza su timer.
+        if self.from_stop_and_wait or not self.fast_retransmit_threshold:
+            return
+
+        for item in self.window.unacked_before(highest_acked):
+            item.later_acks += 1
+            if item.later_acks == self.fast_retransmit_threshold:
+                self.logger.debug(f"Fast retransmit del paquete {item.sequence_number}")
+                self._retransmit(item, timeout=False)
+
+    def _retransmit(self, item: WindowItem, timeout: bool) -> bool:
+        if item.retries_left <= 0:
+            self.logger.error(
+                f"Paquete con seq_num {item.sequence_number} ha alcanzado el número máximo de reintentos."
             )
             return False
+
+        item.retries_left -= 1
+        item.retransmitted = True
+        if timeout and item is self.window.first():
+            # como TCP, se duplica el RTO una vez por vencimiento del paquete
+            # más viejo y no una vez por cada paquete de la ventana
+            self.rtt.backoff()
+        self._on_loss(item, timeout)
+        data_package = DataPackage(item.data, item.sequence_number, self.castagnoli)
+        self._send_package(data_package)
+        self._start_timer_for_item(item)
         return True
 
-    ### NUEVO TIMER
+    # ---------------------------- CONGESTION ---------------------------- #
+
+    def has_window_space(self) -> bool:
+        return self.window_space() > 0
+
+    def window_space(self) -> int:
+        with self.lock:
+            limit = self.congestion.window()
+            if self.peer_window is not None:
+                # con la ventana del receptor en 0 igual sale un paquete, que
+                # hace de sonda hasta que avise que volvió a tener lugar
+                limit = min(limit, max(1, self.peer_window))
+            return max(0, limit - self.window.length())
+
+    def _on_loss(self, item: WindowItem, timeout: bool) -> None:
+        if self.from_stop_and_wait or item.sequence_number < self.recovery_point:
+            return
+        if timeout:
+            self.congestion.on_timeout()
+        else:
+            self.congestion.on_loss()
+        self.recovery_point = self.last_sequence_number
+        self.logger.debug(f"Pérdida detectada, ventana: {self.congestion.stats()}")
+
+    # ---------------------------- TIMERS ---------------------------- #
+
+    def _timer_key(self, sequence_number: int) -> tuple[ADDR, int]:
+        return (self.server_addr, sequence_number)
+
     def _start_timer_for_item(self, item: WindowItem) -> None:
-        stop_event = Event()
-        item.stop_event = stop_event  # Asignás igualmente si otro código lo necesita
+        self.socket.scheduler.arm(
+            self._timer_key(item.sequence_number),
+            self.rtt.rto,
+            lambda _: self._on_item_timeout(item),
+        )
 
-        def timeout_func(local_stop_event=stop_event):  # Capturás el Event localmente
-            while not local_stop_event.wait(timeout=3):
-                if item.acked:
-                    return
-                self.logger.debug(
-                    f"Timeout para paquete {item.sequence_number}, reenviando."
-                )
-                item.retries_left -= 1
-                data_package = DataPackage(item.data, item.sequence_number)
-                self._send_package(data_package)
+    def _cancel_timer_for_item(self, item: WindowItem) -> None:
+        self.socket.scheduler.cancel(self._timer_key(item.sequence_number))
 
-        thread = Thread(target=timeout_func)
-        thread.daemon = True
-        thread.start()
+    def _on_item_timeout(self, item: WindowItem) -> None:
+        with self.lock:
+            if self.window.get(
+                item.sequence_number
+            ) is not item or self.window.is_acked(item.sequence_number):
+                return
 
-        item.timer_thread = thread
+            self.logger.debug(
+                f"Timeout para paquete {item.sequence_number}, reenviando."
+            )
+            self._retransmit(item, timeout=True)
@@ -1,10 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from io import BufferedReader, BufferedWriter
 from lib.packages.AckPackage import AckPackage
 from lib.utils.types import ADDR
 from lib.utils.Socket import Socket
 from lib.packages.Package import Package
-from lib.utils.enums import PackageType
+from lib.utils.enums import Compression, PackageType
+from lib.protocols.compression import FrameDecoder
 from lib.protocols.selective_repeat import SelectiveRepeatProtocol
+from lib.protocols.write_behind import WriteBehind
+from lib.utils.checksum import file_digest
+from lib.utils.constants import PAYLOAD_SIZE
 from lib.utils.logger import create_logger
 import logging
 
@@ -16,27 +21,67 @@ class StopAndWaitProtocol:
         self.socket = socket
         self.server_addr = server_addr
         self.sequence_number = 0
+        self.bytes_received = 0
+        self.start = 0  # posición del archivo donde empieza lo recibido
+        self.writer: WriteBehind | None = None
+        self.castagnoli = False
+        self.payload_size = PAYLOAD_SIZE
+        self.compression = Compression.NONE
+        self.compression_level = 0
+        self.dictionary: bytes | None = None
+        self.decoder: FrameDecoder | None = None
+        self.digest = file_digest()
+        self.fin_digest: bytes | None = None
         self.tries = 0
         self.logger = create_logger(
             "selective_repeat", "[STOP AND WAIT]", logging_level
         )
 
     def send(self, file: BufferedReader) -> None:
-        SelectiveRepeatProtocol(
+        protocol = SelectiveRepeatProtocol(
             self.socket, self.server_addr, 1, True, self.logger
-        ).send(file)
+        )
+        protocol.castagnoli = self.castagnoli
+        protocol.payload_size = self.payload_size
+        protocol.compression = self.compression
+        protocol.compression_level = self.compression_level
+        protocol.dictionary = self.dictionary
+        protocol.digest = self.digest
+        protocol.send(file)
 
     def receive(self, file: BufferedWriter) -> None:
-        finished = False
+        # el ACK sale sin esperar a que el paquete llegue al disco
+        file.flush()
+        self.start = file.tell()
+        if self.compression != Compression.NONE:
+            self.decoder = FrameDecoder(
+                self.compression, self.compression_level, dictionary=self.dictionary
+            )
+        with ThreadPoolExecutor(1, thread_name_prefix="writer") as executor:
+            self.writer = WriteBehind(file.fileno(), executor)
+            try:
+                finished = False
+                while not finished:
+                    package, _ = self.socket.recv()
+                    finished = self._receive_aux(package, file)
+            finally:
+                self.writer.flush()
+
+    def received_bytes(self) -> int:
+        return self.bytes_received
 
-        while not finished:
-            package, _ = self.socket.recv()
-            finished = self._receive_aux(package, file)
+    def verified(self) -> bool:
+        """Si lo recibido coincide con el digest que mandó el emisor en el FIN."""
+        return self.fin_digest == self.digest.digest()
 
     def _receive_aux(self, package: Package, file: BufferedWriter) -> bool:
-        if package.type == PackageType.FIN or package.data is None:
+        if package.type == PackageType.FIN:
+            self.fin_digest = package.digest  # type: ignore
             file.flush()
             return True
+        if package.type == PackageType.INIT:
+            # respuesta repetida a un Init reenviado: el handshake ya terminó
+            return False
 
         if not package.valid:
             ack_package = AckPackage(self.sequence_number, False)
@@ -47,7 +92,14 @@ class StopAndWaitProtocol:
             raise Exception("El paquete recibido no es un DataPackage.")
 
         # 4. Sino, es un DataPackage
-        file.write(package.data)
+        data = package.data  # type: ignore
+        if self.decoder is not None:
+            # un frame a medias da b"" y se completa con los próximos paquetes
+            data = self.decoder.feed(data)
+        if data:
+            self.writer.write(self.start + self.bytes_received, data)
+            self.digest.update(data)
+            self.bytes_received += len(data)
 
         # 5. ACK por cada paquete
         ack_package = AckPackage(self.sequence_number)  # type: ignore
@@ -0,0 +1,136 @@
+import os
+import threading
+from concurrent.futures import Executor
+from collections.abc import Callable
+
+from lib.utils.constants import WRITE_BEHIND_BATCH, WRITE_BEHIND_BYTES
+
+IOV_MAX = os.sysconf("SC_IOV_MAX") if hasattr(os, "sysconf") else 1024
+
+
+class WriteBehind:
+    """
+    Escritura diferida: write encola el segmento y vuelve en el acto; un
+    hilo del executor vacía la cola juntando los segmentos contiguos en un
+    solo pwritev. Así quien recibe los paquetes no espera al disco.
+
+    Para no pasarle cada paquete a otro hilo, la cola se empieza a vaciar
+    recién con batch bytes encolados, o antes si se llama a commit o flush.
+
+    capacity es el presupuesto de bytes en cola. No se bloquea al pasarlo:
+    el receptor anuncia free() en su ventana y el emisor frena, por eso la
+    cola no crece más allá de capacity más lo que ya venía en vuelo. Cuando
+    se libera lugar tras haber pasado la mitad se llama a on_drain, desde el
+    hilo que escribe, para que el receptor avise que la ventana se abrió.
+    """
+
+    def __init__(
+        self,
+        fd: int,
+        executor: Executor,
+        capacity: int = WRITE_BEHIND_BYTES,
+        batch: int = WRITE_BEHIND_BATCH,
+        on_drain: Callable[[], None] | None = None,
+    ) -> None:
+        self.fd = fd
+        self.executor = executor
+        self.capacity = capacity
+        self.batch = batch
+        self.on_drain = on_drain
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.segments: list[tuple[int, bytes]] = []
+        self.queued = 0  # bytes en cola o escribiéndose
+        self.draining = False
+        self.error: OSError | None = None
+
+    def free(self) -> int:
+        return max(0, self.capacity - self.queued)
+
+    def write(self, position: int, data: bytes | memoryview) -> None:
+        # la vista suele apuntar a un buffer del socket que se va a reusar
+        data = bytes(data)
+        with self.lock:
+            if self.error is not None:
+                raise self.error
+            self.segments.append((position, data))
+            self.queued += len(data)
+            if self.draining or self.queued < self.batch:
+                return
+            self.draining = True
+        self.executor.submit(self._drain)
+
+    def commit(self) -> None:
+        """Empieza a escribir lo encolado aunque no llegue a un batch."""
+        with self.lock:
+            if self.draining or not self.segments:
+                return
+            self.draining = True
+        self.executor.submit(self._drain)
+
+    def flush(self) -> None:
+        """Espera a que todo lo encolado esté escrito."""
+        self.commit()
+        with self.lock:
+            while self.draining:
+                self.idle.wait()
+            if self.error is not None:
+                raise self.error
+
+    def _drain(self) -> None:
+        while True:
+            with self.lock:
+                segments, self.segments = self.segments, []
+                if not segments:
+                    self.draining = False
+                    self.idle.notify_all()
+                    return
+            try:
+                written = self._write_runs(segments)
+            except OSError as e:
+                with self.lock:
+                    self.error = e
+                    self.segments = []
+                    self.queued = 0
+                    self.draining = False
+                    self.idle.notify_all()
+                return
+
+            with self.lock:
+                was_full = self.queued > self.capacity // 2
+                self.queued -= written
+                opened = was_full and self.queued <= self.capacity // 2
+            if opened and self.on_drain is not None:
+                self.on_drain()
+
+    def _write_runs(self, segments: list[tuple[int, bytes]]) -> int:
+        segments.sort(key=lambda segment: segment[0])
+        start, run = segments[0][0], [segments[0][1]]
+        end = start + len(run[0])
+        for position, data in segments[1:]:
+            if position == end and len(run) < IOV_MAX:
+                run.append(data)
+            else:
+                self._pwritev(start, run)
+                start, run = position, [data]
+                end = position
+            end += len(data)
+        self._pwritev(start, run)
+        return sum(len(data) for _, data in segments)
+
+    def _pwritev(self, position: int, buffers: list[bytes]) -> None:
+        if not hasattr(os, "pwritev"):
+            os.pwrite(self.fd, b"".join(buffers), position)
+            return
+        views = [memoryview(buffer) for buffer in buffers]
+        while views:
+            written = os.pwritev(self.fd, views, position)
+            position += written
+            # escritura parcial: se sigue desde donde quedó
+            done = 0
+            while done < len(views) and written >= len(views[done]):
+                written -= len(views[done])
+                done += 1
+            views = views[done:]
+            if views and written:
+                views[0] = views[0][written:]
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+from lib.protocols.compression import dictionary_id, dictionary_name
+from lib.utils.constants import (
+    DICTIONARY_MIN_SAMPLES,
+    DICTIONARY_PREFIX,
+    DICTIONARY_REBUILD_INTERVAL,
+    DICTIONARY_SAMPLE_FILE_SIZE,
+    DICTIONARY_SAMPLES,
+    DICTIONARY_SIZE,
+    DICTIONARY_VERSIONS,
+)
+
+
+def build_dictionary(samples: list[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Junta el comienzo de cada muestra, de la más vieja a la más nueva, hasta
+    size bytes. zlib llega más barato a lo que está al final del
+    diccionario: ahí queda lo más reciente.
+    """
+    share = max(1, size // len(samples))
+    return b"".join(sample[:share] for sample in samples)[-size:]
+
+
+class DictionaryStore:
+    """
+    Diccionario de zlib del servidor, armado con muestras de los archivos
+    chicos del storage. Se rearma, a lo sumo cada rebuild_interval segundos,
+    cuando cambia el directorio; si las muestras son las mismas sale el
+    mismo diccionario con el mismo id.
+
+    Cada versión se publica en el storage como el archivo oculto
+    dictionary_name(id), que los clientes bajan como cualquier otro. Se
+    guardan las últimas DICTIONARY_VERSIONS para que un cliente que vio el id
+    anterior todavía pueda bajarlo.
+
+    current corre en el executor, desde varios hilos a la vez: el lock
+    evita armarlo dos veces.
+    """
+
+    def __init__(
+        self, storage: str, rebuild_interval: float = DICTIONARY_REBUILD_INTERVAL
+    ) -> None:
+        self.storage = storage
+        self.rebuild_interval = rebuild_interval
+        self.lock = threading.Lock()
+        self.id = 0
+        self.dictionary: bytes | None = None
+        self.built_at = 0.0
+        self.storage_mtime: int | None = None
+
+    def current(self) -> tuple[int, bytes | None]:
+        """El id y el contenido del diccionario vigente; (0, None) si no hay."""
+        with self.lock:
+            if self._stale():
+                self._rebuild()
+            return self.id, self.dictionary
+
+    def _stale(self) -> bool:
+        if self.storage_mtime is None:
+            return True
+        if time.monotonic() - self.built_at < self.rebuild_interval:
+            return False
+        return os.stat(self.storage).st_mtime_ns != self.storage_mtime
+
+    def _rebuild(self) -> None:
+        self.built_at = time.monotonic()
+        samples = self._samples()
+        if len(samples) >= DICTIONARY_MIN_SAMPLES:
+            dictionary = build_dictionary(samples)
+            identifier = dictionary_id(dictionary)
+            if identifier != self.id:
+                self._publish(identifier, dictionary)
+                self.id, self.dictionary = identifier, dictionary
+        # publicar cambia el directorio: se mira después
+        self.storage_mtime = os.stat(self.storage).st_mtime_ns
+
+    def _samples(self) -> list[bytes]:
+        # los archivos ocultos son temporales, journals o diccionarios
+        entries = []
+        with os.scandir(self.storage) as scan:
+            for entry in scan:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if 0 < stat.st_size <= DICTIONARY_SAMPLE_FILE_SIZE:
+                    entries.append((stat.st_mtime_ns, entry.name, entry.path))
+        samples = []
+        for _, _, path in sorted(entries)[-DICTIONARY_SAMPLES:]:
+            try:
+                with open(path, "rb") as file:
+                    samples.append(file.read(DICTIONARY_SIZE))
+            except OSError:
+                continue  # se borró o se reemplazó mientras tanto
+        return samples
+
+    def _publish(self, identifier: int, dictionary: bytes) -> None:
+        path = os.path.join(self.storage, dictionary_name(identifier))
+        if not os.path.exists(path):
+            # se escribe aparte y se renombra: nadie baja uno a medias
+            partial = f"{path}.tmp"
+            with open(partial, "wb") as file:
+                file.write(dictionary)
+            os.replace(partial, path)
+        else:
+            # el mismo que una versión anterior: pasa a ser el más nuevo
+            os.utime(path)
+
+        versions = sorted(
+            (entry.stat().st_mtime_ns, entry.path)
+            for entry in os.scandir(self.storage)
+            if entry.name.startswith(DICTIONARY_PREFIX)
+            and not entry.name.endswith(".tmp")
+        )
+        for _, old in versions[:-DICTIONARY_VERSIONS]:
+            try:
+                os.unlink(old)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,140 @@
+import mmap
+import os
+from collections import OrderedDict
+
+from lib.utils.constants import MAPPED_CACHE_BYTES, PAYLOAD_SIZE, READ_AHEAD_CHUNKS
+
+
+def file_key(stat: os.stat_result) -> tuple[int, int, int]:
+    # identifica una versión del archivo: una subida nueva cambia alguno
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class MappedFile:
+    """
+    Archivo a descargar mapeado en memoria de solo lectura. Los chunks son
+    memoryview sobre el mapa: ni al mandarlos ni al reenviarlos se copian los
+    datos, y el kernel comparte las páginas con el page cache.
+
+    Las subidas nunca escriben sobre un archivo ya publicado: lo reemplazan
+    con un rename, así que el inodo mapeado no cambia ni se trunca mientras
+    haya descargas leyéndolo. Sin usuarios el mapa queda en cache hasta que
+    se vuelva a pedir o se desaloje.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        try:
+            stat = os.fstat(self.fd)
+            self.key = file_key(stat)
+            self.size = stat.st_size
+            self.map: mmap.mmap | None = None
+            self.view = memoryview(b"")
+            if self.size:  # no se puede mapear un archivo vacío
+                self.map = mmap.mmap(self.fd, 0, access=mmap.ACCESS_READ)
+                self.map.madvise(mmap.MADV_SEQUENTIAL)
+                self.view = memoryview(self.map)
+        except BaseException:
+            os.close(self.fd)
+            raise
+        self.users = 1
+
+    def chunk(self, position: int, end: int, size: int = PAYLOAD_SIZE) -> memoryview:
+        return self.view[position : min(position + size, end)]
+
+    def read_ahead(self, position: int, end: int, size: int = PAYLOAD_SIZE) -> None:
+        # pide al kernel las próximas páginas para que el envío, que corre en
+        # el loop, no se frene en un fallo de página esperando al disco
+        if self.map is None or position >= end:
+            return
+        start = position - position % mmap.PAGESIZE
+        length = min(READ_AHEAD_CHUNKS * size, end - start)
+        self.map.madvise(mmap.MADV_WILLNEED, start, length)
+
+    def close(self) -> None:
+        self.view.release()
+        if self.map is not None:
+            try:
+                self.map.close()
+            except BufferError:
+                # algún chunk sigue referenciado: el mapa se libera con él
+                pass
+        os.close(self.fd)
+
+
+class FileMappings:
+    """
+    Cache de archivos mapeados, compartida por todas las descargas del
+    servidor: cada archivo se mapea una vez y lo que se descargue de él sale
+    de las mismas páginas. La clave es la ruta más la versión del archivo
+    (inodo, tamaño y mtime), así que una subida que lo reemplaza lo invalida
+    aunque ocurra en otro worker.
+
+    Los mapas sin descargas en curso se guardan hasta budget bytes y se
+    desalojan del menos usado recientemente. Los que están en uso no cuentan
+    para desalojar y se cierran cuando los suelta la última descarga.
+    """
+
+    def __init__(self, budget: int = MAPPED_CACHE_BYTES) -> None:
+        self.budget = budget
+        self.files: OrderedDict[str, MappedFile] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, key: tuple[int, int, int]) -> MappedFile | None:
+        """El mapa de esa versión del archivo, o None si hay que abrir uno."""
+        mapped = self.files.get(path)
+        if mapped is not None and mapped.key == key:
+            mapped.users += 1
+            self.files.move_to_end(path)
+            self.hits += 1
+            return mapped
+        if mapped is not None:
+            self.invalidate(path)
+        self.misses += 1
+        return None
+
+    def add(self, mapped: MappedFile) -> MappedFile:
+        """Registra un mapa recién abierto, o devuelve el que ya había para ese archivo."""
+        current = self.files.get(mapped.path)
+        if current is not None and current.key == mapped.key:
+            current.users += 1
+            mapped.close()
+            self.files.move_to_end(mapped.path)
+            return current
+        self.invalidate(mapped.path)
+        self.files[mapped.path] = mapped
+        self._evict()
+        return mapped
+
+    def release(self, mapped: MappedFile) -> None:
+        mapped.users -= 1
+        if mapped.users:
+            return
+        if self.files.get(mapped.path) is not mapped:
+            mapped.close()  # lo reemplazó una versión más nueva
+            return
+        self._evict()
+
+    def invalidate(self, path: str) -> None:
+        mapped = self.files.pop(path, None)
+        if mapped is not None and not mapped.users:
+            mapped.close()
+
+    def clear(self) -> None:
+        for path in list(self.files):
+            self.invalidate(path)
+
+    def cached_bytes(self) -> int:
+        return sum(mapped.size for mapped in self.files.values())
+
+    def _evict(self) -> None:
+        total = self.cached_bytes()
+        for path, mapped in list(self.files.items()):
+            if total <= self.budget:
+                break
+            if not mapped.users:
+                del self.files[path]
+                mapped.close()
+                total -= mapped.size
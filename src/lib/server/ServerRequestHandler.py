@@ -1,20 +1,59 @@
-from dataclasses import dataclass
-from io import BufferedRandom
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
+from dataclasses import dataclass, field
 import logging
+import os
+from typing import Any, IO
+from collections.abc import Callable
 from lib.utils.types import REQUEST
-from lib.utils.constants import OPERATION, BUFSIZE
+from lib.utils.constants import (
+    FIN_ACK_SEQUENCE,
+    START_ACK_SEQUENCE,
+    BUFSIZE,
+    CLIENT_BATCH_SIZE,
+    IDLE_TIMEOUT,
+    INITIAL_WINDOW_SIZE,
+    JOURNAL_INTERVAL,
+    MAX_COMPRESSION_LEVEL,
+    MAX_PAYLOAD_SIZE,
+    PARTIAL_SUFFIX,
+    OPERATION,
+    PAYLOAD_SIZE,
+    READ_AHEAD_CHUNKS,
+    REORDER_BUFFER_SIZE,
+    SEND_BATCH_SIZE,
+    TRANSFER_LINGER,
+    TRANSFER_SOCKET_BUFFER,
+    WRITER_THREADS,
+)
 from lib.utils.types import ADDR
-import os
-from lib.packages.InitPackage import InitPackage
+from lib.packages.InitPackage import DownloadHeader, InitPackage, UploadHeader
 from lib.utils.enums import PackageType
+from lib.utils.checksum import HAVE_CRC32C
 from lib.utils.logger import create_logger
-from lib.utils.Socket import Socket
+from lib.utils.LoopScheduler import LoopScheduler
+from lib.utils.mmsg import HAVE_MMSG, MessageBatch
+from lib.utils.pmtu import datagrams_in_buffer, set_transfer_buffers
+from lib.utils.TransportSocket import TransportSocket
+from lib.utils.TransferJournal import TransferJournal
+from lib.server.TransferProtocol import TransferProtocol
+from lib.server.DictionaryStore import DictionaryStore
+from lib.server.MappedFile import FileMappings, MappedFile, file_key
 from lib.packages.AckPackage import AckPackage
 from lib.packages.DataPackage import DataPackage
+from lib.packages.FactoryPackage import FactoryPackage
 from lib.packages.FinPackage import FinPackage
+from lib.packages.Header import HEADER_SIZE
+from lib.packages.Package import Package
+from lib.packages.ProbePackage import ProbePackage
+from lib.protocols.compression import FrameDecoder, FrameEncoder
 from lib.protocols.selective_repeat import SelectiveRepeatProtocol
-from typing import Optional, IO
-from lib.utils.enums import Protocol
+from lib.protocols.delayed_ack import DelayedAck
+from lib.protocols.reorder_buffer import ReorderBuffer
+from lib.protocols.write_behind import WriteBehind
+from lib.utils.enums import CongestionControl, Compression, Protocol
+from lib.utils.package_error import ChecksumErr, PackageErr
 
 
 @dataclass
@@ -23,201 +62,810 @@ class ClientInfo:
     operation: OPERATION
     last_package_type: PackageType
     filename: str
-    protocol: SelectiveRepeatProtocol
-    file: BufferedRandom | None = None
+    # se crean al abrir el socket propio de la transferencia
+    protocol: SelectiveRepeatProtocol | None = None
+    socket: TransportSocket | None = None
+    transfer: TransferProtocol | None = None
+    file: IO[bytes] | None = None
     seq_number: int = 0
+    client_protocol: Protocol = Protocol.STOP_WAIT
+    # rango del archivo que mueve la transferencia; length 0 es el archivo entero
+    offset: int = 0
+    length: int = 0
+    file_size: int = 0
+    resume: bool = False
+    # CRC32C en los DataPackage, si el cliente lo ofreció y acá está
+    castagnoli: bool = False
+    # datos por DataPackage: lo que pidió el cliente, hasta el máximo del servidor
+    payload_size: int = PAYLOAD_SIZE
+    # la compresión que pidió el cliente; las subidas se decodifican con
+    # decoder y las descargas salen de encoder
+    compression: Compression = Compression.NONE
+    compression_level: int = 0
+    # el diccionario que ofreció el cliente y, una vez elegido, el que
+    # anuncia la respuesta
+    dictionary_id: int = 0
+    encoder: FrameEncoder | None = None
+    decoder: FrameDecoder | None = None
+    # subidas: se escriben en partial_path(target) y lo escrito sin huecos
+    # desde offset se anota en el journal
+    target: str = ""
+    journal: TransferJournal | None = None
+    bytes_written: int = 0
+    journal_time: float = 0.0
+    delayed_ack: DelayedAck | None = None
+    # la subida no coincidió con el digest del FIN: no se publica
+    corrupt: bool = False
+    reorder_buffer: ReorderBuffer | None = None
+    writer: WriteBehind | None = None
+    # estado de la transferencia, propio de cada cliente
+    first_window_sent: bool = False
+    retrys: int = 0
+    last_chunk: bytes | memoryview = b""
+    # descargas: el archivo mapeado, el offset del próximo chunk y el final
+    # del rango a mandar
+    mapped: MappedFile | None = None
+    position: int = 0
+    end: int = 0
+    last_activity: float = 0.0
+    finished: bool = False
+    queue: asyncio.Queue[Package] = field(default_factory=asyncio.Queue)
+    task: asyncio.Task | None = None
+
+
+def partial_path(path: str) -> str:
+    # la subida se escribe acá y se renombra a path recién completa
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}{PARTIAL_SUFFIX}")
+
+
+def preallocate(fd: int, size: int) -> None:
+    # reserva todos los bloques de una vez en vez de hacer crecer el archivo
+    # de a un paquete; si el sistema de archivos no lo soporta queda disperso
+    os.ftruncate(fd, size)
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+
+
+def open_for_upload(
+    path: str, file_size: int = 0, shared: bool = False, keep: bool = False
+) -> IO[bytes] | None:
+    """
+    Abre path para escribirlo con un lock exclusivo (flock), que vale entre
+    procesos: con varios workers cada cliente puede caer en uno distinto.
+    Devuelve None si otro ya lo tiene abierto. Se trunca y se reserva
+    file_size bytes recién después de tomar el lock para no pisar una subida
+    en curso.
+
+    shared es para subir un rango del archivo: el lock es compartido con los
+    otros rangos. Con keep no se borra lo que ellos, o una subida anterior
+    que se retoma, ya escribieron.
+    """
+    # sin O_APPEND: con append pwrite ignora el offset
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    lock = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    try:
+        fcntl.flock(fd, lock | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    if not keep:
+        os.ftruncate(fd, 0)
+    preallocate(fd, file_size)
+    return os.fdopen(fd, "wb")
 
 
-class ServerRequestHandler:
+def client_key(addr: ADDR) -> str:
+    return f"{addr[0]}:{addr[1]}"
+
+
+class ServerRequestHandler(asyncio.DatagramProtocol):
     """
     Handles server requests and responses.
+
+    El socket de escucha solo recibe los Init: cada transferencia sigue por
+    un socket UDP conectado propio, con su cola, su corrutina y sus timers, y
+    el acceso a disco corre en el executor del loop, así una transferencia
+    lenta no frena a las demás. Lo que llega de una subida se encola en un
+    WriteBehind y se escribe en los hilos de self.writers.
     """
 
     def __init__(
-        self, server_storage: str, socket: Socket, protocol, logging_level=logging.DEBUG
+        self,
+        server_storage: str,
+        protocol,
+        logging_level=logging.DEBUG,
+        congestion_control: CongestionControl = CongestionControl.FIXED,
+        max_payload_size: int = MAX_PAYLOAD_SIZE,
     ) -> None:
         self.clients: dict[str, ClientInfo] = {}
-        self.retrys = 0
         self.server_storage = server_storage
-        self.socket = socket
+        self.transport: asyncio.DatagramTransport | None = None
+        self.socket: TransportSocket | None = None
         self.logger = create_logger(
             "request-handler", "[REQUEST HANDLER]", logging_level
         )
+        # un solo logger para los protocolos de todos los clientes
+        self.protocol_logger = create_logger(
+            "selective_repeat", "[SELECTIVE REPEAT]", logging_level
+        )
+        self.socket_logger = create_logger("socket", "[SOCKET]", logging_level)
         self.protocol = protocol
-        self.first_window_sent = False
+        self.congestion_control = congestion_control
+        self.max_payload_size = max_payload_size
+        self.closing = False
+        # un solo mapa por archivo para todas las descargas que lo piden
+        self.mappings = FileMappings()
+        # diccionario de zlib armado con los archivos chicos del storage
+        self.dictionaries = DictionaryStore(server_storage)
+        # las subidas se escriben en estos hilos, fuera del loop y sin que
+        # el cliente espere al disco para seguir recibiendo
+        self.writers = ThreadPoolExecutor(WRITER_THREADS, thread_name_prefix="writer")
+
+    # ---------------------------- DATAGRAM PROTOCOL ---------------------------- #
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+        self.fd = transport.get_extra_info("socket").fileno()
+        # los sockets de las transferencias se abren en la misma interfaz
+        self.host = transport.get_extra_info("sockname")[0]
+        self.recv_batch = self.send_batch = None
+        if HAVE_MMSG:
+            # entran los paquetes del payload más grande que se puede acordar
+            size = max(BUFSIZE, HEADER_SIZE + self.max_payload_size)
+            # y las sondas del path MTU, que el cliente arma sin saber cuánto
+            # acepta el servidor: una cortada no se podría confirmar
+            self.recv_batch = MessageBatch(
+                [
+                    memoryview(bytearray(HEADER_SIZE + MAX_PAYLOAD_SIZE))
+                    for _ in range(CLIENT_BATCH_SIZE)
+                ]
+            )
+            self.send_batch = MessageBatch(
+                [memoryview(bytearray(size)) for _ in range(SEND_BATCH_SIZE)]
+            )
+        self.socket = self._create_socket(transport)
+
+    def datagram_received(self, data: bytes, addr: ADDR) -> None:
+        # por el socket de escucha solo llegan handshakes
+        self._handle_datagram(data, addr)
+        for queued, sender in self._drain(self.fd):
+            self._handle_datagram(queued, sender)
+
+    def _drain(self, fd: int) -> list[tuple[bytes, ADDR]]:
+        # el transporte lee un datagrama por vuelta del loop; con recvmmsg se
+        # levanta de una vez todo lo que esté encolado detrás de ese
+        if self.recv_batch is None:
+            return []
+        try:
+            datagrams = self.recv_batch.recv(fd)
+        except OSError as e:
+            self.error_received(e)
+            return []
+        # los paquetes esperan en la cola del cliente: no pueden apuntar a
+        # un buffer que se reusa en la próxima lectura
+        return [
+            (bytes(self.recv_batch.buffers[index][:nbytes]), addr)
+            for index, nbytes, addr in datagrams
+        ]
+
+    def _handle_datagram(self, data: bytes, addr: ADDR) -> None:
+        try:
+            package = FactoryPackage.recover_package(data)
+        except (PackageErr, ChecksumErr) as e:
+            self.logger.error(f"Error in package: {e}")
+            return
+
+        self.handle_request((package, addr))
+
+    def _create_socket(self, transport: asyncio.DatagramTransport) -> TransportSocket:
+        return TransportSocket(
+            transport,
+            LoopScheduler(asyncio.get_running_loop()),
+            self.socket_logger,
+            self.send_batch,
+        )
+
+    def error_received(self, exc: Exception) -> None:
+        self.logger.error(f"Error receiving data: {exc}")
 
-    def handle_request(self, request: REQUEST):
+    async def close(self) -> None:
+        self.closing = True
+        tasks = [client.task for client in self.clients.values() if client.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.mappings.clear()
+        self.writers.shutdown()
+
+    # ---------------------------- CLIENTES ---------------------------- #
+
+    def handle_request(self, request: REQUEST) -> None:
         # self.logger.info(f"Handling request: {request}")
         package, addr = request
 
         if not package.valid:
             self.logger.error(f"Invalid package received: {package}")
-            return self.send_nack(addr, package.sequence_number)
-
-        addr_str = f"{addr[0]}:{addr[1]}"
-        if addr_str not in self.clients:
+            nack_package = AckPackage(package.sequence_number)
+            nack_package.valid = False
+            return self.socket.sendto(nack_package, addr)
+
+        if isinstance(package, ProbePackage):
+            # sonda del path MTU: se confirma sin estado, el seq_number es su tamaño
+            return self.socket.sendto(AckPackage(package.sequence_number), addr)
+
+        client_info = self.clients.get(client_key(addr))
+        if client_info is None:
+            if isinstance(package, FinPackage):
+                # FIN de un cliente que no pasó a su propio socket
+                return self.socket.sendto(AckPackage(FIN_ACK_SEQUENCE), addr)
             if not isinstance(package, InitPackage):
                 self.logger.error(
-                    f"Received unexpected package from {addr_str}: {package}"
+                    f"Received unexpected package from {client_key(addr)}: {package}"
                 )
                 return
+            client_info = self._register_client(package, addr)
+
+        self._enqueue(package, client_info)
+
+    def _enqueue(self, package: Package, client_info: ClientInfo) -> None:
+        client_info.last_activity = asyncio.get_running_loop().time()
+        client_info.queue.put_nowait(package)
+
+    def _register_client(self, package: InitPackage, addr: ADDR) -> ClientInfo:
+        client_info = ClientInfo(
+            addr=addr,
+            operation=package.operation,
+            last_package_type=PackageType.INIT,
+            filename=package.file_name,
+            client_protocol=package.protocol,
+            offset=package.offset,
+            length=package.length,
+            file_size=package.file_size,
+            resume=package.resume,
+            castagnoli=package.castagnoli and HAVE_CRC32C,
+            payload_size=min(
+                package.payload_size or PAYLOAD_SIZE, self.max_payload_size
+            ),
+            compression=package.compression,
+            compression_level=min(package.compression_level, MAX_COMPRESSION_LEVEL),
+            dictionary_id=package.dictionary_id,
+        )
 
-            protocol_handle = SelectiveRepeatProtocol(
-                socket=self.socket,
-                server_addr=addr,
-                window_size=5,
-                logging_level=self.logger.level,
+        self.clients[client_key(addr)] = client_info
+        client_info.task = asyncio.get_running_loop().create_task(
+            self._serve_client(client_info)
+        )
+        self.logger.info(
+            f"New client connected: {client_key(addr)} with operation {package.operation}"
+        )
+        return client_info
+
+    async def _open_transfer(self, client_info: ClientInfo) -> bool:
+        """
+        Abre un socket UDP conectado al cliente en un puerto efímero. La
+        respuesta al Init sale desde ahí y el cliente sigue la transferencia
+        contra ese puerto, así el de escucha solo atiende handshakes.
+        """
+        loop = asyncio.get_running_loop()
+        addr = client_info.addr
+        try:
+            transport, transfer = await loop.create_datagram_endpoint(
+                lambda: TransferProtocol(
+                    lambda data, _: self._handle_transfer_datagram(data, client_info),
+                    self._drain,
+                ),
+                local_addr=(self.host, 0),
+                remote_addr=addr,
+            )
+        except OSError as e:
+            self.logger.error(
+                f"No se pudo abrir el socket para {client_key(addr)}: {e}"
+            )
+            return False
+
+        client_info.transfer = transfer
+        set_transfer_buffers(transport.get_extra_info("socket"), TRANSFER_SOCKET_BUFFER)
+        socket = client_info.socket = self._create_socket(transport)
+        client_info.protocol = SelectiveRepeatProtocol(
+            socket=socket,
+            server_addr=addr,
+            window_size=INITIAL_WINDOW_SIZE,
+            logger=self.protocol_logger,
+            congestion_control=self.congestion_control,
+        )
+        client_info.protocol.castagnoli = client_info.castagnoli
+        client_info.protocol.payload_size = client_info.payload_size
+        client_info.protocol.compression = client_info.compression
+        client_info.protocol.compression_level = client_info.compression_level
+        if client_info.client_protocol == Protocol.SELECTIVE_REPEAT:
+            # con stop and wait los seq_number se alternan y la ventana es
+            # de un paquete: no hay nada que agrupar ni SACK que mandar
+            client_info.delayed_ack = DelayedAck(
+                lambda ack: socket.sendto(ack, addr),
+                socket.scheduler,
+                ("ack", addr),
             )
+        socket.scheduler.arm(
+            "idle", IDLE_TIMEOUT, lambda _: self._check_idle(client_info)
+        )
+        self.logger.debug(
+            f"Transferencia de {client_key(addr)} en el puerto {transport.get_extra_info('sockname')[1]}"
+        )
+        return True
 
-            full_path = os.path.join(self.server_storage, package.file_name)
-            if package.operation == "download" and not os.path.exists(full_path):
-                self.logger.error(
-                    f"Archivo no existe: {package.file_name} en {self.server_storage}"
-                )
-                self.send_fin(addr)
-                return
+    def _handle_transfer_datagram(self, data: bytes, client_info: ClientInfo) -> None:
+        try:
+            package = FactoryPackage.recover_package(data)
+        except (PackageErr, ChecksumErr) as e:
+            self.logger.error(f"Error in package: {e}")
+            return
 
-            self.clients[addr_str] = ClientInfo(
-                addr=addr,
-                operation=package.operation,
-                last_package_type=PackageType.INIT,
-                filename=package.file_name,
-                protocol=protocol_handle,
-            )
-            self.logger.info(
-                f"New client connected: {addr_str} with operation {package.operation}"
+        transfer = client_info.transfer
+        if transfer is not None and transfer.lingering:
+            # la transferencia terminó pero el cliente no recibió el ACK del FIN
+            if isinstance(package, FinPackage):
+                self._answer_fin(client_info)
+            return
+
+        if not package.valid:
+            self.logger.error(f"Invalid package received: {package}")
+            return self.send_nack(client_info, package.sequence_number)
+
+        self._enqueue(package, client_info)
+
+    async def _serve_client(self, client_info: ClientInfo) -> None:
+        try:
+            if not await self._open_transfer(client_info):
+                return
+            await self._choose_dictionary(client_info)
+            while not client_info.finished:
+                package = await client_info.queue.get()
+
+                # lo que ya está encolado se procesa en la misma vuelta
+                batch = [package]
+                while len(batch) < CLIENT_BATCH_SIZE and not client_info.queue.empty():
+                    batch.append(client_info.queue.get_nowait())
+
+                for package in batch:
+                    try:
+                        await self.handle_package(package, client_info)
+                    except (OSError, PackageErr, ChecksumErr, TimeoutError) as e:
+                        # un paquete que no se pudo atender no corta la
+                        # transferencia; un error de programación sí
+                        self.logger.error(f"Error atendiendo a {client_info.addr}: {e}")
+
+                await self._checkpoint(client_info)
+        finally:
+            await self._close_client(client_info)
+
+    async def _choose_dictionary(self, client_info: ClientInfo) -> None:
+        # la respuesta anuncia el diccionario vigente; se comprime contra él
+        # solo si es el mismo que ya tiene el cliente
+        if client_info.compression != Compression.ZLIB:
+            client_info.dictionary_id = 0
+            return
+        offered = client_info.dictionary_id
+        try:
+            identifier, dictionary = await self._run_io(self.dictionaries.current)
+        except OSError as e:
+            self.logger.error(f"No se pudo armar el diccionario: {e}")
+            identifier, dictionary = 0, None
+        client_info.dictionary_id = identifier
+        if identifier and identifier == offered:
+            client_info.protocol.dictionary = dictionary
+
+    def _check_idle(self, client_info: ClientInfo) -> None:
+        # un único timer por cliente en vez de un timeout por paquete recibido
+        idle = asyncio.get_running_loop().time() - client_info.last_activity
+        if idle < IDLE_TIMEOUT:
+            client_info.socket.scheduler.arm(
+                "idle", IDLE_TIMEOUT - idle, lambda _: self._check_idle(client_info)
             )
+            return
+
+        self.logger.warning(
+            f"Cliente {client_key(client_info.addr)} inactivo, se descarta la transferencia"
+        )
+        client_info.task.cancel()
+
+    async def _close_client(self, client_info: ClientInfo) -> None:
+        if client_info.socket:
+            client_info.socket.close()
+        self.clients.pop(client_key(client_info.addr), None)
+        await self._close_file(client_info)
+        if client_info.mapped:
+            mapped, client_info.mapped = client_info.mapped, None
+            self.mappings.release(mapped)
+        if client_info.transfer:
+            if self.closing:
+                client_info.transfer.close()
+            else:
+                client_info.transfer.linger(TRANSFER_LINGER)
 
-        client_info = self.clients[addr_str]
+    async def _close_file(
+        self, client_info: ClientInfo, complete: bool = False
+    ) -> None:
+        if client_info.file and client_info.operation == "upload":
+            # una subida cortada deja anotado hasta dónde llegó
+            await self._save_progress(client_info, complete)
+        if client_info.file:
+            file, client_info.file = client_info.file, None
+            await self._run_io(file.close)
 
+    async def _run_io(self, function: Callable[..., Any], *args: Any) -> Any:
+        # open, read, write y close bloquean: se hacen fuera del loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, function, *args)
+
+    async def handle_package(self, package: Package, client_info: ClientInfo) -> None:
         if isinstance(package, InitPackage):
-            self.send_init_response(client_info)
+            await self.handle_init_request(client_info)
         elif isinstance(package, DataPackage):
-            self.handle_upload_request(package, client_info)
+            await self.handle_upload_request(package, client_info)
         elif isinstance(package, AckPackage):
             if client_info.operation == "download":
-                try:
-                    self.handle_download_request(package, client_info)
-                except TimeoutError:
-                    self.handle_finish_request(client_info)
+                await self.handle_download_request(package, client_info)
             else:
                 self.logger.info(
                     "[REQUEST HANDLER] Unexpected ACK during upload (ignored)"
                 )
         elif isinstance(package, FinPackage):
-            self.handle_finish_request(client_info)
+            await self.handle_finish_request(package, client_info)
         else:
             self.logger.error(
-                f"Unknown package type for client {addr_str}: {client_info.last_package_type}"
+                f"Unknown package type for client {client_key(client_info.addr)}: {client_info.last_package_type}"
             )
 
-    def handle_upload_request(self, package: DataPackage, client_info: ClientInfo):
+    async def handle_init_request(self, client_info: ClientInfo) -> None:
+        full_path = os.path.join(self.server_storage, client_info.filename)
+        if client_info.operation == "download" and client_info.mapped is None:
+            if not await self._open_mapped(full_path, client_info):
+                self.send_fin(client_info)
+                client_info.finished = True
+                return
+            if client_info.protocol.compressing():
+                client_info.encoder = FrameEncoder(
+                    lambda size: self._read_mapped(client_info, size),
+                    client_info.compression,
+                    client_info.compression_level,
+                    client_info.protocol.digest,
+                    dictionary=client_info.protocol.dictionary,
+                )
+
+        if client_info.operation == "upload" and client_info.file is None:
+            ranged = client_info.length > 0
+            end = client_info.offset + client_info.length
+            if not ranged:
+                end = client_info.file_size
+            journal = client_info.journal = TransferJournal(full_path)
+            client_info.journal_time = asyncio.get_running_loop().time()
+            if client_info.resume:
+                client_info.offset = await self._run_io(
+                    journal.resume_offset,
+                    client_info.file_size,
+                    client_info.offset,
+                    end,
+                )
+            else:
+                # una subida nueva no suma sus rangos a los de un journal
+                # viejo; en una en paralelo solo el primer rango llega sin
+                # resume, los demás lo hacen después de este reset
+                await self._run_io(journal.discard)
+            # desde acá length es lo que falta del rango, que puede ser nada
+            client_info.length = end - client_info.offset
+
+            # se trunca solo una subida entera que arranca de cero
+            keep = ranged or client_info.offset > 0
+            client_info.target = full_path
+            file = await self._run_io(
+                open_for_upload,
+                partial_path(full_path),
+                client_info.file_size,
+                ranged,
+                keep,
+            )
+            if file is None:
+                # otro cliente, en este u otro worker, está subiendo el mismo archivo
+                self.logger.error(
+                    f"Archivo en uso: {client_info.filename}, se rechaza a {client_info.addr}"
+                )
+                self.send_fin(client_info)
+                client_info.finished = True
+                return
+            client_info.file = file
+            client_info.decoder = client_info.protocol.create_decoder()
+            loop = asyncio.get_running_loop()
+            client_info.writer = WriteBehind(
+                file.fileno(),
+                self.writers,
+                # avisa desde el hilo del writer: el ACK sale desde el loop
+                on_drain=lambda: loop.call_soon_threadsafe(
+                    self._window_opened, client_info
+                ),
+            )
+            if client_info.delayed_ack is not None:
+                # no se aceptan más paquetes de los que entran en el buffer
+                # del socket de la transferencia
+                capacity = datagrams_in_buffer(
+                    client_info.transfer.transport.get_extra_info("socket"),
+                    HEADER_SIZE + client_info.payload_size,
+                )
+                client_info.reorder_buffer = ReorderBuffer(
+                    file,
+                    client_info.payload_size,
+                    min(REORDER_BUFFER_SIZE, capacity),
+                    offset=client_info.offset,
+                    writer=client_info.writer,
+                    digest=client_info.protocol.digest,
+                    decoder=client_info.decoder,
+                )
+                client_info.delayed_ack.window = client_info.reorder_buffer.window
+
+        self.send_init_response(client_info)
+
+    async def handle_upload_request(
+        self, package: DataPackage, client_info: ClientInfo
+    ) -> None:
         if not package.valid:
-            self.send_nack(client_info.addr, int(package.sequence_number))
+            self.send_nack(client_info, int(package.sequence_number))
             return
 
         if client_info.file is None:
-            file = open(f"{self.server_storage}/{client_info.filename}", "ab+")
-            client_info.file = file
-        else:
-            file = client_info.file
-
-        file.write(package.data)
+            self.logger.error(f"Datos sin Init previo de {client_info.addr}")
+            return
 
-        self.logger.debug(f"File written successfully from {client_info.addr}")
+        if client_info.delayed_ack is None:
+            # stop and wait: si se perdió el ACK llega de nuevo el mismo
+            # seq_number; se vuelve a confirmar pero no se escribe dos veces
+            if package.sequence_number == client_info.seq_number:
+                if client_info.decoder is None:
+                    self._store_chunk(client_info, package.data)
+                else:
+                    # descomprimir lleva su tiempo: se hace fuera del loop
+                    await self._run_io(self._store_chunk, client_info, package.data)
+                client_info.seq_number ^= 1
+            self.send_ack(client_info, int(package.sequence_number))
+            return
 
-        self.send_ack(client_info.addr, int(package.sequence_number))
+        reorder_buffer = client_info.reorder_buffer
+        if not reorder_buffer.accepts(package.sequence_number):
+            self.logger.debug(
+                f"Paquete {package.sequence_number} fuera del buffer de {client_info.addr}"
+            )
+            return
 
-    def handle_download_request(self, package: AckPackage, client_info: ClientInfo):
-        if self.protocol.value == Protocol.STOP_WAIT.value:
-            self.handle_download_request_stopnwait(package, client_info)
-        elif self.protocol.value == Protocol.SELECTIVE_REPEAT.value:
-            if not self.first_window_sent:
-                self.first_window_sent = True
-                self._send_first_window(client_info)
-                return
+        # se encola antes de confirmar: el ACK anuncia la ventana ya sin
+        # el lugar que ocupa este paquete
+        if reorder_buffer.decoder is None:
+            reorder_buffer.add(package.sequence_number, package.data)
+        else:
+            # completar el orden puede descomprimir varios paquetes: fuera del loop
+            await self._run_io(
+                reorder_buffer.add, package.sequence_number, package.data
+            )
+        client_info.delayed_ack.on_packet(package.sequence_number)
+
+    @staticmethod
+    def _store_chunk(client_info: ClientInfo, data: bytes | memoryview) -> None:
+        # lo que trae el próximo paquete de una subida stop and wait
+        if client_info.decoder is not None:
+            data = client_info.decoder.feed(data)
+        if data:
+            position = client_info.offset + client_info.bytes_written
+            client_info.writer.write(position, data)
+            client_info.protocol.digest.update(data)
+            client_info.bytes_written += len(data)
+
+    def _window_opened(self, client_info: ClientInfo) -> None:
+        # el writer liberó lugar: se avisa sin esperar a que el emisor sondee
+        if not client_info.finished and client_info.delayed_ack is not None:
+            client_info.delayed_ack.send_window()
+
+    async def _checkpoint(self, client_info: ClientInfo) -> None:
+        # cada tanto una subida anota en el journal hasta dónde llegó
+        if client_info.journal is None:
+            return
+        now = asyncio.get_running_loop().time()
+        if now - client_info.journal_time >= JOURNAL_INTERVAL:
+            client_info.journal_time = now
+            await self._save_progress(client_info)
 
-            self.handle_download_request_selectiverepeat(package, client_info)
+    async def _save_progress(
+        self, client_info: ClientInfo, complete: bool = False
+    ) -> None:
+        if await self._run_io(self._record_progress, client_info, complete):
+            # los que bajen el archivo de ahora en más tienen que ver este
+            self.mappings.invalidate(client_info.target)
+            self.logger.info(f"Archivo {client_info.filename} completo")
+
+    @staticmethod
+    def _record_progress(client_info: ClientInfo, complete: bool) -> bool:
+        """
+        Anota en el journal lo escrito. Si con eso el archivo quedó completo
+        lo renombra a su nombre final y devuelve True.
+        """
+        if client_info.file is None:
+            return False
+        written = client_info.length
+        if not complete:
+            if client_info.reorder_buffer is not None:
+                written = client_info.reorder_buffer.contiguous_bytes()
+            else:
+                written = client_info.bytes_written
+        # lo contado hasta acá ya está encolado: alcanza con esperar al writer
+        if client_info.writer is not None:
+            client_info.writer.flush()
+        if client_info.journal is None:
+            return False
+        if not complete and written >= client_info.length:
+            # lo que termina el rango se anota recién con el FIN, después de
+            # comparar el digest: antes no se puede publicar el archivo
+            return False
+        # lo que anota el journal, o lo que se renombra, tiene que estar en disco
+        client_info.file.flush()
+        os.fdatasync(client_info.file.fileno())
+        start = client_info.offset
+        end = start + min(written, client_info.length)
+        if not client_info.journal.record(client_info.file_size, start, end):
+            return False
+        # rename es atómico: quien abra el archivo ve la versión anterior
+        # entera o esta entera, nunca una a medio escribir
+        client_info.journal = None
+        os.replace(partial_path(client_info.target), client_info.target)
+        return True
+
+    async def handle_download_request(
+        self, package: AckPackage, client_info: ClientInfo
+    ) -> None:
+        # se baja con el protocolo que pidió el cliente, como en las subidas
+        protocol = client_info.client_protocol
+        if package.sequence_number == START_ACK_SEQUENCE:
+            # solo el primero arranca la bajada, los reenviados se ignoran
+            if not client_info.first_window_sent:
+                await self._send_first_window(client_info)
+        elif not client_info.first_window_sent:
+            return
+        elif protocol == Protocol.STOP_WAIT:
+            await self.handle_download_request_stopnwait(package, client_info)
+        elif protocol == Protocol.SELECTIVE_REPEAT:
+            await self.handle_download_request_selectiverepeat(package, client_info)
         else:
-            self.logger.error(f"Unknown protocol: {self.protocol}")
+            self.logger.error(f"Unknown protocol: {protocol}")
 
-    def handle_download_request_stopnwait(
+    async def handle_download_request_stopnwait(
         self, package: AckPackage, client_info: ClientInfo
-    ):  ## manejo
-        if self.retrys == 5:
-            self.send_fin(client_info.addr)
+    ) -> None:  ## manejo
+        if client_info.retrys == 5:
+            self.send_fin(client_info)
             return
 
         if package.valid:
-            if client_info.file is None:
-                try:
-                    file = open(f"{self.server_storage}/{client_info.filename}", "rb+")
-                    client_info.file = file
-                except FileNotFoundError:
-                    self.logger.error(
-                        f"File not found: {client_info.filename} for {client_info.addr}"
-                    )
-                    self.send_fin(client_info.addr)
-                    return
-            else:
-                file = client_info.file
+            if client_info.mapped is None:
+                return
 
-            chunk = file.read(BUFSIZE - 50)
-            self.last_chunk = chunk
-            self.retrys = 0
+            chunks = await self._read_chunks(client_info, 1)
+            chunk = chunks[0] if chunks else b""
+            client_info.last_chunk = chunk
+            client_info.retrys = 0
             if not chunk:
                 self.logger.info(f"File transfer finished for {client_info.addr}")
-                self.send_fin(client_info.addr)
+                self.send_fin(client_info, client_info.protocol.digest.digest())
                 return
+            if client_info.encoder is None:
+                client_info.protocol.digest.update(chunk)
 
         else:
-            print(f"reintentando paquete,try {self.retrys}")
-            chunk = self.last_chunk
-            self.retrys += 1
-
-        data_package = DataPackage(chunk, client_info.seq_number)
-        self.socket.sendto(data_package, client_info.addr)
+            self.logger.debug(f"Reenviando paquete, intento {client_info.retrys}")
+            chunk = client_info.last_chunk
+            client_info.retrys += 1
 
-    def send_init_response(self, client_info: ClientInfo):
-        self.send_ack(client_info.addr)
+        data_package = DataPackage(
+            chunk, client_info.seq_number, client_info.castagnoli
+        )
+        client_info.socket.sendto(data_package, client_info.addr)
+
+    def send_init_response(self, client_info: ClientInfo) -> None:
+        if client_info.operation == "upload":
+            # el cliente sigue desde el offset de la respuesta: si se retoma
+            # una subida es donde quedó
+            response = UploadHeader(
+                client_info.filename,
+                client_info.client_protocol,
+                client_info.offset,
+                client_info.length,
+                client_info.file_size,
+                castagnoli=client_info.castagnoli,
+                payload_size=client_info.payload_size,
+                compression=client_info.compression,
+                compression_level=client_info.compression_level,
+                dictionary_id=client_info.dictionary_id,
+            )
+        else:
+            response = DownloadHeader(
+                client_info.filename,
+                client_info.client_protocol,
+                client_info.offset,
+                client_info.length,
+                client_info.file_size,
+                client_info.castagnoli,
+                client_info.payload_size,
+                client_info.compression,
+                client_info.compression_level,
+                client_info.dictionary_id,
+            )
+        client_info.socket.sendto(response, client_info.addr)
 
-    def handle_finish_request(self, client_info: ClientInfo):
+    async def handle_finish_request(
+        self, package: FinPackage, client_info: ClientInfo
+    ) -> None:
         self.logger.warning(f"File transfer finished from {client_info.addr}")
-        self.send_ack(client_info.addr)
-
-        if client_info.file:
-            client_info.file.close()
-            client_info.file = None
+        if client_info.delayed_ack:
+            client_info.delayed_ack.cancel()
+        if client_info.operation == "upload" and client_info.file is not None:
+            if package.digest != client_info.protocol.digest.digest():
+                await self._discard_upload(client_info)
+            # el ACK del FIN confirma que todo lo recibido ya está en el
+            # archivo, incluido lo que quedaba en el buffer de python
+            await self._close_file(client_info, complete=not client_info.corrupt)
+        self._answer_fin(client_info)
+        client_info.finished = True
+
+    async def _discard_upload(self, client_info: ClientInfo) -> None:
+        self.logger.error(
+            f"{client_info.filename} de {client_key(client_info.addr)} no coincide con su digest"
+        )
+        client_info.corrupt = True
+        # lo anotado del rango durante la transferencia tampoco vale: al
+        # retomar se vuelve a mandar entero
+        journal, client_info.journal = client_info.journal, None
+        if journal is not None:
+            await self._run_io(
+                journal.forget,
+                client_info.file_size,
+                client_info.offset,
+                client_info.offset + client_info.length,
+            )
 
-        del self.clients[f"{client_info.addr[0]}:{client_info.addr[1]}"]
+    def _answer_fin(self, client_info: ClientInfo) -> None:
+        # una subida corrupta se rechaza con otro FIN en vez de confirmarla
+        if client_info.corrupt:
+            self.send_fin(client_info)
+        else:
+            self.send_ack(client_info, FIN_ACK_SEQUENCE)
 
-    def send_ack(self, addr: ADDR, seq_num: int = 0):
+    def send_ack(self, client_info: ClientInfo, seq_num: int = 0) -> None:
+        # sale por el socket de la transferencia, no por el de escucha
         ack_package = AckPackage(seq_num)
-        self.socket.sendto(ack_package, addr)
-        # self.logger.info(f"ACK sent to {addr} with seq_num {seq_num}")
+        client_info.socket.sendto(ack_package, client_info.addr)
 
-    def send_nack(self, addr: ADDR, seq_num: int = 0):
+    def send_nack(self, client_info: ClientInfo, seq_num: int = 0) -> None:
         nack_package = AckPackage(seq_num)
         nack_package.valid = False
-        self.socket.sendto(nack_package, addr)
-        self.logger.info(f"NACK sent to {addr}")
+        client_info.socket.sendto(nack_package, client_info.addr)
+        self.logger.info(f"NACK sent to {client_info.addr}")
 
-    def send_fin(self, addr: ADDR):
-        fin_package = FinPackage()
-        self.socket.sendto(fin_package, addr)
-        self.logger.info(f"FIN sent to {addr}")
+    def send_fin(self, client_info: ClientInfo, digest: bytes | None = None) -> None:
+        fin_package = FinPackage(digest)
+        client_info.socket.sendto(fin_package, client_info.addr)
+        self.logger.info(f"FIN sent to {client_info.addr}")
 
     # ---------------------------- SELECTIVE REPEAT  ---------------------------- #
-    def handle_download_request_selectiverepeat(
+    async def handle_download_request_selectiverepeat(
         self, package: AckPackage, client_info: ClientInfo
     ) -> None:
-        file = self._get_file_open(client_info)
-        if file is None:
+        if client_info.mapped is None:
             return
 
         # se chequea si ack esta dentro de la ventana, si no se ignora
         # ventana se avanza si el ack es el primero
-        if not client_info.protocol.ack_received(package.sequence_number):
+        if not client_info.protocol.process_ack(package):
+            if self._download_done(client_info):
+                # el FIN se perdió y el cliente sigue confirmando
+                self.send_fin(client_info, client_info.protocol.digest.digest())
             return
 
         self.logger.debug(
@@ -228,7 +876,7 @@ class ServerRequestHandler:
         if not package.valid:
             self.logger.warning(f"Llego un NAK: {package}")
             if not client_info.protocol.resend_package(package.sequence_number):
-                self.send_fin(client_info.addr)
+                self.send_fin(client_info)
             return
 
         # si el ack no es el primero de la ventana, no avanzo vntana pero mando chunk
@@ -237,46 +885,106 @@ class ServerRequestHandler:
                 f"Llego ACK {package.sequence_number} antes que ACK {client_info.protocol.first_sequence_number}"
             )
 
-        file = self._get_file_open(client_info)
-        if file is None:
-            return
+        await self._fill_window(client_info)
 
-        chunk = file.read(BUFSIZE - 50)
-        if not chunk:
-            self.logger.info(f"File transfer finished for {client_info.addr}")
-            self.send_fin(client_info.addr)
+    async def _open_mapped(self, path: str, client_info: ClientInfo) -> bool:
+        try:
+            key = file_key(await self._run_io(os.stat, path))
+            mapped = self.mappings.get(path, key)
+            if mapped is None:
+                mapped = self.mappings.add(await self._run_io(MappedFile, path))
+            self.logger.debug(
+                f"Mapas de archivos: {self.mappings.hits} hits, {self.mappings.misses} misses"
+            )
+        except FileNotFoundError:
+            self.logger.error(
+                f"Archivo no existe: {client_info.filename} en {self.server_storage}"
+            )
+            return False
+
+        client_info.mapped = mapped
+        # el tamaño viaja en la respuesta para que el cliente pueda repartir
+        # el archivo en rangos
+        client_info.file_size = mapped.size
+        client_info.position = min(client_info.offset, mapped.size)
+        client_info.end = mapped.size
+        if client_info.length:
+            client_info.end = min(client_info.offset + client_info.length, mapped.size)
+        return True
+
+    async def _send_first_window(self, client_info: ClientInfo) -> None:
+        if client_info.mapped is None:
             return
 
-        client_info.protocol.send_chunk(chunk)
-
-        #### FALTA BUFFEREAR EN CASO DE TIMEOUT ####
-        #### FALTA CHEQUEAR QUE LA VNTANA NO ESTA LLENA ####
+        client_info.first_window_sent = True
+        if client_info.client_protocol == Protocol.STOP_WAIT:
+            await self.handle_download_request_stopnwait(AckPackage(), client_info)
+        else:
+            await self._fill_window(client_info)
 
-    def _get_file_open(self, client_info: ClientInfo) -> Optional[IO[bytes]]:
-        if client_info.file is None:
-            try:
-                file = open(f"{self.server_storage}/{client_info.filename}", "rb+")
-                client_info.file = file
-            except FileNotFoundError:
-                self.logger.error(
-                    f"File not found: {client_info.filename} for {client_info.addr}"
-                )
-                self.send_fin(client_info.addr)
-                return None
-        return client_info.file
-
-    ### por ahora los mandamos, y asumimos que llegan
-    def _send_first_window(self, client_info: ClientInfo) -> None:
-        file = self._get_file_open(client_info)
-        if file is None:
-            return
+    async def _fill_window(self, client_info: ClientInfo) -> None:
+        # la ventana de congestión decide cuántos chunks nuevos se pueden mandar
+        space = client_info.protocol.window_space()
+        if space:
+            chunks = await self._read_chunks(client_info, space)
+            client_info.protocol.send_chunks(chunks)
 
-        for i in range(client_info.protocol.window.size):
-            chunk = file.read(BUFSIZE - 50)
+        # el FIN sale recién cuando el cliente confirmó todo lo enviado
+        if self._download_done(client_info):
+            self.logger.info(f"File transfer finished for {client_info.addr}")
+            self.send_fin(client_info, client_info.protocol.digest.digest())
+
+    async def _read_chunks(
+        self, client_info: ClientInfo, count: int
+    ) -> list[bytes | memoryview]:
+        if client_info.encoder is None:
+            return self._next_chunks(client_info, count)
+        # comprimir lleva su tiempo: se hace fuera del loop
+        return await self._run_io(self._next_frames, client_info, count)
+
+    @staticmethod
+    def _next_frames(client_info: ClientInfo, count: int) -> list[bytes]:
+        # los frames se arman a medida que se piden: reenviar uno usa la
+        # copia que guarda la ventana
+        chunks = []
+        while len(chunks) < count:
+            chunk = client_info.encoder.read(client_info.payload_size)
             if not chunk:
-                self.logger.info(f"File transfer finished for {client_info.addr}")
-                self.send_fin(client_info.addr)
-                return
-
-            client_info.protocol.send_chunk(chunk)
-        self.first_window_sent = True
+                break
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def _read_mapped(client_info: ClientInfo, size: int) -> memoryview:
+        # lo que lee el encoder de una descarga comprimida
+        chunk = client_info.mapped.chunk(client_info.position, client_info.end, size)
+        client_info.position += len(chunk)
+        return chunk
+
+    @staticmethod
+    def _next_chunks(client_info: ClientInfo, count: int) -> list[memoryview]:
+        # los chunks son vistas del mapa: reenviarlos no necesita releer nada
+        mapped, position, end, size = (
+            client_info.mapped,
+            client_info.position,
+            client_info.end,
+            client_info.payload_size,
+        )
+        chunks = []
+        while len(chunks) < count and position < end:
+            chunks.append(mapped.chunk(position, end, size))
+            position += size
+        if position // size % READ_AHEAD_CHUNKS < len(chunks):
+            # se cruzó un múltiplo de READ_AHEAD_CHUNKS: se piden las páginas
+            # del tramo que sigue
+            mapped.read_ahead(position, end, size)
+        client_info.position = position
+        return chunks
+
+    def _download_done(self, client_info: ClientInfo) -> bool:
+        encoder = client_info.encoder
+        return (
+            client_info.position >= client_info.end
+            and (encoder is None or encoder.exhausted())
+            and client_info.protocol.window.length() == 0
+        )
@@ -0,0 +1,48 @@
+import asyncio
+from collections.abc import Callable
+
+from lib.utils.types import ADDR
+
+
+class TransferProtocol(asyncio.DatagramProtocol):
+    """
+    Extremo del socket UDP conectado que atiende una sola transferencia. El
+    kernel ya filtra por dirección, así que todo lo que llega es del cliente
+    y se entrega sin buscarlo en ningún diccionario.
+
+    Terminada la transferencia el socket queda abierto un rato (linger) para
+    volver a confirmar un FIN cuyo ACK se haya perdido.
+    """
+
+    def __init__(
+        self,
+        on_datagram: Callable[[bytes, ADDR], None],
+        on_drain: Callable[[int], list[tuple[bytes, ADDR]]],
+    ) -> None:
+        self.on_datagram = on_datagram
+        self.on_drain = on_drain
+        self.transport: asyncio.DatagramTransport | None = None
+        self.fd = -1
+        self.lingering = False
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+        self.fd = transport.get_extra_info("socket").fileno()
+
+    def datagram_received(self, data: bytes, addr: ADDR) -> None:
+        self.on_datagram(data, addr)
+        for queued, sender in self.on_drain(self.fd):
+            self.on_datagram(queued, sender)
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP de puerto inalcanzable: el cliente ya cerró su socket
+        pass
+
+    def linger(self, timeout: float) -> None:
+        self.lingering = True
+        asyncio.get_running_loop().call_later(timeout, self.close)
+
+    def close(self) -> None:
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
@@ -1,6 +1,6 @@
 """
 python start - server -h
-usage : start - server [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - s DIRPATH ] [ - r protocol ]
+usage : start - server [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - s DIRPATH ] [ - r protocol ] [ - c congestion ] [ - w WORKERS ] [ - P BYTES ]
 < command description >
 optional arguments :
 -h , -- help show this help message and exit
@@ -10,12 +10,20 @@ optional arguments :
 -p , -- port service port
 -s , -- storage storage dir path
 -r , -- protocol error recovery protocol
+-c , -- congestion congestion control algorithm
+-w , -- workers number of server processes
+-P , -- payload-size largest payload per packet a client can negotiate
 """
 
 from argparse import ArgumentParser
-from lib.utils.enums import Protocol
+from lib.utils.enums import CongestionControl, Protocol
 
-from lib.utils.constants import DEFAULT_PORT, LOCALHOST, SERVER_STORAGE
+from lib.utils.constants import (
+    DEFAULT_PORT,
+    LOCALHOST,
+    MAX_PAYLOAD_SIZE,
+    SERVER_STORAGE,
+)
 
 parser = ArgumentParser(
     description="Start a server to receive files using a specified protocol."
@@ -47,3 +55,25 @@ parser.add_argument(
     type=int,
     help="error recovery protocol",
 )
+parser.add_argument(
+    "-c",
+    "--congestion",
+    type=str,
+    choices=[control.name.lower() for control in CongestionControl],
+    default=CongestionControl.FIXED.name.lower(),
+    help="congestion control algorithm",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    default=1,
+    help="number of server processes",
+)
+parser.add_argument(
+    "-P",
+    "--payload-size",
+    type=int,
+    default=MAX_PAYLOAD_SIZE,
+    help="largest payload per packet a client can negotiate",
+)
@@ -1,10 +1,15 @@
 from argparse import ArgumentParser
 
-from lib.utils.constants import CLIENT_STORAGE, DEFAULT_PORT, LOCALHOST
-from lib.utils.enums import Protocol
+from lib.utils.constants import (
+    CLIENT_STORAGE,
+    DEFAULT_PORT,
+    LOCALHOST,
+    MAX_PAYLOAD_SIZE,
+)
+from lib.utils.enums import CongestionControl, Compression, Protocol
 
 """
-usage : upload [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - s FILEPATH ] [ - n FILENAME ] [ - r protocol ]
+usage : upload [ - h ] [ - v | -q ] [ - H ADDR ] [ - p PORT ] [ - s FILEPATH ] [ - n FILENAME ] [ - r protocol ] [ - c congestion ] [ - t streams ] [ - R ] [ - P BYTES ] [ - z compression ] [ - L LEVEL ]
 <command description>
 optional arguments :
 -h , -- help show this help message and exit
@@ -15,6 +20,12 @@ optional arguments :
 -s , -- src source file path
 -n , -- name file name
 -r , -- protocol error recovery protocol
+-c , -- congestion congestion control algorithm
+-t , -- streams parallel transfers over byte ranges
+-R , -- resume continue an interrupted transfer
+-P , -- payload-size largest payload per packet, probed against the path MTU
+-z , -- compression compress the file data on the wire
+-L , -- level compression level, the codec default if not given
 
 """
 
@@ -41,3 +52,48 @@ parser.add_argument(
     type=int,
     default=Protocol.STOP_WAIT.value,
 )
+parser.add_argument(
+    "-c",
+    "--congestion",
+    type=str,
+    choices=[control.name.lower() for control in CongestionControl],
+    default=CongestionControl.FIXED.name.lower(),
+    help="congestion control algorithm",
+)
+parser.add_argument(
+    "-t",
+    "--streams",
+    type=int,
+    default=1,
+    help="parallel transfers, each over a byte range of the file",
+)
+parser.add_argument(
+    "-R",
+    "--resume",
+    action="store_true",
+    default=False,
+    help="continue an interrupted transfer where it left off",
+)
+parser.add_argument(
+    "-P",
+    "--payload-size",
+    type=int,
+    default=MAX_PAYLOAD_SIZE,
+    help="largest payload per packet, probed against the path MTU",
+)
+parser.add_argument(
+    "-z",
+    "--compression",
+    type=str,
+    choices=[compression.name.lower() for compression in Compression],
+    default=Compression.NONE.name.lower(),
+    help="compress the file data on the wire",
+)
+parser.add_argument(
+    "-L",
+    "--level",
+    type=int,
+    choices=range(10),
+    default=None,
+    help="compression level, the codec default if not given",
+)
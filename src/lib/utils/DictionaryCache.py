@@ -0,0 +1,60 @@
+import os
+
+from lib.protocols.compression import dictionary_id, dictionary_name
+from lib.utils.constants import DICTIONARY_PREFIX
+from lib.utils.types import ADDR
+
+
+class DictionaryCache:
+    """
+    Diccionarios de compresión bajados de un servidor, uno por servidor en
+    directory/host_port. El nombre lleva el id que anunció el servidor y el
+    id sale del contenido, así que uno que no coincide con su nombre no
+    se usa.
+    """
+
+    def __init__(self, directory: str, server_addr: ADDR) -> None:
+        host, port = server_addr
+        self.directory = os.path.join(directory, f"{host}_{port}")
+
+    def load(self) -> bytes | None:
+        for name in self._names():
+            try:
+                with open(os.path.join(self.directory, name), "rb") as file:
+                    dictionary = file.read()
+            except OSError:
+                continue
+            if dictionary_name(dictionary_id(dictionary)) == name:
+                return dictionary
+        return None
+
+    def path(self, identifier: int) -> str:
+        # donde se baja el diccionario identifier
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, dictionary_name(identifier))
+
+    def keep(self, identifier: int) -> bool:
+        """
+        Se queda con el diccionario identifier, ya bajado, y borra los
+        demás. False si lo bajado no es ese diccionario.
+        """
+        name = dictionary_name(identifier)
+        for other in self._names():
+            if other != name:
+                os.unlink(os.path.join(self.directory, other))
+        if self.load() is not None:
+            return True
+        try:
+            os.unlink(self.path(identifier))
+        except FileNotFoundError:
+            pass
+        return False
+
+    def _names(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            name
+            for name in os.listdir(self.directory)
+            if name.startswith(DICTIONARY_PREFIX)
+        ]
@@ -0,0 +1,20 @@
+from typing import IO
+
+
+class FileRange:
+    """
+    Lectura de length bytes de file a partir de offset. read devuelve b"" al
+    llegar al final del rango, así los protocolos lo usan como un archivo más.
+    """
+
+    def __init__(self, file: IO[bytes], offset: int, length: int) -> None:
+        file.seek(offset)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
@@ -0,0 +1,48 @@
+import asyncio
+from collections.abc import Callable, Hashable
+
+
+class LoopScheduler:
+    """
+    Misma interfaz que RetransmissionScheduler pero sobre los timers del event
+    loop de asyncio: los callbacks corren en el thread del loop, así que no
+    compiten con la corrutina del cliente por su estado. Solo se puede usar
+    desde el thread del loop.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+
+    def arm(
+        self, key: Hashable, timeout: float, callback: Callable[[Hashable], None]
+    ) -> None:
+        """Programa callback(key) dentro de timeout segundos, reemplazando el timer previo de key."""
+        self.cancel(key)
+        self._timers[key] = self.loop.call_later(timeout, self._fire, key, callback)
+
+    def cancel(self, key: Hashable) -> bool:
+        handle = self._timers.pop(key, None)
+        if handle is None:
+            return False
+        handle.cancel()
+        return True
+
+    def is_armed(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def pending(self) -> int:
+        return len(self._timers)
+
+    def stop(self) -> None:
+        for handle in self._timers.values():
+            handle.cancel()
+        self._timers.clear()
+
+    def _fire(self, key: Hashable, callback: Callable[[Hashable], None]) -> None:
+        self._timers.pop(key, None)
+        try:
+            callback(key)
+        except OSError:
+            # el transporte se cerró con un timer en curso; no hay a quién avisar
+            pass
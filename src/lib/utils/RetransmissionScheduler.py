@@ -0,0 +1,107 @@
+import heapq
+import itertools
+import time
+from threading import Condition, Thread
+from collections.abc import Callable, Hashable
+
+
+class RetransmissionScheduler:
+    """
+    Cola de deadlines compartida por todos los paquetes en vuelo de un socket.
+
+    Un unico thread duerme hasta el deadline mas proximo y ejecuta el callback
+    de los timers vencidos. arm es O(log n) y cancel es O(1): los timers
+    cancelados quedan en el heap y se descartan cuando llegan al tope.
+    """
+
+    def __init__(self, name: str = "RetransmissionScheduler") -> None:
+        self.name = name
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._timers: dict[Hashable, tuple[int, Callable[[Hashable], None]]] = {}
+        self._tokens = itertools.count()
+        self._condition = Condition()
+        self._thread: Thread | None = None
+        self._running = False
+
+    def arm(
+        self, key: Hashable, timeout: float, callback: Callable[[Hashable], None]
+    ) -> None:
+        """Programa callback(key) dentro de timeout segundos, reemplazando el timer previo de key."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            token = next(self._tokens)
+            self._timers[key] = (token, callback)
+            heapq.heappush(self._heap, (deadline, token, key))
+            self._compact()
+
+            self._running = True
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            elif self._heap[0][1] == token:
+                # el nuevo timer es el mas proximo, hay que despertar al thread
+                self._condition.notify()
+
+    def cancel(self, key: Hashable) -> bool:
+        with self._condition:
+            return self._timers.pop(key, None) is not None
+
+    def is_armed(self, key: Hashable) -> bool:
+        return key in self._timers
+
+    def pending(self) -> int:
+        return len(self._timers)
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._timers.clear()
+            self._heap.clear()
+            self._condition.notify()
+
+    def _compact(self) -> None:
+        # evita que los timers cancelados hagan crecer el heap sin limite
+        if len(self._heap) > 2 * len(self._timers) + 64:
+            self._heap = [
+                entry
+                for entry in self._heap
+                if self._timers.get(entry[2], (None,))[0] == entry[1]
+            ]
+            heapq.heapify(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                callback, key = self._next_expired()
+                if callback is None:
+                    return
+
+            try:
+                callback(key)
+            except OSError:
+                # el socket se cerró con un timer en curso; no hay a quién avisar
+                continue
+
+    def _next_expired(self) -> tuple[Callable[[Hashable], None] | None, Hashable]:
+        # se llama con el lock tomado; bloquea hasta que vence un timer o stop
+        while self._running:
+            if not self._heap:
+                self._condition.wait()
+                continue
+
+            deadline, token, key = self._heap[0]
+            timer = self._timers.get(key)
+            if timer is None or timer[0] != token:
+                heapq.heappop(self._heap)
+                continue
+
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                self._condition.wait(remaining)
+                continue
+
+            heapq.heappop(self._heap)
+            del self._timers[key]
+            return timer[1], key
+
+        return None, None
@@ -1,18 +1,109 @@
+import errno
 import logging
-import random
 import socket
+import time
+from collections import deque
+from collections.abc import Callable
+from threading import Lock
 
-from lib.utils.constants import BUFSIZE
+from lib.utils.constants import (
+    BUFSIZE,
+    HANDSHAKE_RETRIES,
+    INITIAL_RTO,
+    MAX_DATAGRAM_SIZE,
+    MAX_PAYLOAD_SIZE,
+    PAYLOAD_SIZE,
+    PMTU_PROBE_MTUS,
+    PMTU_PROBE_RETRIES,
+    PMTU_PROBE_TIMEOUT,
+    RECV_BATCH_SIZE,
+    RECV_POOL_SIZE,
+    SEND_BATCH_SIZE,
+    TRANSFER_SOCKET_BUFFER,
+)
+from lib.utils.gso import (
+    GRO_BUFFER_SIZE,
+    GRO_CMSG_SPACE,
+    GSO_UNSUPPORTED,
+    HAVE_GSO,
+    enable_gro,
+    segment_groups,
+    send_segments,
+    split_segments,
+)
 from lib.utils.logger import create_logger
+from lib.utils.mmsg import HAVE_MMSG, MessageBatch
+from lib.utils.pmtu import (
+    datagrams_in_buffer,
+    payload_for_mtu,
+    set_dont_fragment,
+    set_transfer_buffers,
+)
+from lib.utils.RetransmissionScheduler import RetransmissionScheduler
+from lib.packages.AckPackage import AckPackage
+from lib.packages.DataPackage import DataPackage
+from lib.packages.Header import HEADER_SIZE
 from lib.packages.Package import Package
+from lib.packages.ProbePackage import ProbePackage
 from lib.packages.FactoryPackage import FactoryPackage
 from lib.utils.package_error import PackageErr, ChecksumErr
+from lib.utils.types import ADDR
 
 
 class Socket:
-    def __init__(self, logging_level=logging.DEBUG) -> None:
+    def __init__(
+        self, logging_level=logging.DEBUG, segment_offload: bool = True
+    ) -> None:
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        set_transfer_buffers(self.socket, TRANSFER_SOCKET_BUFFER)
         self.logger = create_logger("socket", "[SOCKET]", logging_level)
+        self.send_lock = Lock()
+
+        # GSO y GRO si el kernel los tiene (ver lib.utils.gso). Con GRO un
+        # recvmsg trae varios datagramas: los que no se devolvieron todavía
+        # esperan en received
+        self.gso = segment_offload and HAVE_GSO
+        self.gro = segment_offload and enable_gro(self.socket)
+        self.received: deque[tuple[memoryview, tuple[str, int]]] = deque()
+        self.set_payload_size(PAYLOAD_SIZE)
+
+        # Un unico scheduler de retransmisiones para todo lo que sale por el socket
+        self.scheduler = RetransmissionScheduler()
+
+    def set_payload_size(self, payload_size: int) -> None:
+        """Dimensiona los buffers para DataPackage de payload_size bytes."""
+        self.payload_size = payload_size
+        # los paquetes de control no cambian: nunca menos que BUFSIZE
+        self.buffer_size = max(BUFSIZE, HEADER_SIZE + payload_size)
+
+        # Buffers preasignados: los paquetes se codifican y decodifican sobre
+        # ellos sin copiar el payload. Los buffers de recepcion rotan, asi la
+        # vista que devuelve recv sigue valida durante las proximas
+        # RECV_POOL_SIZE - 1 lecturas; quien necesite guardarla mas tiempo
+        # tiene que copiarla. Con GRO cada buffer es de 64KB porque una
+        # lectura trae varios datagramas.
+        self.send_buffer = bytearray(self.buffer_size)
+        self.recv_buffer_size = GRO_BUFFER_SIZE if self.gro else self.buffer_size
+        self.recv_pool = [
+            memoryview(bytearray(self.recv_buffer_size)) for _ in range(RECV_POOL_SIZE)
+        ]
+        self.recv_index = 0
+        self.received.clear()
+        # un buffer GSO lleva varios DataPackage seguidos
+        self.gso_buffer = memoryview(bytearray(MAX_DATAGRAM_SIZE if self.gso else 0))
+
+        # send_many y recv_many usan sendmmsg/recvmmsg si el sistema los tiene
+        self.send_batch_buffers = [
+            memoryview(bytearray(self.buffer_size)) for _ in range(SEND_BATCH_SIZE)
+        ]
+        self.send_batch = self.recv_batch = None
+        if HAVE_MMSG:
+            self.send_batch = MessageBatch(self.send_batch_buffers)
+            self.recv_batch = MessageBatch(self.recv_pool)
+
+    def recv_capacity(self) -> int:
+        """Datagramas del tamaño acordado que entran en el buffer de recepción."""
+        return datagrams_in_buffer(self.socket, self.buffer_size)
 
     def bind(self, host: str, port: int) -> int:
         self.socket.bind((host, port))
@@ -22,17 +113,168 @@ class Socket:
 
     def sendto(self, package: Package, addr: tuple[str, int]) -> None:
         self.logger.debug(f"Sending data to {addr}")
-        self.socket.sendto(package.to_bytes(), addr)
+        with self.send_lock:
+            length = package.pack_into(self.send_buffer)
+            self.socket.sendto(memoryview(self.send_buffer)[:length], addr)
+
+    def send_many(self, packages: list[Package], addr: tuple[str, int]) -> None:
+        """
+        Manda todos los paquetes a addr. Con GSO los DataPackage del mismo
+        tamaño salen de a varios en un buffer; el resto de a SEND_BATCH_SIZE
+        por syscall.
+        """
+        self.logger.debug(f"Sending {len(packages)} packages to {addr}")
+        with self.send_lock:
+            if self.gso and all(isinstance(p, DataPackage) for p in packages):
+                self._send_segmented(packages, addr)
+            else:
+                self._send_batches(packages, addr)
+
+    def _send_segmented(self, packages: list[DataPackage], addr: ADDR) -> None:
+        lengths = [HEADER_SIZE + len(package.data) for package in packages]
+        alone: list[Package] = []
+        for start, count in segment_groups(lengths):
+            group = packages[start : start + count]
+            if count == 1 or not self.gso:
+                alone.extend(group)
+                continue
+            # lo que no entró en un grupo sale antes, para no desordenar
+            self._send_batches(alone, addr)
+            alone = []
+            length = 0
+            for package in group:
+                length += package.pack_into(self.gso_buffer[length:])
+            try:
+                send_segments(
+                    self.socket, self.gso_buffer[:length], lengths[start], addr
+                )
+            except OSError as e:
+                if e.errno not in GSO_UNSUPPORTED:
+                    raise
+                # la interfaz no segmenta (o el segmento no entra en su MTU)
+                self.logger.debug(f"Sin GSO hacia {addr}: {e}")
+                self.gso = False
+                alone.extend(group)
+        self._send_batches(alone, addr)
+
+    def _send_batches(self, packages: list[Package], addr: ADDR) -> None:
+        for start in range(0, len(packages), SEND_BATCH_SIZE):
+            batch = packages[start : start + SEND_BATCH_SIZE]
+            lengths = [
+                package.pack_into(buffer)
+                for package, buffer in zip(batch, self.send_batch_buffers)
+            ]
+            sent = 0
+            if self.send_batch is not None:
+                sent = self.send_batch.send(self.socket.fileno(), lengths, addr)
+            # sin sendmmsg, o si se llenó el buffer del socket, uno por uno
+            for buffer, length in zip(
+                self.send_batch_buffers[sent : len(lengths)], lengths[sent:]
+            ):
+                self.socket.sendto(buffer[:length], addr)
+
+    def recv_many(
+        self, max_packages: int = RECV_BATCH_SIZE
+    ) -> list[tuple[Package, tuple[str, int]]]:
+        """
+        Espera un paquete como recv y después junta, sin bloquear, los que ya
+        estén en el socket, hasta max_packages.
+        """
+        packages = [self.recv()]
+        max_packages = min(max_packages, RECV_BATCH_SIZE)
+
+        for data, addr in self._drain(max_packages - 1):
+            try:
+                packages.append((FactoryPackage.recover_package(data), addr))
+            except (PackageErr, ChecksumErr) as e:
+                self.logger.error(f"Error en el paquete recibido: {e}")
+        return packages
+
+    def _drain(self, count: int) -> list[tuple[memoryview, tuple[str, int]]]:
+        # solo lo que el kernel ya tiene encolado, sin esperar
+        if count <= 0:
+            return []
+        try:
+            if self.gro:
+                return self._drain_segments(count)
+            if self.recv_batch is not None:
+                start = self.recv_index
+                datagrams = self.recv_batch.recv(self.socket.fileno(), start, count)
+                self.recv_index = (start + len(datagrams)) % RECV_POOL_SIZE
+                return [(self.recv_pool[i][:n], addr) for i, n, addr in datagrams]
+            return self._drain_one_by_one(count)
+        except OSError as e:
+            # ya hay al menos un paquete para devolver; el error no se pierde
+            # porque recv lo vuelve a ver si el socket sigue roto
+            self.logger.debug(f"Error leyendo el lote: {e}")
+            return []
+
+    def _drain_one_by_one(self, count: int) -> list[tuple[memoryview, tuple[str, int]]]:
+        # con timeout python espera a que haya datos antes de leer
+        timeout = self.socket.gettimeout()
+        self.socket.setblocking(False)
+        datagrams = []
+        try:
+            for _ in range(count):
+                buffer = self._next_recv_buffer(self.buffer_size)
+                try:
+                    nbytes, addr = self.socket.recvfrom_into(buffer)
+                except BlockingIOError:
+                    break
+                datagrams.append((buffer[:nbytes], addr))
+        finally:
+            self.socket.settimeout(timeout)
+        return datagrams
 
-    def recv(self, bufsize=BUFSIZE) -> tuple[Package, tuple[str, int]]:
+    def _drain_segments(self, count: int) -> list[tuple[memoryview, tuple[str, int]]]:
+        # primero lo que quedó del último recvmsg, después lo que haya en el
+        # socket; lo que sobra de un recvmsg queda para la próxima
+        datagrams = []
+        while self.received and len(datagrams) < count:
+            datagrams.append(self.received.popleft())
+        if len(datagrams) == count:
+            return datagrams
+        timeout = self.socket.gettimeout()
+        self.socket.setblocking(False)
+        try:
+            while len(datagrams) < count:
+                try:
+                    segments = self._recv_segments()
+                except BlockingIOError:
+                    break
+                missing = count - len(datagrams)
+                datagrams.extend(segments[:missing])
+                self.received.extend(segments[missing:])
+        finally:
+            self.socket.settimeout(timeout)
+        return datagrams
+
+    def _recv_segments(self) -> list[tuple[memoryview, tuple[str, int]]]:
+        # un recvmsg con GRO: uno o varios datagramas del mismo emisor
+        buffer = self._next_recv_buffer(self.recv_buffer_size)
+        nbytes, ancdata, _, addr = self.socket.recvmsg_into([buffer], GRO_CMSG_SPACE)
+        return [(data, addr) for data in split_segments(buffer[:nbytes], ancdata)]
+
+    def _recv_datagram(self, bufsize: int) -> tuple[memoryview, tuple[str, int]]:
+        if self.received:
+            return self.received.popleft()
+        if self.gro and bufsize <= self.recv_buffer_size:
+            segments = self._recv_segments()
+            self.received.extend(segments[1:])
+            return segments[0]
+        buffer = self._next_recv_buffer(bufsize)
+        nbytes, addr = self.socket.recvfrom_into(buffer, bufsize)
+        return buffer[:nbytes], addr
+
+    def recv(self, bufsize: int | None = None) -> tuple[Package, tuple[str, int]]:
+        if bufsize is None:
+            bufsize = self.buffer_size
         self.logger.debug(f"Receiving data with buffer size {bufsize}")
         try:
-            received = self.socket.recvfrom(bufsize)
-            
-            package_raw = received[0]
-            package = FactoryPackage.recover_package(package_raw)
+            data, addr = self._recv_datagram(bufsize)
+            package = FactoryPackage.recover_package(data)
 
-            return (package, received[1])
+            return (package, addr)
         except (PackageErr, ChecksumErr, TimeoutError) as e:
             self.logger.error(f"Error en el paquete recibido: {e}")
             raise e
@@ -43,8 +285,129 @@ class Socket:
             self.logger.exception("Excepción inesperada en recv:")
             raise e
 
+    def request(
+        self,
+        package: Package,
+        addr: tuple[str, int],
+        accepts: Callable[[Package, ADDR], bool] | None = None,
+        timeout: float = INITIAL_RTO,
+        retries: int = HANDSHAKE_RETRIES,
+    ) -> tuple[Package, tuple[str, int]]:
+        """
+        Manda package y espera la respuesta, reenviándolo si no llega a tiempo.
+        accepts decide qué es una respuesta: lo demás, como un ACK atrasado
+        de una sonda o de los datos, se descarta y se sigue esperando.
+        """
+        previous_timeout = self.socket.gettimeout()
+        try:
+            for _ in range(retries):
+                self.sendto(package, addr)
+                deadline = time.monotonic() + timeout
+                try:
+                    while (remaining := deadline - time.monotonic()) > 0:
+                        self.socket.settimeout(remaining)
+                        try:
+                            reply, source = self.recv()
+                        except (PackageErr, ChecksumErr):
+                            continue
+                        if accepts is None or accepts(reply, source):
+                            return reply, source
+                        self.logger.debug(f"Se descarta {reply} de {source}")
+                except TimeoutError:
+                    continue
+                except ConnectionRefusedError:
+                    # todavía no hay nadie escuchando en addr
+                    time.sleep(timeout)
+            raise TimeoutError(f"Sin respuesta de {addr} tras {retries} intentos")
+        finally:
+            self.socket.settimeout(previous_timeout)
+
+    def probe_payload_size(
+        self, addr: tuple[str, int], max_payload_size: int = MAX_PAYLOAD_SIZE
+    ) -> int:
+        """
+        Sondea el path MTU hasta addr y devuelve el payload más grande, hasta
+        max_payload_size, que llega sin fragmentarse. Si ninguna sonda vuelve
+        se queda con PAYLOAD_SIZE, que se manda como siempre: fragmentado si
+        hace falta.
+        """
+        base = min(PAYLOAD_SIZE, max_payload_size)
+        candidates = sorted(
+            {
+                min(payload_for_mtu(mtu, self.socket.family), max_payload_size)
+                for mtu in PMTU_PROBE_MTUS
+            },
+            reverse=True,
+        )
+        candidates = [size for size in candidates if size > base]
+        if not candidates or not set_dont_fragment(self.socket, True):
+            return base
+
+        previous_timeout = self.socket.gettimeout()
+        self.settimeout(PMTU_PROBE_TIMEOUT)
+        try:
+            for size in candidates:
+                if self._probe(size, addr):
+                    self.logger.debug(f"Path MTU hasta {addr}: payload de {size}")
+                    return size
+            return base
+        finally:
+            # los ACKs de sondas reenviadas que ya llegaron no son la
+            # respuesta al Init que sigue
+            self.discard_pending()
+            self.socket.settimeout(previous_timeout)
+            set_dont_fragment(self.socket, False)
+
+    def discard_pending(self) -> None:
+        """Descarta los datagramas que esperan en el socket sin bloquear."""
+        self.received.clear()
+        previous_timeout = self.socket.gettimeout()
+        self.socket.setblocking(False)
+        try:
+            while True:
+                self.socket.recv(self.recv_buffer_size)
+        except OSError:
+            pass  # vacío, o un ICMP de una sonda que no llegó
+        finally:
+            self.socket.settimeout(previous_timeout)
+
+    @staticmethod
+    def resolve(addr: ADDR) -> ADDR:
+        """addr con el host como lo informa recvfrom, para comparar orígenes."""
+        return socket.gethostbyname(addr[0]), addr[1]
+
+    def _probe(self, size: int, addr: tuple[str, int]) -> bool:
+        raw = ProbePackage(size).to_bytes()
+        for _ in range(PMTU_PROBE_RETRIES):
+            # sin pasar por recv: que una sonda no vuelva no es un error
+            try:
+                self.socket.sendto(raw, addr)
+                data, _ = self._recv_datagram(self.buffer_size)
+                package = FactoryPackage.recover_package(data)
+            except OSError as e:
+                if e.errno == errno.EMSGSIZE:
+                    return False  # ni siquiera entra en la interfaz
+                if isinstance(e, TimeoutError):
+                    continue
+                return False  # nadie escucha: el Init lo va a reintentar
+            except (PackageErr, ChecksumErr):
+                continue
+            # el ACK de una sonda más grande que llegó tarde no cuenta
+            if isinstance(package, AckPackage) and package.sequence_number == size:
+                return True
+        return False
+
+    def _next_recv_buffer(self, bufsize: int) -> memoryview:
+        if bufsize > self.recv_buffer_size:
+            return memoryview(bytearray(bufsize))
+
+        buffer = self.recv_pool[self.recv_index]
+        self.recv_index = (self.recv_index + 1) % RECV_POOL_SIZE
+        return buffer
+
     def close(self) -> None:
         self.logger.debug("Closing socket")
+        self.scheduler.stop()
         self.socket.close()
 
     def settimeout(self, timeout: int) -> None:
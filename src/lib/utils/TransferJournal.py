@@ -0,0 +1,124 @@
+import fcntl
+import json
+import os
+from typing import IO
+
+from lib.utils.constants import JOURNAL_SUFFIX
+
+
+class TransferJournal:
+    """
+    Rangos de bytes de un archivo que ya están escritos en disco, guardados
+    junto al archivo (.nombre.journal) para retomar una transferencia cortada
+    en vez de empezarla de cero. Lo usan el servidor para las subidas y el
+    cliente para las bajadas.
+
+    Cada actualización lee, combina y reescribe el journal con un flock
+    tomado, así los rangos de una transferencia en paralelo, en hilos o
+    procesos distintos, no se pisan. Cuando los rangos cubren el archivo
+    entero el journal se borra.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        directory, name = os.path.split(file_path)
+        self.path = os.path.join(directory, f".{name}{JOURNAL_SUFFIX}")
+
+    def load(self) -> tuple[int, list[tuple[int, int]]] | None:
+        """Devuelve (file_size, rangos), o None si no hay journal válido."""
+        try:
+            with open(self.path, "rb") as file:
+                fcntl.flock(file, fcntl.LOCK_SH)
+                return self._parse(file.read())
+        except OSError:
+            return None
+
+    def resume_offset(self, file_size: int, offset: int, end: int) -> int:
+        """
+        Primer byte de [offset, end) que falta escribir. Si el journal es de
+        un archivo de otro tamaño no vale y se empieza desde offset.
+        """
+        journal = self.load()
+        if journal is None or journal[0] != file_size:
+            return offset
+        for start, stop in journal[1]:
+            if start <= offset < stop:
+                offset = stop
+        return min(offset, end)
+
+    def record(self, file_size: int, start: int, end: int) -> bool:
+        """
+        Agrega [start, end) a lo escrito. Devuelve True si con eso el archivo
+        quedó completo, en cuyo caso el journal ya no existe.
+        """
+        if start == 0 and end >= file_size:
+            self.discard()
+            return True
+        if start >= end:
+            return False
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            journal = self._parse(file.read())
+            ranges = []
+            if journal is not None and journal[0] == file_size:
+                ranges = journal[1]
+            ranges = self._merge(ranges + [(start, end)])
+
+            if ranges[0][0] == 0 and ranges[0][1] >= file_size:
+                os.unlink(self.path)
+                return True
+
+            self._write(file, file_size, ranges)
+        return False
+
+    def forget(self, file_size: int, start: int, end: int) -> None:
+        """Saca [start, end) de lo escrito: hay que volver a transferirlo."""
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            return
+        with os.fdopen(fd, "r+b") as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            journal = self._parse(file.read())
+            if journal is None or journal[0] != file_size:
+                return
+            ranges = []
+            for first, last in journal[1]:
+                if first < start:
+                    ranges.append((first, min(last, start)))
+                if last > end:
+                    ranges.append((max(first, end), last))
+            self._write(file, file_size, ranges)
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _write(file: IO[bytes], file_size: int, ranges: list[tuple[int, int]]) -> None:
+        file.seek(0)
+        file.truncate()
+        file.write(json.dumps({"file_size": file_size, "ranges": ranges}).encode())
+
+    @staticmethod
+    def _parse(raw: bytes) -> tuple[int, list[tuple[int, int]]] | None:
+        # un journal a medio escribir se ignora: a lo sumo se reenvía de más
+        try:
+            data = json.loads(raw)
+            ranges = [(int(start), int(end)) for start, end in data["ranges"]]
+            return int(data["file_size"]), ranges
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _merge(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        merged: list[tuple[int, int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
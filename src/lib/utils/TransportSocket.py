@@ -0,0 +1,55 @@
+import asyncio
+import logging
+
+from lib.packages.Package import Package
+from lib.utils.constants import SEND_BATCH_SIZE
+from lib.utils.logger import create_logger
+from lib.utils.LoopScheduler import LoopScheduler
+from lib.utils.mmsg import MessageBatch
+
+
+class TransportSocket:
+    """
+    Adapta un DatagramTransport de asyncio a la parte de Socket que usan los
+    protocolos (sendto y scheduler), para reusarlos del lado del servidor.
+    Varias instancias pueden compartir el transporte, cada una con sus timers.
+    """
+
+    def __init__(
+        self,
+        transport: asyncio.DatagramTransport,
+        scheduler: LoopScheduler,
+        logger: logging.Logger | None = None,
+        batch: MessageBatch | None = None,
+    ) -> None:
+        self.transport = transport
+        self.scheduler = scheduler
+        # buffers de sendmmsg, compartidos: todo corre en el thread del loop
+        self.batch = batch
+        self.fd = transport.get_extra_info("socket").fileno()
+        if logger is None:
+            logger = create_logger("socket", "[SOCKET]")
+        self.logger = logger
+
+    def sendto(self, package: Package, addr: tuple[str, int]) -> None:
+        self.logger.debug(f"Sending data to {addr}")
+        # el transporte puede encolar el datagrama, no sirve un buffer reusable
+        self.transport.sendto(package.to_bytes(), addr)
+
+    def send_many(self, packages: list[Package], addr: tuple[str, int]) -> None:
+        self.logger.debug(f"Sending {len(packages)} packages to {addr}")
+        for start in range(0, len(packages), SEND_BATCH_SIZE):
+            batch = packages[start : start + SEND_BATCH_SIZE]
+            sent = 0
+            # si el transporte tiene datagramas encolados, estos van detrás
+            if self.batch is not None and not self.transport.get_write_buffer_size():
+                lengths = [
+                    package.pack_into(buffer)
+                    for package, buffer in zip(batch, self.batch.buffers)
+                ]
+                sent = self.batch.send(self.fd, lengths, addr)
+            for package in batch[sent:]:
+                self.transport.sendto(package.to_bytes(), addr)
+
+    def close(self) -> None:
+        self.scheduler.stop()
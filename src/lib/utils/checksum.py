@@ -0,0 +1,43 @@
+"""
+Checksums de los paquetes y digest de los archivos transferidos.
+
+Cada DataPackage lleva un CRC32 de su seq_number y su payload. Si está
+instalado el paquete crc32c se puede usar CRC32C (Castagnoli), que el
+procesador calcula por hardware y detecta más errores de ráfaga; cada
+extremo anuncia en el Init si lo tiene y se usa solo si lo tienen los dos.
+
+El CRC de un paquete deja pasar uno de cada 2^32 errores: para no dar por
+buena una transferencia de muchos paquetes con alguno corrupto, emisor y
+receptor calculan además un digest de todo el rango transferido y lo
+comparan al cerrar.
+"""
+
+import hashlib
+import struct
+import zlib
+
+try:
+    from crc32c import crc32c as _crc32c
+except ImportError:
+    _crc32c = None
+
+from lib.utils.constants import FILE_DIGEST_SIZE
+
+HAVE_CRC32C = _crc32c is not None
+SEQUENCE_STRUCT = struct.Struct("!I")
+
+
+def packet_checksum(
+    sequence_number: int, data: bytes | memoryview, castagnoli: bool = False
+) -> int:
+    # el seq_number entra en el CRC: un paquete no se toma por otro si se
+    # corrompe el header
+    seed = SEQUENCE_STRUCT.pack(sequence_number & 0xFFFFFFFF)
+    if castagnoli:
+        return _crc32c(data, _crc32c(seed))
+    return zlib.crc32(data, zlib.crc32(seed))
+
+
+def file_digest() -> "hashlib._Hash":
+    """Digest incremental de los bytes de una transferencia, en orden."""
+    return hashlib.blake2b(digest_size=FILE_DIGEST_SIZE)
@@ -1,7 +1,26 @@
+import struct
 from typing import Literal
 
 
 BUFSIZE = 1500
+# datos por DataPackage si no se acuerda otro tamaño en el Init; el receptor
+# escribe el paquete n en n * payload_size
+PAYLOAD_SIZE = BUFSIZE - 50
+# el datagrama UDP más grande que entra en un paquete IPv4
+MAX_DATAGRAM_SIZE = 65507
+# MTUs que se prueban antes del Init, de mayor a menor: loopback, jumbo
+# frames y ethernet. Cada sonda espera su ACK PMTU_PROBE_TIMEOUT segundos
+PMTU_PROBE_MTUS = (65536, 9000, 1500)
+PMTU_PROBE_TIMEOUT = 0.2
+PMTU_PROBE_RETRIES = 2
+# buffers de recepción y envío de cada socket de una transferencia: con
+# datagramas grandes en el buffer por defecto entran apenas unos pocos
+TRANSFER_SOCKET_BUFFER = 2 * 1024 * 1024
+RECV_POOL_SIZE = 32
+# datagramas por sendmmsg/recvmmsg; un lote recibido ocupa a lo sumo la mitad
+# del pool, así sus vistas siguen válidas mientras llega el próximo
+SEND_BATCH_SIZE = 64
+RECV_BATCH_SIZE = RECV_POOL_SIZE // 2
 OPERATION = Literal[
     "upload",
     "download",
@@ -9,6 +28,96 @@ OPERATION = Literal[
 DEFAULT_HOST = LOCALHOST = "localhost"
 CLIENT_STORAGE = "src/lib/client_storage"
 SERVER_STORAGE = "src/lib/server_storage"
+# diccionarios bajados de cada servidor
+DICTIONARY_CACHE = "src/lib/client_storage/.dictionaries"
 DEFAULT_PORT = 8080
-SEPARATOR = "|"
+# version | type | flags | sequence_number | checksum | payload_length
+HEADER_FORMAT = "!BBBIIH"
+# el payload más grande que entra en un datagrama después del header
+MAX_PAYLOAD_SIZE = MAX_DATAGRAM_SIZE - struct.calcsize(HEADER_FORMAT)
+# 2: checksum CRC32 de los DataPackage y digest del archivo en el FIN
+# 3: tamaño de payload acordado en el Init
+# 4: compresión acordada en el Init
+# 5: diccionario de compresión anunciado en el Init
+# 6: el ACK de un FIN lleva FIN_ACK_SEQUENCE
+# 7: una bajada arranca con un ACK de START_ACK_SEQUENCE
+PROTOCOL_VERSION = 7
+# bytes del digest (blake2b) del rango transferido que viaja en el FIN
+FILE_DIGEST_SIZE = 32
+# seq_number del ACK que confirma un FIN: ningún DataPackage ni sonda lo usa
+FIN_ACK_SEQUENCE = 0xFFFFFFFF
+# seq_number del ACK con el que el cliente arranca una bajada; lo reenvía
+# hasta que llegan datos y el servidor ignora los repetidos
+START_ACK_SEQUENCE = 0xFFFFFFFE
 TIMEOUT = 10000
+IDLE_TIMEOUT = 10  # segundos sin respuesta antes de abandonar
+INITIAL_WINDOW_SIZE = 5
+MAX_WINDOW_SIZE = 256
+MAX_SACK_BITS = 512  # seq_numbers mas alla del ACK acumulativo que entran en un ACK
+# paquetes que el receptor acepta por delante del próximo esperado
+REORDER_BUFFER_SIZE = MAX_SACK_BITS
+# bytes recibidos que pueden esperar en memoria a ser escritos en disco, por
+# transferencia; lo que queda libre es la ventana que anuncia el receptor
+WRITE_BEHIND_BYTES = 2 * 1024 * 1024
+# bytes encolados a partir de los cuales se empiezan a escribir sin esperar
+# a que termine la tanda de paquetes que se está procesando
+WRITE_BEHIND_BATCH = 64 * PAYLOAD_SIZE
+# compresión de los datos: el archivo se comprime de a bloques de
+# COMPRESSION_BLOCK_SIZE bytes y un bloque que no baja de
+# COMPRESSIBLE_RATIO de su tamaño viaja sin comprimir; tras uno así se
+# mandan sin probar los próximos, el doble cada vez, hasta
+# MAX_INCOMPRESSIBLE_SKIP bloques
+COMPRESSION_BLOCK_SIZE = 128 * 1024
+COMPRESSIBLE_RATIO = 0.9
+MAX_INCOMPRESSIBLE_SKIP = 32
+# zlib y lzma van de 0 a 9
+MAX_COMPRESSION_LEVEL = 9
+# diccionarios de zlib (zdict) para comprimir archivos chicos: el servidor
+# los arma con el comienzo de los DICTIONARY_SAMPLES archivos más nuevos de
+# hasta DICTIONARY_SAMPLE_FILE_SIZE bytes, si hay al menos
+# DICTIONARY_MIN_SAMPLES, y los rearma cada DICTIONARY_REBUILD_INTERVAL
+# segundos si cambió el storage. zlib solo mira los últimos 32KB
+DICTIONARY_SIZE = 32 * 1024
+DICTIONARY_SAMPLES = 64
+DICTIONARY_MIN_SAMPLES = 4
+DICTIONARY_SAMPLE_FILE_SIZE = 64 * 1024
+DICTIONARY_REBUILD_INTERVAL = 60.0
+# se publican en el storage como archivos ocultos, para bajarlos como
+# cualquier otro, y se guardan las últimas DICTIONARY_VERSIONS
+DICTIONARY_PREFIX = ".zdict-"
+DICTIONARY_VERSIONS = 4
+# hilos del servidor que escriben las subidas de todos los clientes
+WRITER_THREADS = 4
+# ACKs retrasados: se confirma cada DELAYED_ACK_COUNT paquetes o a los
+# DELAYED_ACK_TIMEOUT segundos, lo que ocurra primero
+DELAYED_ACK_COUNT = 2
+DELAYED_ACK_TIMEOUT = 0.01
+# Servidor: paquetes de un cliente que se procesan por vuelta del event loop
+# y chunks que se leen por adelantado en cada ida al disco
+CLIENT_BATCH_SIZE = 64
+READ_AHEAD_CHUNKS = 64
+# bytes de archivos mapeados que el servidor mantiene abiertos sin descargas
+# en curso, para la próxima que pida el mismo archivo
+MAPPED_CACHE_BYTES = 1024 * 1024 * 1024
+# buffer de recepción del socket del servidor, compartido por todos los clientes
+SERVER_RECV_BUFFER = 4 * 1024 * 1024
+# ACKs posteriores a un hueco antes de reenviarlo sin esperar al timer
+FAST_RETRANSMIT_THRESHOLD = 3
+# Reenvíos del INIT y del FIN antes de dar por caído al otro extremo
+HANDSHAKE_RETRIES = 5
+# Limites del RTO adaptativo, en segundos
+INITIAL_RTO = 1.0
+MIN_RTO = 0.2
+# el otro extremo abandona tras IDLE_TIMEOUT sin recibir nada: el RTO tiene
+# que dejar varios reenvíos dentro de ese plazo
+MAX_RTO = IDLE_TIMEOUT / 4
+# journal de rangos escritos, junto al archivo, y cada cuánto se actualiza
+# (en segundos) mientras dura una transferencia
+JOURNAL_SUFFIX = ".journal"
+# archivo temporal donde el servidor escribe una subida hasta completarla
+PARTIAL_SUFFIX = ".part"
+JOURNAL_INTERVAL = 1.0
+# intentos de cada rango de una transferencia en paralelo
+RANGE_RETRIES = 3
+# lo que el socket de una transferencia sigue abierto para reconfirmar el FIN
+TRANSFER_LINGER = INITIAL_RTO * HANDSHAKE_RETRIES
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 
 class Protocol(Enum):
@@ -6,6 +6,16 @@ class Protocol(Enum):
     SELECTIVE_REPEAT = 1
 
 
+class CongestionControl(Enum):
+    FIXED = 0
+    AIMD = 1
+    BBR = 2
+
+
+class Compression(Enum):
+    NONE = 0
+    ZLIB = 1
+    LZMA = 2
 
 
 class PackageType(Enum):
@@ -14,7 +24,16 @@ class PackageType(Enum):
     ACK = 2
     NACK = 3
     FIN = 4
+    PROBE = 5
 
     @staticmethod
     def from_bytes(data: bytes) -> "PackageType":
         return PackageType(int.from_bytes(data, byteorder="big"))
+
+
+class PackageFlag(IntFlag):
+    NONE = 0
+    INVALID = 1
+    SACK = 2
+    RESUME = 4  # Init: retomar desde lo que quedó escrito de una transferencia
+    CRC32C = 8  # Init: se puede usar CRC32C; Data: el checksum es CRC32C
@@ -0,0 +1,102 @@
+"""
+Segmentation offload de UDP en Linux. Con GSO (UDP_SEGMENT) un solo sendmsg
+lleva un buffer de hasta 64KB con varios datagramas del mismo tamaño uno
+detrás del otro, y el kernel, o la placa, lo corta recién al final del
+camino de salida. Con GRO (UDP_GRO) el receptor recibe en un solo recvmsg
+varios datagramas seguidos del mismo emisor, pegados, junto con el tamaño
+de cada uno para separarlos.
+
+python no expone estas opciones: se usan los valores de <linux/udp.h>. Si
+el kernel no las tiene HAVE_GSO es False y enable_gro devuelve False, y se
+usa un datagrama por paquete como siempre.
+"""
+
+import errno
+import socket
+import struct
+import sys
+
+from lib.utils.constants import MAX_DATAGRAM_SIZE
+from lib.utils.types import ADDR
+
+SOL_UDP = getattr(socket, "SOL_UDP", 17)
+UDP_SEGMENT = getattr(socket, "UDP_SEGMENT", 103)
+UDP_GRO = getattr(socket, "UDP_GRO", 104)
+# segmentos por buffer que acepta el kernel (UDP_MAX_SEGMENTS)
+GSO_MAX_SEGMENTS = 64
+SEGMENT_STRUCT = struct.Struct("=H")
+GRO_STRUCT = struct.Struct("=i")
+GRO_CMSG_SPACE = socket.CMSG_SPACE(GRO_STRUCT.size)
+# lo que puede traer un recvmsg con GRO: varios datagramas pegados
+GRO_BUFFER_SIZE = 65535
+# errores de un sendmsg con UDP_SEGMENT que dicen que el camino no admite
+# GSO: la interfaz no calcula checksums o el segmento no entra en su MTU
+GSO_UNSUPPORTED = {errno.EINVAL, errno.EIO, errno.EMSGSIZE, errno.ENOPROTOOPT}
+
+
+def _have_gso() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(SOL_UDP, UDP_SEGMENT, 0)
+    except OSError:
+        return False
+    return True
+
+
+HAVE_GSO = _have_gso()
+
+
+def enable_gro(sock: socket.socket) -> bool:
+    """Pide a sock que entregue los datagramas agrupados; False si no puede."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        sock.setsockopt(SOL_UDP, UDP_GRO, 1)
+    except OSError:
+        return False
+    return True
+
+
+def send_segments(
+    sock: socket.socket, buffer: memoryview, segment_size: int, addr: ADDR
+) -> None:
+    """Manda buffer como datagramas de segment_size bytes; el último puede ser más corto."""
+    control = [(SOL_UDP, UDP_SEGMENT, SEGMENT_STRUCT.pack(segment_size))]
+    sock.sendmsg([buffer], control, 0, addr)
+
+
+def segment_groups(lengths: list[int]) -> list[tuple[int, int]]:
+    """
+    Parte una tanda de datagramas, por sus largos, en grupos que entran en un
+    solo buffer GSO: todos del largo del primero salvo el último, que puede
+    ser más corto, sin pasarse de 64KB ni de GSO_MAX_SEGMENTS. Devuelve
+    (inicio, cantidad) de cada grupo.
+    """
+    groups = []
+    start = 0
+    while start < len(lengths):
+        segment = lengths[start]
+        limit = min(GSO_MAX_SEGMENTS, MAX_DATAGRAM_SIZE // segment)
+        end = start + 1
+        while end < len(lengths) and end - start < limit:
+            if lengths[end] > segment:
+                break
+            end += 1
+            if lengths[end - 1] < segment:
+                break  # uno más corto cierra el grupo
+        groups.append((start, end - start))
+        start = end
+    return groups
+
+
+def split_segments(
+    data: memoryview, ancdata: list[tuple[int, int, bytes]]
+) -> list[memoryview]:
+    # sin el mensaje de control de GRO lo recibido es un solo datagrama
+    for level, kind, value in ancdata:
+        if level == SOL_UDP and kind == UDP_GRO:
+            (segment,) = GRO_STRUCT.unpack_from(value)
+            return [data[i : i + segment] for i in range(0, len(data), segment)]
+    return [data]
@@ -0,0 +1,179 @@
+"""
+sendmmsg y recvmmsg de Linux vía ctypes: mandan o reciben varios datagramas
+en una sola syscall. Si no están disponibles (otro sistema operativo, otra
+libc) HAVE_MMSG es False y quien los use tiene que hacer un sendto/recvfrom
+por datagrama.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import socket
+import sys
+from functools import lru_cache
+
+from lib.utils.types import ADDR
+
+
+class _IoVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class _SockAddrIn(ctypes.Structure):
+    _fields_ = [
+        ("sin_family", ctypes.c_ushort),
+        ("sin_port", ctypes.c_uint16),
+        ("sin_addr", ctypes.c_ubyte * 4),
+        ("sin_zero", ctypes.c_ubyte * 8),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IoVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        sendmmsg, recvmmsg = libc.sendmmsg, libc.recvmmsg
+    except (OSError, AttributeError):
+        return None
+
+    sendmmsg.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int]
+    sendmmsg.restype = ctypes.c_int
+    recvmmsg.argtypes = [
+        ctypes.c_int,
+        ctypes.c_void_p,
+        ctypes.c_uint,
+        ctypes.c_int,
+        ctypes.c_void_p,
+    ]
+    recvmmsg.restype = ctypes.c_int
+    return sendmmsg, recvmmsg
+
+
+_libc = _load_libc()
+HAVE_MMSG = _libc is not None
+
+
+@lru_cache(maxsize=256)
+def _sockaddr(addr: ADDR) -> _SockAddrIn:
+    host, port = addr
+    sockaddr = _SockAddrIn()
+    sockaddr.sin_family = socket.AF_INET
+    sockaddr.sin_port = socket.htons(port)
+    sockaddr.sin_addr[:] = socket.inet_aton(socket.gethostbyname(host))
+    return sockaddr
+
+
+class MessageBatch:
+    """
+    Encabezados de sendmmsg/recvmmsg armados una sola vez sobre buffers fijos:
+    el mensaje i siempre usa buffers[i], así que por llamada solo se cargan
+    las longitudes (o se leen, al recibir). Solo para sockets AF_INET.
+    """
+
+    def __init__(self, buffers: list[memoryview]) -> None:
+        if not HAVE_MMSG:
+            raise OSError(errno.ENOSYS, "sendmmsg/recvmmsg no disponibles")
+
+        self.buffers = buffers
+        size = len(buffers)
+        self.messages = (_MMsgHdr * size)()
+        self.iovecs = (_IoVec * size)()
+        self.names = (_SockAddrIn * size)()
+        # mantienen exportados los buffers mientras existan los punteros
+        self._views = [(ctypes.c_char * len(b)).from_buffer(b) for b in buffers]
+
+        for i, view in enumerate(self._views):
+            self.iovecs[i].iov_base = ctypes.addressof(view)
+            self.iovecs[i].iov_len = len(view)
+            header = self.messages[i].msg_hdr
+            header.msg_iov = ctypes.pointer(self.iovecs[i])
+            header.msg_iovlen = 1
+
+    def send(self, fd: int, lengths: list[int], addr: ADDR) -> int:
+        """
+        Manda buffers[i][:lengths[i]] a addr. Devuelve cuántos salieron, que
+        pueden ser menos si el socket no es bloqueante y se llenó.
+        """
+        sockaddr = _sockaddr(addr)
+        for i, length in enumerate(lengths):
+            self.iovecs[i].iov_len = length
+            header = self.messages[i].msg_hdr
+            header.msg_name = ctypes.addressof(sockaddr)
+            header.msg_namelen = ctypes.sizeof(sockaddr)
+
+        sent_total = 0
+        while sent_total < len(lengths):
+            sent = _libc[0](
+                fd,
+                ctypes.byref(self.messages, sent_total * ctypes.sizeof(_MMsgHdr)),
+                len(lengths) - sent_total,
+                0,
+            )
+            if sent < 0:
+                error = ctypes.get_errno()
+                if error == errno.EINTR:
+                    continue
+                if error in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise OSError(error, os.strerror(error))
+            sent_total += sent
+        return sent_total
+
+    def recv(self, fd: int, start: int = 0, count: int | None = None):
+        """
+        Recibe, sin bloquear, hasta count datagramas en buffers[start:].
+        Devuelve (índice del buffer, bytes, dirección) de cada uno.
+        """
+        if count is None:
+            count = len(self.buffers) - start
+        count = min(count, len(self.buffers) - start)
+
+        for i in range(start, start + count):
+            self.iovecs[i].iov_len = len(self.buffers[i])
+            header = self.messages[i].msg_hdr
+            header.msg_name = ctypes.addressof(self.names[i])
+            header.msg_namelen = ctypes.sizeof(_SockAddrIn)
+
+        while True:
+            received = _libc[1](
+                fd,
+                ctypes.byref(self.messages, start * ctypes.sizeof(_MMsgHdr)),
+                count,
+                socket.MSG_DONTWAIT,
+                None,
+            )
+            if received >= 0:
+                break
+            error = ctypes.get_errno()
+            if error == errno.EINTR:
+                continue
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(error, os.strerror(error))
+
+        datagrams = []
+        for i in range(start, start + received):
+            name = self.names[i]
+            host = socket.inet_ntoa(bytes(name.sin_addr))
+            datagrams.append(
+                (i, self.messages[i].msg_len, (host, socket.ntohs(name.sin_port)))
+            )
+        return datagrams
@@ -0,0 +1,69 @@
+"""
+Descubrimiento del path MTU al estilo DPLPMTUD (RFC 8899): antes del Init
+el cliente manda sondas (ProbePackage) de distintos tamaños con el bit DF
+prendido y se queda con la más grande que el servidor confirma. Con DF un
+datagrama que no entra en la interfaz falla en el sendto con EMSGSIZE y uno
+que no entra en algún salto del camino se descarta en vez de fragmentarse,
+así que una sonda confirmada prueba que ese tamaño llega entero.
+
+python no expone IP_MTU_DISCOVER en todas las plataformas: en Linux se usan
+los valores de <linux/in.h>; en el resto HAVE_DONT_FRAGMENT es False y no se
+sondea, se usa PAYLOAD_SIZE.
+"""
+
+import socket
+import sys
+
+from lib.packages.Header import HEADER_SIZE
+from lib.utils.constants import MAX_DATAGRAM_SIZE
+
+HAVE_DONT_FRAGMENT = sys.platform.startswith("linux")
+IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+IPV6_MTU_DISCOVER = getattr(socket, "IPV6_MTU_DISCOVER", 23)
+# WANT es el modo por defecto: el kernel fragmenta lo que no entra en el MTU
+# que conoce. PROBE pone DF siempre y no fragmenta nunca. IPv6 usa los mismos
+# valores
+PMTUDISC_WANT = getattr(socket, "IP_PMTUDISC_WANT", 1)
+PMTUDISC_PROBE = getattr(socket, "IP_PMTUDISC_PROBE", 3)
+IP_HEADER_SIZE = {socket.AF_INET: 20, socket.AF_INET6: 40}
+UDP_HEADER_SIZE = 8
+
+
+def set_dont_fragment(sock: socket.socket, enabled: bool) -> bool:
+    """Prende o apaga DF en sock; False si el sistema no lo permite."""
+    if not HAVE_DONT_FRAGMENT:
+        return False
+    level, option = socket.IPPROTO_IP, IP_MTU_DISCOVER
+    if sock.family == socket.AF_INET6:
+        level, option = socket.IPPROTO_IPV6, IPV6_MTU_DISCOVER
+    try:
+        sock.setsockopt(level, option, PMTUDISC_PROBE if enabled else PMTUDISC_WANT)
+    except OSError:
+        return False
+    return True
+
+
+def payload_for_mtu(mtu: int, family: int = socket.AF_INET) -> int:
+    # lo que queda para datos de un paquete IP de mtu bytes
+    datagram = mtu - IP_HEADER_SIZE.get(family, 40) - UDP_HEADER_SIZE
+    return min(datagram, MAX_DATAGRAM_SIZE) - HEADER_SIZE
+
+
+def datagrams_in_buffer(sock: socket.socket, datagram_size: int) -> int:
+    """
+    Cuántos datagramas de datagram_size entran en el buffer de recepción de
+    sock. El kernel duplica lo pedido con SO_RCVBUF para su propia
+    contabilidad y lo que cuenta por datagrama es más que el payload: se
+    toma la mitad como lo que realmente entra.
+    """
+    buffer = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) // 2
+    return max(1, buffer // datagram_size)
+
+
+def set_transfer_buffers(sock: socket.socket, size: int) -> None:
+    # el kernel lo recorta a net.core.rmem_max / wmem_max si es más grande
+    for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, size)
+        except OSError:
+            pass
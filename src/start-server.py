@@ -1,12 +1,21 @@
 import logging
+import multiprocessing
 
 from lib.server.arguments import parser
 from lib.Server import Server
-from lib.utils.enums import Protocol
+from lib.utils.constants import MAX_PAYLOAD_SIZE
+from lib.utils.enums import CongestionControl, Protocol
 
 
 def start_server(
-    host: str, port: int, storage_path: str, protocol: Protocol, logging_level: int
+    host: str,
+    port: int,
+    storage_path: str,
+    protocol: Protocol,
+    logging_level: int,
+    congestion_control: CongestionControl = CongestionControl.FIXED,
+    max_payload_size: int = MAX_PAYLOAD_SIZE,
+    reuse_port: bool = False,
 ):
     server = Server(
         host=host,
@@ -14,15 +23,37 @@ def start_server(
         protocol=protocol,
         server_storage=storage_path,
         logging_level=logging_level,
+        congestion_control=congestion_control,
+        max_payload_size=max_payload_size,
+        reuse_port=reuse_port,
     )
     server.start()
 
 
+def start_workers(workers: int, *args) -> None:
+    # cada worker tiene su propio socket en el mismo puerto (SO_REUSEPORT): el
+    # kernel manda todos los paquetes de un cliente al mismo proceso
+    processes = [
+        multiprocessing.Process(target=start_server, args=(*args, True))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # el Ctrl+C también les llega a los workers, que se cierran solos
+        for process in processes:
+            process.join()
+
+
 if __name__ == "__main__":
     # read host and port from command line arguments
     args = parser.parse_args()
 
     host, port, storage, protocol = args.host, args.port, args.storage, args.protocol
+    congestion_control = CongestionControl[args.congestion.upper()]
 
     if protocol == 1:
         protocol_handler = Protocol.SELECTIVE_REPEAT
@@ -37,4 +68,8 @@ if __name__ == "__main__":
         logging_level = logging.INFO
 
     # start server
-    start_server(host, port, storage, protocol_handler, logging_level)
+    server_args = (host, port, storage, protocol_handler, logging_level)
+    if args.workers > 1:
+        start_workers(args.workers, *server_args, congestion_control, args.payload_size)
+    else:
+        start_server(*server_args, congestion_control, args.payload_size)
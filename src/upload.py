@@ -1,15 +1,41 @@
 from typing import Literal
 from lib.Client import Client
 import logging
-from lib.utils.enums import Protocol
+from lib.utils.enums import CongestionControl, Compression, Protocol
 from lib.upload.arguments import parser
+from lib.utils.constants import MAX_PAYLOAD_SIZE
 import time
 
 
-def upload(file_path: str, host: str, port: int, protocol: Protocol, logging_level):
+def upload(
+    file_path: str,
+    host: str,
+    port: int,
+    protocol: Protocol,
+    logging_level,
+    congestion_control: CongestionControl = CongestionControl.FIXED,
+    streams: int = 1,
+    resume: bool = False,
+    max_payload_size: int = MAX_PAYLOAD_SIZE,
+    compression: Compression = Compression.NONE,
+    compression_level: int | None = None,
+):
     start_time = time.time()
 
-    client = Client("upload", file_path, host, port, protocol, logging_level)
+    client = Client(
+        "upload",
+        file_path,
+        host,
+        port,
+        protocol,
+        logging_level,
+        congestion_control,
+        streams,
+        resume,
+        max_payload_size,
+        compression,
+        compression_level,
+    )
     client.start()
 
     end_time = time.time()
@@ -25,6 +51,7 @@ if __name__ == "__main__":
     file_name: str = args.name
     file_source: str = args.src
     file_path: str = file_source + "/" + file_name
+    congestion_control = CongestionControl[args.congestion.upper()]
 
     if args.verbose:
         logging_level = logging.DEBUG
@@ -33,4 +60,16 @@ if __name__ == "__main__":
     else:
         logging_level = logging.INFO
 
-    upload(file_path, host, port, Protocol(protocol), logging_level)
+    upload(
+        file_path,
+        host,
+        port,
+        Protocol(protocol),
+        logging_level,
+        congestion_control,
+        args.streams,
+        args.resume,
+        args.payload_size,
+        Compression[args.compression.upper()],
+        args.level,
+    )
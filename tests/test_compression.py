@@ -0,0 +1,267 @@
+import io
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from lib.Client import Client
+from lib.protocols.compression import (
+    FRAME_HEADER,
+    RAW_FRAME,
+    FrameDecoder,
+    FrameEncoder,
+    dictionary_name,
+)
+from lib.Server import Server
+from lib.server.DictionaryStore import DictionaryStore
+from lib.utils.checksum import file_digest
+from lib.utils.enums import Compression, Protocol
+from lib.utils.package_error import PackageErr
+from lib.utils.TransferJournal import TransferJournal
+
+TEXT = b"".join(b"linea %d de un archivo de texto\n" % i for i in range(20_000))
+
+
+def record(i):
+    # archivos chicos con la misma estructura, como los de muchos clientes
+    return (
+        b'{"id": %d, "usuario": "cliente-%d", "estado": "activo", '
+        b'"permisos": ["lectura", "escritura"], "creado": "2024-01-%02d"}\n'
+        % (i, i, i % 28 + 1)
+    ) * 20
+
+
+def encode(data, compression, level=1, block_size=4096, dictionary=None):
+    encoder = FrameEncoder(
+        io.BytesIO(data).read, compression, level, None, block_size, dictionary
+    )
+    chunks = []
+    while chunk := encoder.read(1000):
+        chunks.append(chunk)
+    assert encoder.exhausted()
+    return chunks
+
+
+@pytest.mark.parametrize("compression", [Compression.ZLIB, Compression.LZMA])
+def test_frames_decode_to_the_original_in_any_split(compression):
+    # texto, luego algo que no comprime y otra vez texto
+    data = TEXT[:50_000] + os.urandom(30_000) + TEXT[:50_000]
+    chunks = encode(data, compression)
+    assert sum(map(len, chunks)) < len(data)
+
+    decoder = FrameDecoder(compression, 1, 4096)
+    assert b"".join(decoder.feed(chunk) for chunk in chunks) == data
+    assert decoder.finished()
+
+
+def test_incompressible_blocks_go_raw_and_back_off():
+    data = os.urandom(64 * 4096)
+    encoder = FrameEncoder(io.BytesIO(data).read, Compression.ZLIB, 6, None, 4096)
+    stream = encoder.read(len(data) * 2)
+
+    kinds = []
+    while stream:
+        kind, length = FRAME_HEADER.unpack_from(stream)
+        kinds.append(kind)
+        stream = stream[FRAME_HEADER.size + length :]
+    assert kinds == [RAW_FRAME] * 64
+    # entre un intento y el siguiente se saltean 1, 2, 4... bloques
+    assert encoder.backoff == 32
+
+
+def test_digest_is_of_the_uncompressed_data():
+    digest = file_digest()
+    encoder = FrameEncoder(io.BytesIO(TEXT).read, Compression.ZLIB, 6, digest)
+    while encoder.read(1000):
+        pass
+    expected = file_digest()
+    expected.update(TEXT)
+    assert digest.digest() == expected.digest()
+
+
+def test_corrupted_or_oversized_frames_are_rejected():
+    with pytest.raises(PackageErr):
+        FrameDecoder(Compression.ZLIB, 6).feed(FRAME_HEADER.pack(1, 4) + b"\xff" * 4)
+    with pytest.raises(PackageErr):
+        FrameDecoder(Compression.ZLIB, 6, 4096).feed(FRAME_HEADER.pack(0, 5000))
+    bomb = encode(b"\x00" * 8192, Compression.ZLIB, block_size=8192)
+    with pytest.raises(PackageErr):
+        FrameDecoder(Compression.ZLIB, 1, 4096).feed(b"".join(bomb))
+
+
+def test_dictionary_is_built_from_small_files_and_shrinks_them(tmp_path):
+    store = DictionaryStore(str(tmp_path), rebuild_interval=0)
+    for i in range(3):
+        (tmp_path / f"registro{i}.json").write_bytes(record(i))
+    (tmp_path / "grande.bin").write_bytes(os.urandom(200_000))
+    assert store.current() == (0, None)  # pocas muestras
+
+    (tmp_path / "registro3.json").write_bytes(record(3))
+    identifier, dictionary = store.current()
+    assert identifier and record(3)[:100] in dictionary
+    assert (tmp_path / dictionary_name(identifier)).read_bytes() == dictionary
+    # mismas muestras, mismo diccionario
+    assert DictionaryStore(str(tmp_path)).current()[0] == identifier
+
+    data = record(99)
+    plain = sum(map(len, encode(data, Compression.ZLIB, 6)))
+    chunks = encode(data, Compression.ZLIB, 6, dictionary=dictionary)
+    assert sum(map(len, chunks)) < plain / 2
+    decoder = FrameDecoder(Compression.ZLIB, 6, 4096, dictionary)
+    assert b"".join(decoder.feed(chunk) for chunk in chunks) == data
+
+
+def start_server(storage, protocol):
+    server = Server(
+        "127.0.0.1",
+        protocol,
+        0,
+        server_storage=str(storage),
+        logging_level=logging.ERROR,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+    return server, server_thread
+
+
+@pytest.mark.parametrize("operation", ["upload", "download"])
+@pytest.mark.parametrize("protocol", [Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT])
+def test_compressed_transfer(tmp_path, operation, protocol):
+    server_storage = tmp_path / "server"
+    client_storage = tmp_path / "client"
+    server_storage.mkdir()
+    client_storage.mkdir()
+    content = TEXT + os.urandom(200_000) + TEXT
+    source, target = client_storage, server_storage
+    if operation == "download":
+        source, target = server_storage, client_storage
+    (source / "file.txt").write_bytes(content)
+
+    server, server_thread = start_server(server_storage, protocol)
+    try:
+        client = Client(
+            operation,
+            str(client_storage / "file.txt"),
+            "127.0.0.1",
+            server.port,
+            protocol,
+            logging.ERROR,
+            compression=Compression.ZLIB,
+        )
+        assert client.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    assert (target / "file.txt").read_bytes() == content
+
+
+@pytest.mark.parametrize("protocol", [Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT])
+def test_server_decodes_uploads_outside_the_loop(tmp_path, monkeypatch, protocol):
+    server_storage = tmp_path / "server"
+    server_storage.mkdir()
+    (tmp_path / "file.txt").write_bytes(TEXT)
+    threads = set()
+    feed = FrameDecoder.feed
+
+    def recording_feed(self, data):
+        threads.add(threading.current_thread())
+        return feed(self, data)
+
+    monkeypatch.setattr(FrameDecoder, "feed", recording_feed)
+    server, server_thread = start_server(server_storage, protocol)
+    try:
+        client = Client(
+            "upload",
+            str(tmp_path / "file.txt"),
+            "127.0.0.1",
+            server.port,
+            protocol,
+            logging.ERROR,
+            compression=Compression.ZLIB,
+        )
+        assert client.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    # el cliente no decodifica nada: todo lo registrado es del servidor
+    assert threads
+    assert server_thread not in threads
+    assert (server_storage / "file.txt").read_bytes() == TEXT
+
+
+@pytest.mark.parametrize("protocol", [Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT])
+def test_download_with_a_corrupt_frame_fails(tmp_path, monkeypatch, protocol):
+    server_storage = tmp_path / "server"
+    client_storage = tmp_path / "client"
+    server_storage.mkdir()
+    client_storage.mkdir()
+    (server_storage / "file.txt").write_bytes(TEXT + os.urandom(200_000))
+    read = FrameEncoder.read
+    reads = []
+
+    def corrupting_read(self, size):
+        # el tercer pedazo del flujo arranca con un frame de tipo desconocido
+        reads.append(size)
+        if len(reads) == 3:
+            return FRAME_HEADER.pack(9, 0) + read(self, size - FRAME_HEADER.size)
+        return read(self, size)
+
+    monkeypatch.setattr(FrameEncoder, "read", corrupting_read)
+    server, server_thread = start_server(server_storage, protocol)
+    try:
+        client = Client(
+            "download",
+            str(client_storage / "file.txt"),
+            "127.0.0.1",
+            server.port,
+            protocol,
+            logging.ERROR,
+            compression=Compression.ZLIB,
+        )
+        assert not client.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    # lo escrito no es confiable: no queda anotado para retomar
+    assert TransferJournal(str(client_storage / "file.txt")).load() is None
+
+
+def test_small_transfers_use_the_cached_dictionary(tmp_path):
+    server_storage = tmp_path / "server"
+    client_storage = tmp_path / "client"
+    server_storage.mkdir()
+    client_storage.mkdir()
+    for i in range(8):
+        (server_storage / f"registro{i}.json").write_bytes(record(i))
+
+    server, server_thread = start_server(server_storage, Protocol.SELECTIVE_REPEAT)
+    try:
+        used = []
+        for i in (100, 101):
+            (client_storage / "nuevo.json").write_bytes(record(i))
+            client = Client(
+                "upload",
+                str(client_storage / "nuevo.json"),
+                "127.0.0.1",
+                server.port,
+                Protocol.SELECTIVE_REPEAT,
+                logging.ERROR,
+                compression=Compression.ZLIB,
+                dictionary_cache=str(tmp_path / "cache"),
+            )
+            assert client.start()
+            assert (server_storage / "nuevo.json").read_bytes() == record(i)
+            used.append(client.operator.protocol_handler.dictionary is not None)
+    finally:
+        server.stop()
+        server_thread.join()
+
+    # la primera se entera del diccionario y lo baja; la segunda lo usa
+    assert used == [False, True]
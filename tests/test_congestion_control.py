@@ -0,0 +1,64 @@
+import pytest
+
+from lib.protocols.congestion_control import (
+    AimdController,
+    BbrController,
+    FixedWindowController,
+    create_congestion_controller,
+)
+from lib.utils.enums import CongestionControl
+
+
+def test_fixed_window_never_changes():
+    controller = create_congestion_controller(CongestionControl.FIXED, 5)
+    assert isinstance(controller, FixedWindowController)
+
+    for _ in range(100):
+        controller.on_ack()
+    controller.on_timeout()
+
+    assert controller.window() == 5
+
+
+def test_aimd_slow_start_then_congestion_avoidance():
+    controller = AimdController(initial_window=2, max_window=1000)
+
+    for _ in range(14):
+        controller.on_ack()
+    assert controller.window() == 16  # slow start: +1 por ACK
+
+    controller.on_loss()
+    assert controller.window() == 8
+    assert controller.ssthresh == 8
+
+    for _ in range(9):
+        controller.on_ack()
+    assert controller.window() == 9  # ~+1 por ventana completa
+
+    controller.on_timeout()
+    assert controller.window() == 1
+
+
+def test_aimd_respects_max_window():
+    controller = AimdController(initial_window=5, max_window=10)
+    for _ in range(100):
+        controller.on_ack()
+
+    assert controller.window() == 10
+
+
+def test_bbr_window_follows_bandwidth_delay_product(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        "lib.protocols.congestion_control.time.monotonic", lambda: now[0]
+    )
+    controller = BbrController(initial_window=4, max_window=10_000)
+
+    # 1000 paquetes/s con RTT de 10ms -> BDP de 10 paquetes
+    for _ in range(500):
+        now[0] += 0.001
+        controller.on_ack(1, rtt=0.01)
+
+    assert not controller.startup
+    assert controller.max_bw == pytest.approx(1000)
+    assert controller.window() == 20  # CWND_GAIN * BDP
@@ -0,0 +1,51 @@
+import threading
+
+from lib.protocols.delayed_ack import DelayedAck
+from lib.utils.RetransmissionScheduler import RetransmissionScheduler
+
+
+def create_delayed_ack(ack_every=2, ack_delay=5.0):
+    sent = []
+    scheduler = RetransmissionScheduler()
+    delayed_ack = DelayedAck(sent.append, scheduler, "ack", ack_every, ack_delay)
+    return delayed_ack, sent, scheduler
+
+
+def test_acks_every_n_packets():
+    delayed_ack, sent, scheduler = create_delayed_ack(ack_every=2)
+
+    delayed_ack.on_packet(0)
+    assert sent == []
+    delayed_ack.on_packet(1)
+    assert [ack.cumulative for ack in sent] == [2]
+
+    scheduler.stop()
+
+
+def test_acks_after_delay():
+    sent_event = threading.Event()
+    scheduler = RetransmissionScheduler()
+    delayed_ack = DelayedAck(
+        lambda ack: sent_event.set(), scheduler, "ack", ack_every=10, ack_delay=0.05
+    )
+
+    delayed_ack.on_packet(0)
+    assert sent_event.wait(timeout=2)
+    scheduler.stop()
+
+
+def test_gap_and_duplicates_are_acked_immediately():
+    delayed_ack, sent, scheduler = create_delayed_ack(ack_every=10)
+
+    delayed_ack.on_packet(0)
+    delayed_ack.on_packet(2)  # hueco en 1
+    assert sent[-1].cumulative == 1
+    assert sent[-1].acknowledges(2)
+
+    delayed_ack.on_packet(1)  # cierra el hueco
+    assert sent[-1].cumulative == 3
+
+    assert not delayed_ack.on_packet(1)  # duplicado
+    assert len(sent) == 3
+
+    scheduler.stop()
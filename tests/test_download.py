@@ -26,14 +26,18 @@ def storages(tmp_path) -> tuple[Path, Path]:
 
 
 def start_client(
-    file_path: str, server_addr: ADDR, client_num: str | int = "", start_now=True
+    file_path: str,
+    server_addr: ADDR,
+    client_num: str | int = "",
+    start_now=True,
+    protocol=Protocol.STOP_WAIT,
 ):
     client = Client(
         "download",
         file_path,
         server_addr[0],
         server_addr[1],
-        protocol=Protocol.STOP_WAIT,
+        protocol=protocol,
         logging_level=logging.ERROR,
     )
     client_thread = threading.Thread(
@@ -44,11 +48,11 @@ def start_client(
     return client, client_thread
 
 
-def start_server(server_addr, server_storage):
+def start_server(server_addr, server_storage, protocol=Protocol.STOP_WAIT):
     server = Server(
         host=server_addr[0],
         port=server_addr[1],
-        protocol=Protocol.STOP_WAIT,
+        protocol=protocol,
         server_storage=str(server_storage),
         logging_level=logging.ERROR,
     )
@@ -208,6 +212,40 @@ def test_download_xl(storages):
     assert server_thread.is_alive() is False
 
 
+@pytest.mark.parametrize(
+    "server_protocol, client_protocol, port",
+    [
+        (Protocol.SELECTIVE_REPEAT, Protocol.STOP_WAIT, DEFAULT_PORT + 40),
+        (Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT, DEFAULT_PORT + 41),
+    ],
+)
+def test_download_with_client_protocol(
+    storages, server_protocol, client_protocol, port
+):
+    # el servidor baja con el protocolo que pide el cliente, no con el suyo
+    client_storage, server_storage = storages
+
+    md_file = server_storage / "mixed.bin"
+    text = generate_random_text(BUFSIZE * 64)
+    md_file.write_text(text, encoding="utf-8")
+
+    server_addr = (LOCALHOST, port)
+    server, server_thread = start_server(server_addr, server_storage, server_protocol)
+
+    downloaded_file = client_storage / "mixed.bin"
+    client, client_thread = start_client(
+        str(downloaded_file), server_addr, protocol=client_protocol
+    )
+
+    client_thread.join(timeout=20)
+    assert not client_thread.is_alive()
+    server.stop()
+    server_thread.join(timeout=20)
+
+    assert downloaded_file.read_text(encoding="utf-8") == text
+    assert server_thread.is_alive() is False
+
+
 def test_concurrent_download_xl(storages):
     client_storage, server_storage = storages
 
@@ -252,6 +290,7 @@ def test_concurrent_download_xl(storages):
         server_text = files[i][0].read_text(encoding="utf-8")
         assert downloaded_text == server_text
 
+
 def generate_random_text(length):
     return "".join(
         random.choice(string.ascii_letters + string.digits) for _ in range(length)
@@ -0,0 +1,84 @@
+import logging
+import threading
+
+from lib.packages.AckPackage import AckPackage
+from lib.packages.DataPackage import DataPackage
+from lib.protocols.selective_repeat import SelectiveRepeatProtocol
+from lib.utils.RetransmissionScheduler import RetransmissionScheduler
+
+ADDR = ("127.0.0.1", 0)
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.scheduler = RetransmissionScheduler()
+
+    def sendto(self, package, addr):
+        self.sent.append(package)
+
+
+def create_protocol(threshold=3):
+    socket = FakeSocket()
+    protocol = SelectiveRepeatProtocol(
+        socket,
+        ADDR,
+        window_size=8,
+        logging_level=logging.CRITICAL,
+        fast_retransmit_threshold=threshold,
+    )
+    for seq in range(5):
+        protocol.agregar_paquete_al_window(DataPackage(b"x", seq))
+    socket.sent.clear()
+    return protocol, socket
+
+
+def sack(cumulative, *sequence_numbers):
+    bitmap = 0
+    for seq in sequence_numbers:
+        bitmap |= 1 << (seq - cumulative - 1)
+    return AckPackage(sequence_numbers[-1], cumulative=cumulative, sack_bitmap=bitmap)
+
+
+def test_hole_is_resent_after_threshold_acks():
+    protocol, socket = create_protocol()
+
+    protocol.process_ack(sack(0, 1))
+    protocol.process_ack(sack(0, 1, 2))
+    assert socket.sent == []
+
+    protocol.process_ack(sack(0, 1, 2, 3))
+    assert [package.sequence_number for package in socket.sent] == [0]
+
+    # no se vuelve a reenviar con cada ACK posterior
+    protocol.process_ack(sack(0, 1, 2, 3, 4))
+    assert len(socket.sent) == 1
+    socket.scheduler.stop()
+
+
+def test_fast_retransmit_can_be_disabled():
+    protocol, socket = create_protocol(threshold=0)
+
+    for last in range(1, 5):
+        protocol.process_ack(sack(0, *range(1, last + 1)))
+
+    assert socket.sent == []
+    socket.scheduler.stop()
+
+
+def test_timer_waits_for_the_ack_being_processed():
+    protocol, socket = create_protocol()
+    item = protocol.window.get(0)
+
+    # mientras se procesa un ACK el timer del paquete no puede reenviarlo
+    with protocol.lock:
+        timer = threading.Thread(target=protocol._on_item_timeout, args=(item,))
+        timer.start()
+        timer.join(0.1)
+        assert timer.is_alive()
+        protocol.process_ack(AckPackage(0))
+    timer.join()
+
+    # el ACK confirmó el paquete antes de que el timer lo viera
+    assert socket.sent == []
+    socket.scheduler.stop()
@@ -0,0 +1,357 @@
+import functools
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from lib.common.Download import Download
+from lib.common.Upload import Upload
+from lib.packages.AckPackage import AckPackage
+from lib.packages.DataPackage import DataPackage
+from lib.packages.FinPackage import FinPackage
+from lib.packages.InitPackage import DownloadHeader, UploadHeader
+from lib.packages.ProbePackage import ProbePackage
+from lib.Server import Server
+from lib.utils.checksum import file_digest
+from lib.utils.constants import (
+    FIN_ACK_SEQUENCE,
+    MAX_PAYLOAD_SIZE,
+    PAYLOAD_SIZE,
+    START_ACK_SEQUENCE,
+)
+from lib.utils.enums import PackageType, Protocol
+from lib.utils.Socket import Socket
+
+
+def test_fin_waits_for_the_servers_verdict(tmp_path):
+    server = Socket(logging.ERROR)
+    port = server.bind("127.0.0.1", 0)
+    server.settimeout(5)
+    other = Socket(logging.ERROR)  # otro puerto del mismo servidor
+    fins = []
+
+    def answer():
+        # al primer FIN responde solo con paquetes que no son el veredicto:
+        # el cliente los descarta y reenvía el FIN
+        package, addr = server.recv()
+        fins.append(package)
+        server.sendto(AckPackage(65494), addr)  # ACK atrasado de una sonda
+        server.sendto(AckPackage(3), addr)  # ACK atrasado de los datos
+        other.sendto(AckPackage(FIN_ACK_SEQUENCE), addr)
+        package, addr = server.recv()
+        fins.append(package)
+        server.sendto(AckPackage(FIN_ACK_SEQUENCE), addr)
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    client = Socket(logging.ERROR)
+    upload = Upload(
+        str(tmp_path / "file.bin"),
+        client,
+        ("127.0.0.1", port),
+        logging_level=logging.ERROR,
+    )
+    try:
+        reply, _ = upload.request_fin(FinPackage(b"digest"))
+    finally:
+        thread.join()
+        for sock in (client, server, other):
+            sock.close()
+
+    assert reply.type == PackageType.ACK
+    assert reply.sequence_number == FIN_ACK_SEQUENCE
+    assert [fin.type for fin in fins] == [PackageType.FIN, PackageType.FIN]
+
+
+def test_probe_leaves_no_stale_acks(tmp_path):
+    server = Socket(logging.ERROR)
+    port = server.bind("127.0.0.1", 0)
+    server.settimeout(5)
+    answered = threading.Event()
+
+    def answer():
+        # cada sonda se confirma dos veces, como si se hubiera reenviado
+        package, addr = server.recv()
+        server.sendto(AckPackage(package.sequence_number), addr)
+        server.sendto(AckPackage(package.sequence_number), addr)
+        answered.set()
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    client = Socket(logging.ERROR)
+    try:
+        assert client.probe_payload_size(("127.0.0.1", port)) == MAX_PAYLOAD_SIZE
+        thread.join()
+        # el ACK repetido no queda esperando a ser tomado por respuesta
+        client.settimeout(0.1)
+        with pytest.raises(TimeoutError):
+            client.recv()
+    finally:
+        for sock in (client, server):
+            sock.close()
+
+
+def test_init_reply_skips_stale_probe_acks(tmp_path):
+    listen = Socket(logging.ERROR)
+    port = listen.bind("localhost", 0)
+    listen.settimeout(5)
+    transfer = Socket(logging.ERROR)
+    transfer_port = transfer.bind("127.0.0.1", 0)
+
+    def answer():
+        package, addr = listen.recv()
+        while package.type == PackageType.PROBE:
+            listen.sendto(AckPackage(package.sequence_number), addr)
+            package, addr = listen.recv()
+        # antes de la respuesta llega el ACK atrasado de una sonda
+        listen.sendto(AckPackage(65494), addr)
+        transfer.sendto(
+            UploadHeader(package.file_name, payload_size=package.payload_size), addr
+        )
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    (tmp_path / "file.bin").write_bytes(b"x")
+    client = Socket(logging.ERROR)
+    upload = Upload(
+        str(tmp_path / "file.bin"),
+        client,
+        ("localhost", port),
+        logging_level=logging.ERROR,
+    )
+    try:
+        payload_size = client.probe_payload_size(upload.server_addr)
+        reply, source = upload.request_init(
+            UploadHeader("file.bin", payload_size=payload_size)
+        )
+    finally:
+        thread.join()
+        for sock in (client, listen, transfer):
+            sock.close()
+
+    assert reply.type == PackageType.INIT
+    assert reply.payload_size == payload_size
+    assert source == ("127.0.0.1", transfer_port)
+
+
+def start_server(storage, protocol):
+    server = Server(
+        "127.0.0.1",
+        protocol,
+        0,
+        server_storage=str(storage),
+        logging_level=logging.ERROR,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+    return server, server_thread
+
+
+@pytest.mark.parametrize("protocol", [Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT])
+def test_download_survives_a_lost_start_ack(tmp_path, protocol):
+    content = os.urandom(20 * PAYLOAD_SIZE)
+    server_storage = tmp_path / "server"
+    server_storage.mkdir()
+    (server_storage / "file.bin").write_bytes(content)
+    server, server_thread = start_server(server_storage, protocol)
+
+    client = Socket(logging.ERROR)
+    sendto = client.sendto
+    lost = []
+
+    def lossy_sendto(package, addr):
+        # se pierde el primer ACK que arranca la bajada
+        if package.sequence_number == START_ACK_SEQUENCE and not lost:
+            lost.append(package)
+            return
+        sendto(package, addr)
+
+    client.sendto = lossy_sendto
+    download = Download(
+        str(tmp_path / "file.bin"),
+        client,
+        ("127.0.0.1", server.port),
+        protocol,
+        logging.ERROR,
+    )
+    try:
+        assert download.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    assert lost
+    assert (tmp_path / "file.bin").read_bytes() == content
+
+
+def test_download_gives_up_on_a_silent_server(tmp_path, monkeypatch):
+    monkeypatch.setattr("lib.common.Download.IDLE_TIMEOUT", 0.5)
+    server = Socket(logging.ERROR)
+    port = server.bind("127.0.0.1", 0)
+    server.settimeout(5)
+
+    def answer():
+        # acepta el Init y después no manda nada más
+        package, addr = server.recv()
+        while package.type != PackageType.INIT:
+            package, addr = server.recv()
+        server.sendto(DownloadHeader(package.file_name, file_size=100), addr)
+
+    thread = threading.Thread(target=answer)
+    thread.start()
+    client = Socket(logging.ERROR, segment_offload=False)
+    download = Download(
+        str(tmp_path / "file.bin"),
+        client,
+        ("127.0.0.1", port),
+        logging_level=logging.ERROR,
+    )
+    try:
+        assert not download.start()
+    finally:
+        thread.join()
+        server.close()
+
+
+def fake_server(answer_init):
+    # responde las sondas y el Init; después solo escucha
+    server = Socket(logging.ERROR)
+    port = server.bind("127.0.0.1", 0)
+    server.settimeout(5)
+    fins = []
+
+    def serve():
+        package, addr = server.recv()
+        while package.type == PackageType.PROBE:
+            server.sendto(AckPackage(package.sequence_number), addr)
+            package, addr = server.recv()
+        answer_init(server, package, addr)
+        server.settimeout(0.5)
+        try:
+            while True:
+                package, _ = server.recv()
+                if package.type == PackageType.FIN:
+                    fins.append(package)
+        except (TimeoutError, OSError):
+            pass
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    return server, port, thread, fins
+
+
+def impatient_socket():
+    # un socket que se rinde rápido al pedir respuesta
+    client = Socket(logging.ERROR)
+    client.request = functools.partial(client.request, timeout=0.1, retries=2)
+    return client
+
+
+def test_upload_gives_up_when_the_fin_is_not_answered(tmp_path):
+    def answer_init(server, package, addr):
+        server.sendto(UploadHeader(package.file_name), addr)
+
+    server, port, thread, fins = fake_server(answer_init)
+    (tmp_path / "empty.bin").write_bytes(b"")
+    client = impatient_socket()
+    upload = Upload(
+        str(tmp_path / "empty.bin"),
+        client,
+        ("127.0.0.1", port),
+        logging_level=logging.ERROR,
+    )
+    try:
+        assert not upload.start()
+        assert client.socket.fileno() == -1
+    finally:
+        server.close()
+        thread.join()
+
+    assert len(fins) == 2
+
+
+def test_download_gives_up_when_the_fin_is_not_answered(tmp_path):
+    content = b"hello"
+
+    def answer_init(server, package, addr):
+        server.sendto(DownloadHeader(package.file_name, file_size=len(content)), addr)
+        package, addr = server.recv()
+        assert package.sequence_number == START_ACK_SEQUENCE
+        server.sendto(DataPackage(content, 0), addr)
+        server.recv()  # el ACK de los datos
+        digest = file_digest()
+        digest.update(content)
+        server.sendto(FinPackage(digest.digest()), addr)
+
+    server, port, thread, fins = fake_server(answer_init)
+    client = impatient_socket()
+    download = Download(
+        str(tmp_path / "file.bin"),
+        client,
+        ("127.0.0.1", port),
+        logging_level=logging.ERROR,
+    )
+    try:
+        assert not download.start()
+        assert client.socket.fileno() == -1
+    finally:
+        server.close()
+        thread.join()
+
+    assert len(fins) == 2
+    assert (tmp_path / "file.bin").read_bytes() == content
+
+
+def test_probe_larger_than_the_servers_payload(tmp_path, caplog):
+    server_storage = tmp_path / "server"
+    server_storage.mkdir()
+    server = Server(
+        "127.0.0.1",
+        Protocol.SELECTIVE_REPEAT,
+        0,
+        server_storage=str(server_storage),
+        logging_level=logging.ERROR,
+        max_payload_size=MAX_PAYLOAD_SIZE - 2,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+
+    client = Socket(logging.ERROR)
+    client.settimeout(1)
+    acks = []
+    try:
+        for _ in range(3):
+            # detrás de otro datagrama la sonda se lee con recvmmsg, en los
+            # buffers del socket de escucha
+            client.sendto(FinPackage(), ("127.0.0.1", server.port))
+            client.socket.sendto(
+                ProbePackage(MAX_PAYLOAD_SIZE).to_bytes(), ("127.0.0.1", server.port)
+            )
+        while len(acks) < 6:
+            package, _ = client.recv()
+            acks.append(package.sequence_number)
+
+        # el Init achica el payload sondeado al que acepta el servidor
+        (tmp_path / "file.bin").write_bytes(os.urandom(300_000))
+        upload = Upload(
+            str(tmp_path / "file.bin"),
+            Socket(logging.ERROR),
+            ("127.0.0.1", server.port),
+            Protocol.SELECTIVE_REPEAT,
+            logging.ERROR,
+        )
+        assert upload.start()
+    finally:
+        client.close()
+        server.stop()
+        server_thread.join()
+
+    assert acks.count(MAX_PAYLOAD_SIZE) == 3
+    assert upload.protocol_handler.payload_size == MAX_PAYLOAD_SIZE - 2
+    assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
@@ -0,0 +1,36 @@
+import asyncio
+
+from lib.utils.LoopScheduler import LoopScheduler
+
+
+def test_timers_fire_on_the_loop_and_can_be_rearmed():
+    async def run():
+        scheduler = LoopScheduler(asyncio.get_running_loop())
+        expired: list[str] = []
+
+        scheduler.arm("a", 0.05, expired.append)
+        scheduler.arm("b", 0.01, expired.append)
+        scheduler.arm("a", 0.02, expired.append)  # reemplaza al anterior
+        scheduler.arm("c", 0.01, expired.append)
+        assert scheduler.cancel("c")
+
+        await asyncio.sleep(0.1)
+        assert expired == ["b", "a"]
+        assert scheduler.pending() == 0
+
+    asyncio.run(run())
+
+
+def test_stop_cancels_pending_timers():
+    async def run():
+        scheduler = LoopScheduler(asyncio.get_running_loop())
+        expired: list[str] = []
+
+        scheduler.arm("a", 0.01, expired.append)
+        scheduler.stop()
+
+        await asyncio.sleep(0.05)
+        assert expired == []
+        assert not scheduler.is_armed("a")
+
+    asyncio.run(run())
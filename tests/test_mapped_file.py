@@ -0,0 +1,81 @@
+import os
+
+from lib.server.MappedFile import FileMappings, MappedFile, file_key
+from lib.server.ServerRequestHandler import open_for_upload, partial_path
+from lib.utils.constants import PAYLOAD_SIZE
+
+
+def write(path, data: bytes) -> str:
+    with open(path, "wb") as file:
+        file.write(data)
+    return str(path)
+
+
+def open_mapped(mappings: FileMappings, path: str) -> MappedFile:
+    mapped = mappings.get(path, file_key(os.stat(path)))
+    if mapped is None:
+        mapped = mappings.add(MappedFile(path))
+    return mapped
+
+
+def test_downloads_share_one_mapping(tmp_path):
+    content = os.urandom(3 * PAYLOAD_SIZE + 10)
+    path = write(tmp_path / "file.bin", content)
+
+    mappings = FileMappings()
+    first = open_mapped(mappings, path)
+    second = open_mapped(mappings, path)
+    assert second is first and first.users == 2
+    assert (mappings.hits, mappings.misses) == (1, 1)
+
+    end = len(content)
+    assert first.chunk(0, end) == content[:PAYLOAD_SIZE]
+    assert first.chunk(3 * PAYLOAD_SIZE, end) == content[3 * PAYLOAD_SIZE :]
+
+    mappings.release(first)
+    mappings.release(second)
+    # sin descargas el mapa queda en cache para la próxima
+    assert open_mapped(mappings, path) is first
+    mappings.release(first)
+    assert mappings.hits == 2
+
+
+def test_upload_replaces_the_mapping(tmp_path):
+    path = write(tmp_path / "file.bin", b"viejo")
+
+    mappings = FileMappings()
+    old = open_mapped(mappings, path)
+
+    # una subida del mismo archivo mientras se descarga: se escribe aparte y
+    # reemplaza al original recién al terminar
+    upload = open_for_upload(partial_path(path))
+    upload.write(b"contenido nuevo")
+    upload.close()
+    os.replace(partial_path(path), path)
+
+    new = open_mapped(mappings, path)
+    assert new is not old
+    assert bytes(new.chunk(0, new.size)) == b"contenido nuevo"
+    assert bytes(old.chunk(0, old.size)) == b"viejo"
+    assert (mappings.hits, mappings.misses) == (0, 2)
+    mappings.release(old)
+    mappings.release(new)
+
+
+def test_idle_mappings_are_evicted_least_recently_used(tmp_path):
+    paths = [write(tmp_path / f"{i}.bin", bytes(100)) for i in range(3)]
+    mappings = FileMappings(budget=250)
+
+    for path in paths[:2]:
+        mappings.release(open_mapped(mappings, path))
+    mappings.release(open_mapped(mappings, paths[0]))  # 1 queda como el más viejo
+
+    in_use = open_mapped(mappings, paths[2])
+    assert list(mappings.files) == [paths[0], paths[2]]
+
+    # los que están en uso no se desalojan aunque se pase del presupuesto
+    mappings.budget = 0
+    mappings.release(open_mapped(mappings, paths[0]))
+    assert list(mappings.files) == [paths[2]]
+    mappings.release(in_use)
+    assert not mappings.files
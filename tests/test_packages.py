@@ -0,0 +1,153 @@
+import pytest
+
+from lib.packages.AckPackage import AckPackage
+from lib.packages.DataPackage import DataPackage
+from lib.packages.FactoryPackage import FactoryPackage
+from lib.packages.FinPackage import FinPackage
+from lib.packages.Header import HEADER_SIZE
+from lib.packages.InitPackage import DownloadHeader, UploadHeader
+from lib.packages.NackPackage import NackPackage
+from lib.packages.ProbePackage import ProbePackage
+from lib.utils.enums import Compression, PackageType, Protocol
+from lib.utils.package_error import PackageErr
+
+
+def test_data_package_roundtrip():
+    payload = b"HELLO|WORLD|" * 10
+    raw = DataPackage(payload, 1234).to_bytes()
+
+    assert len(raw) == HEADER_SIZE + len(payload)
+
+    package = FactoryPackage.recover_package(raw)
+    assert package.type.value == PackageType.DATA.value
+    assert package.sequence_number == 1234
+    assert package.data == payload
+    assert package.valid
+
+
+def test_data_package_corrupted_payload():
+    raw = bytearray(DataPackage(b"HELLO WORLD", 1).to_bytes())
+    raw[-1] ^= 0xFF
+
+    with pytest.raises(PackageErr):
+        FactoryPackage.recover_package(bytes(raw))
+
+
+def test_checksum_catches_swapped_bytes_and_wrong_sequence_number():
+    raw = bytearray(DataPackage(b"HELLO WORLD", 1).to_bytes())
+    # una suma de bytes no vería ninguno de los dos cambios
+    swapped = bytearray(raw)
+    swapped[-2], swapped[-1] = swapped[-1], swapped[-2]
+    assert not DataPackage.from_bytes(bytes(swapped)).valid
+
+    other = bytes(DataPackage(b"HELLO WORLD", 2).to_bytes()[:HEADER_SIZE])
+    assert not DataPackage.from_bytes(raw[:3] + other[3:7] + raw[7:]).valid
+
+
+def test_fin_package_carries_digest():
+    assert FactoryPackage.recover_package(FinPackage().to_bytes()).digest is None
+    fin = FactoryPackage.recover_package(FinPackage(b"\x01" * 32).to_bytes())
+    assert fin.digest == b"\x01" * 32
+
+
+def test_init_package_roundtrip():
+    for header in (UploadHeader("archivo.tar.gz"), DownloadHeader("sin_extension")):
+        package = FactoryPackage.recover_package(header.to_bytes())
+        assert package.operation == header.operation
+        assert package.file_name == header.file_name
+
+
+def test_control_packages_roundtrip():
+    ack = FactoryPackage.recover_package(AckPackage(42).to_bytes())
+    assert ack.type.value == PackageType.ACK.value
+    assert ack.sequence_number == 42
+
+    fin = FactoryPackage.recover_package(FinPackage().to_bytes())
+    assert fin.type.value == PackageType.FIN.value
+
+    nack = FactoryPackage.recover_package(NackPackage(7).to_bytes())
+    assert nack.type.value == PackageType.NACK.value
+    assert nack.sequence_number == 7
+    assert nack.valid
+
+    assert not AckPackage.from_bytes(AckPackage(3, False).to_bytes()).valid
+
+
+def test_truncated_package():
+    raw = DataPackage(b"HELLO WORLD", 1).to_bytes()
+
+    with pytest.raises(PackageErr):
+        FactoryPackage.recover_package(raw[: HEADER_SIZE - 1])
+
+    with pytest.raises(PackageErr):
+        FactoryPackage.recover_package(raw[:-1])
+
+
+def test_data_package_pack_into_buffer():
+    package = DataPackage(b"HELLO WORLD", 5)
+    buffer = bytearray(64)
+
+    length = package.pack_into(buffer)
+    assert bytes(buffer[:length]) == package.to_bytes()
+
+    recovered = FactoryPackage.recover_package(memoryview(buffer)[:length])
+    assert isinstance(recovered.data, memoryview)
+    assert recovered.data == b"HELLO WORLD"
+
+
+def test_ack_package_with_sack_blocks_roundtrip():
+    ack = AckPackage(9, cumulative=5, sack_bitmap=0b1011, window=40)
+    recovered = FactoryPackage.recover_package(ack.to_bytes())
+
+    assert recovered.cumulative == 5
+    assert recovered.window == 40
+    assert recovered.sack_bitmap == 0b1011
+    assert [seq for seq in range(12) if recovered.acknowledges(seq)] == [
+        0,
+        1,
+        2,
+        3,
+        4,
+        6,
+        7,
+        9,
+    ]
+
+
+def test_init_package_carries_protocol():
+    header = UploadHeader("archivo.bin", Protocol.SELECTIVE_REPEAT)
+    package = FactoryPackage.recover_package(header.to_bytes())
+
+    assert package.protocol == Protocol.SELECTIVE_REPEAT
+
+
+def test_init_package_carries_range():
+    header = UploadHeader("archivo.bin", offset=2900, length=1450, file_size=10_000)
+    package = FactoryPackage.recover_package(header.to_bytes())
+
+    assert package.is_range()
+    assert (package.offset, package.length, package.file_size) == (2900, 1450, 10_000)
+    assert not DownloadHeader("archivo.bin").is_range()
+
+
+def test_init_package_carries_payload_size_and_probes_their_size():
+    header = DownloadHeader("archivo.bin", payload_size=8959)
+    assert FactoryPackage.recover_package(header.to_bytes()).payload_size == 8959
+
+    raw = ProbePackage(8959).to_bytes()
+    assert len(raw) == HEADER_SIZE + 8959
+    probe = FactoryPackage.recover_package(raw)
+    assert probe.type == PackageType.PROBE
+    assert probe.sequence_number == 8959
+
+
+def test_init_package_carries_compression():
+    header = UploadHeader(
+        "archivo.txt", compression=Compression.LZMA, compression_level=3
+    )
+    package = FactoryPackage.recover_package(header.to_bytes())
+    assert (package.compression, package.compression_level) == (Compression.LZMA, 3)
+    assert DownloadHeader("archivo.txt").compression == Compression.NONE
+
+    header = DownloadHeader("archivo.txt", dictionary_id=0xDEADBEEF)
+    assert FactoryPackage.recover_package(header.to_bytes()).dictionary_id == 0xDEADBEEF
@@ -0,0 +1,108 @@
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from lib.Client import Client
+from lib.common.ParallelTransfer import ParallelTransfer, split_ranges
+from lib.Server import Server
+from lib.utils.constants import PAYLOAD_SIZE
+from lib.utils.enums import Protocol
+
+
+def test_split_ranges_aligned_to_payload():
+    size = 10 * PAYLOAD_SIZE + 7
+    ranges = split_ranges(size, 4)
+    assert ranges[0][0] == 0
+    assert sum(length for _, length in ranges) == size
+    for offset, length in ranges:
+        assert offset % PAYLOAD_SIZE == 0 and length > 0
+
+    # menos paquetes que streams: un rango por paquete
+    assert split_ranges(PAYLOAD_SIZE + 1, 8) == [(0, PAYLOAD_SIZE), (PAYLOAD_SIZE, 1)]
+    assert split_ranges(0, 4) == [(0, 0)]
+
+
+def test_ranges_retry_network_errors_but_not_bugs(tmp_path):
+    transfer = ParallelTransfer(
+        "download",
+        str(tmp_path / "file.bin"),
+        ("127.0.0.1", 9),
+        2,
+        logging_level=logging.ERROR,
+    )
+    attempts = []
+
+    def flaky(offset, length, resume):
+        attempts.append(resume)
+        if len(attempts) == 1:
+            raise TimeoutError("sin respuesta")
+        return True
+
+    transfer.transfer = flaky
+    results = [False]
+    transfer._run_range(results, 0, 0, 10)
+    assert results == [True]
+    assert attempts == [False, True]
+
+    def broken(offset, length, resume):
+        attempts.append(resume)
+        raise AttributeError("bug")
+
+    transfer.transfer = broken
+    attempts.clear()
+    with pytest.raises(AttributeError):
+        transfer._run_range([False], 0, 0, 10)
+    assert len(attempts) == 1
+
+
+@pytest.mark.parametrize("protocol", [Protocol.STOP_WAIT, Protocol.SELECTIVE_REPEAT])
+def test_parallel_upload_and_download(tmp_path, protocol):
+    server_storage = tmp_path / "server"
+    client_storage = tmp_path / "client"
+    server_storage.mkdir()
+    client_storage.mkdir()
+    content = os.urandom(40 * PAYLOAD_SIZE + 123)
+    (client_storage / "file.bin").write_bytes(content)
+
+    server = Server(
+        "127.0.0.1",
+        protocol,
+        0,
+        server_storage=str(server_storage),
+        logging_level=logging.ERROR,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+
+    try:
+        upload = Client(
+            "upload",
+            str(client_storage / "file.bin"),
+            "127.0.0.1",
+            server.port,
+            protocol,
+            logging.ERROR,
+            streams=4,
+        )
+        assert upload.start()
+        assert (server_storage / "file.bin").read_bytes() == content
+
+        download = Client(
+            "download",
+            str(tmp_path / "file.bin"),
+            "127.0.0.1",
+            server.port,
+            protocol,
+            logging.ERROR,
+            streams=4,
+        )
+        assert download.start()
+        assert (tmp_path / "file.bin").read_bytes() == content
+    finally:
+        server.stop()
+        server_thread.join()
@@ -0,0 +1,78 @@
+import os
+
+from lib.protocols.reorder_buffer import ReorderBuffer
+from lib.protocols.write_behind import WriteBehind
+
+
+class ManualExecutor:
+    # corre lo encolado recién cuando el test lo pide
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, function):
+        self.pending.append(function)
+
+    def run(self):
+        while self.pending:
+            self.pending.pop(0)()
+
+
+def test_out_of_order_packets_land_at_their_offset(tmp_path):
+    path = tmp_path / "file.bin"
+    with open(path, "wb") as file:
+        buffer = ReorderBuffer(file, payload_size=4)
+        assert buffer.add(2, b"cc")  # el último paquete es más corto
+        assert buffer.add(0, b"aaaa")
+        assert buffer.has_gap()
+        assert buffer.add(1, memoryview(b"bbbb"))
+
+    assert not buffer.has_gap()
+    assert buffer.next_sequence_number == 3
+    assert path.read_bytes() == b"aaaabbbbcc"
+
+
+def test_duplicates_are_not_written_twice(tmp_path):
+    with open(tmp_path / "file.bin", "wb") as file:
+        buffer = ReorderBuffer(file, payload_size=4)
+        assert buffer.add(0, b"aaaa")
+        assert buffer.add(2, b"cccc")
+
+        assert not buffer.add(0, b"aaaa")
+        assert not buffer.add(2, b"cccc")
+
+
+def test_packets_beyond_capacity_are_rejected(tmp_path):
+    with open(tmp_path / "file.bin", "wb") as file:
+        buffer = ReorderBuffer(file, payload_size=4, capacity=2)
+        assert not buffer.accepts(2)
+        assert not buffer.add(2, b"cccc")
+
+        buffer.add(0, b"aaaa")
+        assert buffer.accepts(2)
+
+
+def test_write_behind_coalesces_contiguous_packets(tmp_path, monkeypatch):
+    calls = []
+    pwritev = os.pwritev
+    monkeypatch.setattr(
+        os, "pwritev", lambda *args: calls.append(args[2]) or pwritev(*args)
+    )
+    executor = ManualExecutor()
+    path = tmp_path / "file.bin"
+    with open(path, "wb") as file:
+        writer = WriteBehind(file.fileno(), executor, capacity=20)
+        buffer = ReorderBuffer(file, payload_size=4, writer=writer)
+        for sequence_number in [1, 0, 2, 4]:
+            assert buffer.add(sequence_number, b"%d" % sequence_number * 4)
+
+        # lo encolado achica la ventana que se anuncia al emisor
+        assert buffer.window() == 1
+        assert path.read_bytes() == b""
+
+        writer.commit()
+        executor.run()
+        writer.flush()
+        assert buffer.window() == 5
+
+    assert calls == [0, 16]  # un pwritev para 0-2 y otro para 4
+    assert path.read_bytes() == b"000011112222" + bytes(4) + b"4444"
@@ -0,0 +1,49 @@
+import threading
+
+from lib.utils.RetransmissionScheduler import RetransmissionScheduler
+
+
+def test_timers_expire_in_deadline_order():
+    scheduler = RetransmissionScheduler()
+    expired: list[int] = []
+    done = threading.Event()
+
+    def on_expire(key):
+        expired.append(key)
+        if len(expired) == 3:
+            done.set()
+
+    scheduler.arm(3, 0.15, on_expire)
+    scheduler.arm(1, 0.05, on_expire)
+    scheduler.arm(2, 0.10, on_expire)
+
+    assert done.wait(timeout=2)
+    assert expired == [1, 2, 3]
+    assert scheduler.pending() == 0
+    scheduler.stop()
+
+
+def test_cancelled_timer_does_not_fire():
+    scheduler = RetransmissionScheduler()
+    expired: list[str] = []
+    done = threading.Event()
+
+    scheduler.arm("cancelado", 0.05, expired.append)
+    scheduler.arm("vigente", 0.1, lambda key: (expired.append(key), done.set()))
+    assert scheduler.cancel("cancelado")
+
+    assert done.wait(timeout=2)
+    assert expired == ["vigente"]
+    scheduler.stop()
+
+
+def test_rearm_replaces_previous_deadline():
+    scheduler = RetransmissionScheduler()
+    fired = threading.Event()
+
+    scheduler.arm("seq", 0.05, lambda _: fired.set())
+    scheduler.arm("seq", 5, lambda _: fired.set())
+
+    assert not fired.wait(timeout=0.2)
+    assert scheduler.is_armed("seq")
+    scheduler.stop()
@@ -0,0 +1,33 @@
+import pytest
+
+from lib.protocols.rtt_estimator import RttEstimator
+
+
+def test_first_sample_initializes_estimates():
+    rtt = RttEstimator(initial_rto=1.0, min_rto=0.01)
+    rtt.sample(0.1)
+
+    assert rtt.srtt == pytest.approx(0.1)
+    assert rtt.rttvar == pytest.approx(0.05)
+    assert rtt.rto == pytest.approx(0.1 + 4 * 0.05)
+
+
+def test_backoff_doubles_until_next_sample():
+    rtt = RttEstimator(initial_rto=1.0, min_rto=0.01, max_rto=3.0)
+
+    rtt.backoff()
+    assert rtt.rto == pytest.approx(2.0)
+    rtt.backoff()
+    assert rtt.rto == pytest.approx(3.0)  # limitado por max_rto
+
+    rtt.sample(0.1)
+    assert rtt.backoffs == 0
+    assert rtt.rto == pytest.approx(0.3)
+
+
+def test_rto_respects_minimum():
+    rtt = RttEstimator(min_rto=0.2)
+    for _ in range(10):
+        rtt.sample(0.0001)
+
+    assert rtt.rto == pytest.approx(0.2)
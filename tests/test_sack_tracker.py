@@ -0,0 +1,35 @@
+from lib.protocols.sack_tracker import SackTracker
+
+
+def test_in_order_packets_advance_cumulative_ack():
+    tracker = SackTracker()
+    for seq in range(3):
+        assert tracker.add(seq)
+
+    ack = tracker.ack_for(2)
+    assert ack.cumulative == 3
+    assert ack.sack_bitmap == 0
+
+
+def test_out_of_order_packets_are_reported_in_bitmap():
+    tracker = SackTracker()
+    for seq in (0, 2, 3, 5):
+        tracker.add(seq)
+
+    assert tracker.has_gap()
+    ack = tracker.ack_for(5)
+    assert ack.cumulative == 1
+    assert [seq for seq in range(7) if ack.acknowledges(seq)] == [0, 2, 3, 5]
+
+    tracker.add(1)
+    assert tracker.cumulative == 4
+    assert tracker.bitmap() == 0b1  # solo falta el 4
+
+
+def test_duplicates_are_detected():
+    tracker = SackTracker()
+    assert tracker.add(0)
+    assert tracker.add(2)
+
+    assert not tracker.add(0)
+    assert not tracker.add(2)
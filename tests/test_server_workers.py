@@ -0,0 +1,60 @@
+import os
+import logging
+
+from lib.Server import Server
+from lib.server.ServerRequestHandler import open_for_upload
+from lib.utils.enums import Protocol
+
+
+def test_upload_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "file.txt")
+
+    first = open_for_upload(path)
+    assert first is not None
+    first.write(b"hola")
+    first.flush()
+
+    assert open_for_upload(path) is None  # mismo archivo, otro cliente
+
+    first.close()
+    second = open_for_upload(path)
+    assert second is not None  # al liberarse el lock se trunca de nuevo
+    second.close()
+    with open(path, "rb") as file:
+        assert file.read() == b""
+
+
+def test_workers_share_the_port():
+    servers = [
+        Server(
+            "127.0.0.1",
+            Protocol.STOP_WAIT,
+            0,
+            logging_level=logging.ERROR,
+            reuse_port=True,
+        )
+        for _ in range(2)
+    ]
+
+    first = servers[0].bind_socket()
+    servers[1].port = servers[0].port
+    second = servers[1].bind_socket()
+    assert first.getsockname() == second.getsockname()
+
+    first.close()
+    second.close()
+
+
+def test_upload_is_preallocated_and_kept_on_resume(tmp_path):
+    path = str(tmp_path / "file.part")
+
+    first = open_for_upload(path, 10_000)
+    assert os.fstat(first.fileno()).st_size == 10_000
+    os.pwrite(first.fileno(), b"hola", 0)
+    first.close()
+
+    # retomar o subir otro rango no borra lo escrito
+    second = open_for_upload(path, 10_000, keep=True)
+    second.close()
+    with open(path, "rb") as file:
+        assert file.read(4) == b"hola"
@@ -0,0 +1,138 @@
+import errno
+import logging
+
+import pytest
+
+from lib.packages.DataPackage import DataPackage
+from lib.packages.Header import HEADER_SIZE
+from lib.utils.constants import MAX_DATAGRAM_SIZE
+from lib.utils.gso import (
+    GRO_STRUCT,
+    SOL_UDP,
+    UDP_GRO,
+    UDP_SEGMENT,
+    segment_groups,
+    split_segments,
+)
+from lib.utils.Socket import Socket
+
+
+def receive_all(receiver, count):
+    received = []
+    while len(received) < count:
+        for package, _ in receiver.recv_many():
+            received.append((package.sequence_number, bytes(package.data)))
+    return received
+
+
+@pytest.mark.parametrize("mode", ["offload", "batched", "one_by_one"])
+def test_send_many_and_recv_many(mode):
+    offload = mode == "offload"
+    sender = Socket(logging.ERROR, segment_offload=offload)
+    receiver = Socket(logging.ERROR, segment_offload=offload)
+    port = receiver.bind("127.0.0.1", 0)
+    receiver.settimeout(1)
+    if mode == "one_by_one":
+        # fuerza el camino de un datagrama por syscall
+        sender.send_batch = receiver.recv_batch = None
+
+    # el último más corto, como el final de un archivo
+    packages = [DataPackage(bytes([i]) * 100, i) for i in range(99)]
+    packages.append(DataPackage(b"fin", 99))
+    sender.send_many(packages, ("127.0.0.1", port))
+
+    expected = [(i, bytes([i]) * 100) for i in range(99)] + [(99, b"fin")]
+    assert receive_all(receiver, 100) == expected
+
+    sender.close()
+    receiver.close()
+
+
+def test_segment_groups_keep_equal_sizes_and_end_at_a_shorter_one():
+    assert segment_groups([100] * 3 + [40, 100, 100]) == [(0, 4), (4, 2)]
+    # uno más largo no puede ir detrás de los más cortos
+    assert segment_groups([40, 100]) == [(0, 1), (1, 1)]
+    # a lo sumo 64 segmentos y 64KB por buffer
+    assert segment_groups([100] * 70) == [(0, 64), (64, 6)]
+    assert segment_groups([30000] * 3) == [(0, 2), (2, 1)]
+    # todos del mismo largo, con uno más corto al final, van juntos
+    assert segment_groups([100] * 5 + [37]) == [(0, 6)]
+    assert segment_groups([100, 100, 37, 37]) == [(0, 3), (3, 1)]
+    assert segment_groups([37]) == [(0, 1)]
+    assert segment_groups([]) == []
+
+
+def test_split_segments_cuts_at_the_gro_size():
+    data = memoryview(bytes(range(250)))
+    gro = [(SOL_UDP, UDP_GRO, GRO_STRUCT.pack(100))]
+    segments = split_segments(data, gro)
+    # el último trae lo que sobra
+    assert [bytes(segment) for segment in segments] == [
+        bytes(range(100)),
+        bytes(range(100, 200)),
+        bytes(range(200, 250)),
+    ]
+    # sin el mensaje de GRO es un solo datagrama
+    assert split_segments(data, []) == [data]
+    assert split_segments(data, [(SOL_UDP, UDP_SEGMENT, b"\x00\x00")]) == [data]
+
+
+def send_with_gso(monkeypatch, error):
+    # un sender que cree tener GSO pero cuyo sendmsg con UDP_SEGMENT falla
+    sender = Socket(logging.ERROR, segment_offload=False)
+    sender.gso = True
+    sender.gso_buffer = memoryview(bytearray(MAX_DATAGRAM_SIZE))
+    attempts = []
+
+    def failing_send_segments(sock, buffer, segment_size, addr):
+        attempts.append((len(buffer), segment_size))
+        raise OSError(error, "segmentation offload")
+
+    monkeypatch.setattr("lib.utils.Socket.send_segments", failing_send_segments)
+    return sender, attempts
+
+
+def test_send_many_falls_back_when_gso_is_unavailable(monkeypatch):
+    sender, attempts = send_with_gso(monkeypatch, errno.EIO)
+    receiver = Socket(logging.ERROR, segment_offload=False)
+    port = receiver.bind("127.0.0.1", 0)
+    receiver.settimeout(1)
+
+    packages = [DataPackage(bytes([i]) * 100, i) for i in range(9)]
+    packages.append(DataPackage(b"fin", 9))
+    sender.send_many(packages[:5], ("127.0.0.1", port))
+    sender.send_many(packages[5:], ("127.0.0.1", port))
+
+    # el primer intento apaga GSO: lo demás sale de a un datagrama
+    assert attempts == [(5 * (HEADER_SIZE + 100), HEADER_SIZE + 100)]
+    assert not sender.gso
+    expected = [(i, bytes([i]) * 100) for i in range(9)] + [(9, b"fin")]
+    assert receive_all(receiver, 10) == expected
+
+    sender.close()
+    receiver.close()
+
+
+def test_send_many_raises_other_gso_errors(monkeypatch):
+    sender, _ = send_with_gso(monkeypatch, errno.EBADF)
+    packages = [DataPackage(b"x" * 100, i) for i in range(3)]
+    with pytest.raises(OSError):
+        sender.send_many(packages, ("127.0.0.1", 9))
+    assert sender.gso
+    sender.close()
+
+
+def test_send_many_without_segment_offload(monkeypatch):
+    monkeypatch.setattr("lib.utils.Socket.send_segments", pytest.fail)
+    sender = Socket(logging.ERROR, segment_offload=False)
+    receiver = Socket(logging.ERROR, segment_offload=False)
+    port = receiver.bind("127.0.0.1", 0)
+    receiver.settimeout(1)
+    assert not sender.gso
+
+    packages = [DataPackage(b"x" * 100, i) for i in range(4)]
+    sender.send_many(packages, ("127.0.0.1", port))
+    assert [seq for seq, _ in receive_all(receiver, 4)] == [0, 1, 2, 3]
+
+    sender.close()
+    receiver.close()
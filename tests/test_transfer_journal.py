@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+
+import pytest
+
+from lib.Client import Client
+from lib.common.Upload import Upload
+from lib.Server import Server
+from lib.server.ServerRequestHandler import partial_path
+from lib.utils.constants import PAYLOAD_SIZE
+from lib.utils.enums import Protocol
+from lib.utils.Socket import Socket
+from lib.utils.TransferJournal import TransferJournal
+
+
+def test_journal_merges_ranges_and_resumes_after_them(tmp_path):
+    journal = TransferJournal(str(tmp_path / "file.bin"))
+    assert journal.resume_offset(100, 0, 100) == 0
+
+    assert not journal.record(100, 0, 10)
+    assert not journal.record(100, 30, 60)
+    assert not journal.record(100, 10, 20)
+    assert journal.load() == (100, [(0, 20), (30, 60)])
+
+    assert journal.resume_offset(100, 0, 100) == 20
+    assert journal.resume_offset(100, 30, 50) == 50  # rango ya completo
+    assert journal.resume_offset(200, 0, 200) == 0  # de otro archivo, no vale
+
+    # un rango que llegó corrupto se vuelve a transferir
+    journal.forget(100, 5, 40)
+    assert journal.load() == (100, [(0, 5), (40, 60)])
+    journal.record(100, 5, 20)
+
+    # al cubrir el archivo entero el journal desaparece
+    assert journal.record(100, 20, 40) is False
+    assert journal.record(100, 60, 100)
+    assert journal.load() is None
+
+
+def start_server(storage, protocol):
+    server = Server(
+        "127.0.0.1",
+        protocol,
+        0,
+        server_storage=str(storage),
+        logging_level=logging.ERROR,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+    return server, server_thread
+
+
+@pytest.mark.parametrize("operation", ["upload", "download"])
+def test_interrupted_transfer_resumes(tmp_path, operation):
+    server_storage = tmp_path / "server"
+    client_storage = tmp_path / "client"
+    server_storage.mkdir()
+    client_storage.mkdir()
+    content = os.urandom(20 * PAYLOAD_SIZE + 17)
+    done = 8 * PAYLOAD_SIZE
+
+    # una transferencia anterior dejó escritos los primeros bytes; se marcan
+    # con otro contenido para ver que no se vuelven a mandar
+    source, target = client_storage, server_storage
+    if operation == "download":
+        source, target = server_storage, client_storage
+    (source / "file.bin").write_bytes(content)
+    # el servidor sigue una subida sobre su archivo temporal
+    partial = target / "file.bin"
+    if operation == "upload":
+        partial = partial_path(str(partial))
+    with open(partial, "wb") as file:
+        file.write(b"x" * done)
+    TransferJournal(str(target / "file.bin")).record(len(content), 0, done)
+
+    server, server_thread = start_server(server_storage, Protocol.SELECTIVE_REPEAT)
+    try:
+        client = Client(
+            operation,
+            str(client_storage / "file.bin"),
+            "127.0.0.1",
+            server.port,
+            Protocol.SELECTIVE_REPEAT,
+            logging.ERROR,
+            resume=True,
+        )
+        assert client.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    assert (target / "file.bin").read_bytes() == b"x" * done + content[done:]
+    assert TransferJournal(str(target / "file.bin")).load() is None
+
+
+def test_fresh_ranged_upload_ignores_stale_journal(tmp_path):
+    server_storage = tmp_path / "server"
+    server_storage.mkdir()
+    content = os.urandom(20 * PAYLOAD_SIZE)
+    (tmp_path / "file.bin").write_bytes(content)
+    half = len(content) // 2
+
+    # una subida anterior, ya abandonada, dejó anotada la segunda mitad
+    with open(partial_path(str(server_storage / "file.bin")), "wb") as file:
+        file.write(b"x" * len(content))
+    TransferJournal(str(server_storage / "file.bin")).record(
+        len(content), half, len(content)
+    )
+
+    server, server_thread = start_server(server_storage, Protocol.SELECTIVE_REPEAT)
+    try:
+        socket = Socket(logging.ERROR)
+        upload = Upload(
+            str(tmp_path / "file.bin"),
+            socket,
+            ("127.0.0.1", server.port),
+            Protocol.SELECTIVE_REPEAT,
+            logging.ERROR,
+            offset=0,
+            length=half,
+        )
+        assert upload.start()
+    finally:
+        server.stop()
+        server_thread.join()
+
+    # sin resume el journal viejo no cuenta: falta la segunda mitad
+    assert not (server_storage / "file.bin").exists()
+    journal = TransferJournal(str(server_storage / "file.bin"))
+    assert journal.load() == (len(content), [(0, half)])
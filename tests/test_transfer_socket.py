@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+
+from lib.packages.DataPackage import DataPackage
+from lib.packages.FinPackage import FinPackage
+from lib.packages.InitPackage import UploadHeader
+from lib.Server import Server
+from lib.utils.checksum import file_digest
+from lib.utils.constants import MAX_PAYLOAD_SIZE, PAYLOAD_SIZE
+from lib.utils.enums import PackageType, Protocol
+from lib.utils.Socket import Socket
+
+
+def start_server(storage, max_payload_size=MAX_PAYLOAD_SIZE):
+    server = Server(
+        "127.0.0.1",
+        Protocol.STOP_WAIT,
+        0,
+        server_storage=str(storage),
+        logging_level=logging.ERROR,
+        max_payload_size=max_payload_size,
+    )
+    server_thread = threading.Thread(target=server.start)
+    server_thread.start()
+    while server.loop is None:
+        time.sleep(0.01)
+    return server, server_thread
+
+
+def test_transfer_moves_to_its_own_port(tmp_path):
+    server, server_thread = start_server(tmp_path)
+
+    client = Socket(logging.ERROR)
+    listen_addr = ("127.0.0.1", server.port)
+    package, transfer_addr = client.request(UploadHeader("file.txt"), listen_addr)
+    assert package.type == PackageType.INIT
+    assert transfer_addr[1] != server.port  # el Init se responde desde otro puerto
+
+    # el resto de la transferencia va contra el socket nuevo; el FIN de una
+    # subida lleva el digest de lo mandado, acá nada
+    package, addr = client.request(FinPackage(file_digest().digest()), transfer_addr)
+    assert package.type == PackageType.ACK
+    assert addr == transfer_addr
+
+    client.close()
+    server.stop()
+    server_thread.join()
+
+
+def test_upload_that_does_not_match_its_digest_is_rejected(tmp_path):
+    server, server_thread = start_server(tmp_path)
+    client = Socket(logging.ERROR)
+    try:
+        header = UploadHeader("file.txt", file_size=4)
+        _, transfer_addr = client.request(header, ("127.0.0.1", server.port))
+        package, _ = client.request(DataPackage(b"data", 0), transfer_addr)
+        assert package.type == PackageType.ACK
+
+        digest = file_digest()
+        digest.update(b"otra")
+        package, _ = client.request(FinPackage(digest.digest()), transfer_addr)
+        # el servidor responde con un FIN y no publica el archivo
+        assert package.type == PackageType.FIN
+        assert not (tmp_path / "file.txt").exists()
+    finally:
+        client.close()
+        server.stop()
+        server_thread.join()
+
+
+def test_payload_size_is_probed_and_capped_by_the_server(tmp_path):
+    server, server_thread = start_server(tmp_path, max_payload_size=4000)
+    client = Socket(logging.ERROR)
+    listen_addr = ("127.0.0.1", server.port)
+    try:
+        # loopback deja pasar sin fragmentar el datagrama más grande
+        assert client.probe_payload_size(listen_addr) == MAX_PAYLOAD_SIZE
+        assert client.probe_payload_size(listen_addr, 1000) == 1000
+
+        header = UploadHeader("file.txt", payload_size=MAX_PAYLOAD_SIZE)
+        package, _ = client.request(header, listen_addr)
+        assert package.payload_size == 4000
+        # sin pedir nada se usa el de siempre
+        other = Socket(logging.ERROR)
+        package, _ = other.request(UploadHeader("other.txt"), listen_addr)
+        other.close()
+        assert package.payload_size == PAYLOAD_SIZE
+    finally:
+        client.close()
+        server.stop()
+        server_thread.join()
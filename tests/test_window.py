@@ -0,0 +1,68 @@
+import pytest
+
+from lib.protocols.selective_repeat import Window, WindowItem
+
+
+def fill(window, first, last):
+    for seq in range(first, last):
+        window.add_item(WindowItem(seq, b"x"))
+
+
+def test_lookup_and_slide_wrap_around():
+    window = Window(4)
+    fill(window, 0, 4)
+
+    assert window.get(2).sequence_number == 2
+    assert window.get(6) is None
+
+    window.mark_acked(0)
+    window.mark_acked(1)
+    while window.first_is_acked():
+        window.remove_first_sent()
+    fill(window, 4, 6)  # reutiliza los slots 0 y 1
+
+    assert window.length() == 4
+    assert window.first().sequence_number == 2
+    assert window.get(5).sequence_number == 5
+    assert window.get(1) is None
+
+
+def test_mark_acked_only_once():
+    window = Window(4)
+    fill(window, 0, 3)
+
+    assert window.mark_acked(1) is not None
+    assert window.mark_acked(1) is None
+    assert [item.sequence_number for item in window.unacked_before(3)] == [0, 2]
+
+
+def test_full_window_rejects_items():
+    window = Window(2)
+    fill(window, 0, 2)
+
+    with pytest.raises(IndexError):
+        window.add_item(WindowItem(2, b"x"))
+
+
+def test_out_of_order_item_is_rejected():
+    window = Window(4)
+    fill(window, 0, 1)
+
+    with pytest.raises(ValueError):
+        window.add_item(WindowItem(2, b"x"))
+
+
+def test_remove_from_empty_window():
+    with pytest.raises(IndexError):
+        Window(2).remove_first_sent()
+
+
+def test_alternating_sequence_numbers():
+    # stop and wait: un único paquete en vuelo con seq_number 0/1
+    window = Window(1)
+    for seq in (0, 1, 0):
+        window.add_item(WindowItem(seq, b"x"))
+        assert window.get(seq ^ 1) is None
+        window.mark_acked(seq)
+        window.remove_first_sent()
+    assert window.length() == 0
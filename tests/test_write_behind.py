@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lib.protocols.write_behind import WriteBehind
+
+
+class ManualExecutor:
+    # corre lo encolado recién cuando el test lo pide
+    def __init__(self):
+        self.pending = []
+
+    def submit(self, function):
+        self.pending.append(function)
+
+    def run(self):
+        while self.pending:
+            self.pending.pop(0)()
+
+
+def record_pwritev(monkeypatch, limit=None):
+    # anota cada pwritev; con limit escribe como mucho limit bytes por llamada
+    calls = []
+    pwritev = os.pwritev
+
+    def recording_pwritev(fd, buffers, position):
+        calls.append((position, [bytes(buffer) for buffer in buffers]))
+        if limit is None:
+            return pwritev(fd, buffers, position)
+        return os.pwrite(fd, b"".join(buffers)[:limit], position)
+
+    monkeypatch.setattr(os, "pwritev", recording_pwritev)
+    return calls
+
+
+def test_contiguous_segments_are_written_together(tmp_path, monkeypatch):
+    calls = record_pwritev(monkeypatch)
+    executor = ManualExecutor()
+    path = tmp_path / "file.bin"
+    with open(path, "wb") as file:
+        writer = WriteBehind(file.fileno(), executor, batch=16)
+        writer.write(4, b"bbbb")
+        writer.write(12, b"dddd")
+        writer.write(0, b"aaaa")
+        # no llega a un batch: nadie se pone a escribir
+        assert executor.pending == []
+
+        writer.write(20, memoryview(b"ffff"))
+        assert len(executor.pending) == 1
+        executor.run()
+
+    assert calls == [(0, [b"aaaa", b"bbbb"]), (12, [b"dddd"]), (20, [b"ffff"])]
+    assert path.read_bytes() == b"aaaabbbb" + bytes(4) + b"dddd" + bytes(4) + b"ffff"
+
+
+def test_partial_writes_resume_where_they_stopped(tmp_path, monkeypatch):
+    calls = record_pwritev(monkeypatch, limit=3)
+    executor = ManualExecutor()
+    path = tmp_path / "file.bin"
+    with open(path, "wb") as file:
+        writer = WriteBehind(file.fileno(), executor)
+        writer.write(0, b"abcd")
+        writer.write(4, b"efgh")
+        writer.commit()
+        executor.run()
+
+    assert [position for position, _ in calls] == [0, 3, 6]
+    assert calls[1][1] == [b"d", b"efgh"]
+    assert path.read_bytes() == b"abcdefgh"
+
+
+def test_flush_waits_for_everything_queued(tmp_path):
+    path = tmp_path / "file.bin"
+    chunks = [os.urandom(1000) for _ in range(50)]
+    with ThreadPoolExecutor(2) as executor, open(path, "wb") as file:
+        writer = WriteBehind(file.fileno(), executor, batch=4000)
+        for i in reversed(range(len(chunks))):
+            writer.write(i * 1000, chunks[i])
+        writer.flush()
+        assert writer.free() == writer.capacity
+        assert path.read_bytes() == b"".join(chunks)
+
+
+def test_write_errors_surface_on_flush_and_write(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(b"")
+    with open(path, "rb") as file, ThreadPoolExecutor(1) as executor:
+        writer = WriteBehind(file.fileno(), executor)
+        writer.write(0, b"data")
+        with pytest.raises(OSError):
+            writer.flush()
+        # lo que quedaba en cola se descarta: la ventana vuelve a abrirse
+        assert writer.free() == writer.capacity
+        with pytest.raises(OSError):
+            writer.write(4, b"more")
+
+
+def test_window_shrinks_while_queued_and_grows_when_written(tmp_path):
+    executor = ManualExecutor()
+    with open(tmp_path / "file.bin", "wb") as file:
+        writer = WriteBehind(file.fileno(), executor, capacity=20, batch=100)
+        writer.write(0, b"x" * 8)
+        assert writer.free() == 12
+        writer.write(8, b"x" * 16)
+        # lo que estaba en vuelo puede pasarse de capacity
+        assert writer.free() == 0
+
+        writer.commit()
+        executor.run()
+        assert writer.free() == 20
+
+
+def test_on_drain_fires_once_the_queue_drops_below_half(tmp_path):
+    executor = ManualExecutor()
+    drained = []
+    with open(tmp_path / "file.bin", "wb") as file:
+        writer = WriteBehind(
+            file.fileno(),
+            executor,
+            capacity=20,
+            batch=100,
+            on_drain=lambda: drained.append(writer.free()),
+        )
+        # sin pasar la mitad la ventana nunca se achicó: no hay que avisar
+        writer.write(0, b"x" * 10)
+        writer.commit()
+        executor.run()
+        assert drained == []
+
+        writer.write(10, b"x" * 15)
+        writer.commit()
+        executor.run()
+        assert drained == [20]